@@ -0,0 +1,99 @@
+# bench/chain.py
+# In-process EVM (eth-tester + py-evm) with the bench token deployed, served
+# over plain JSON-RPC/HTTP so the bot talks to it exactly as it talks to Base.
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from eth_tester import EthereumTester, PyEVMBackend
+from web3 import EthereumTesterProvider, Web3
+from web3._utils.encoding import Web3JsonEncoder
+
+from bench import contracts
+
+class LocalChain:
+    """A py-evm chain with BenchToken (and Disperse) deployed by account 0.
+
+    Transactions are mined as they arrive; a background ticker also mines an
+    empty block every `block_time` seconds so confirmation depth advances the
+    way it does on a live chain.
+    """
+
+    def __init__(self, supply_tokens: int = 10**9, block_time: float = 0.5):
+        self.backend = PyEVMBackend()
+        self.tester = EthereumTester(self.backend)
+        self.w3 = Web3(EthereumTesterProvider(self.tester))
+        self.funder_key = self.backend.account_keys[0]
+        self.funder = self.funder_key.public_key.to_checksum_address()
+        self.block_time = block_time
+        self._lock = threading.Lock()
+        self._call = self.w3.provider.request_func(self.w3, self.w3.middleware_onion)
+        self._stop = threading.Event()
+        self._server: ThreadingHTTPServer | None = None
+
+        arts = contracts.load()
+        self.token = self._deploy(arts["BenchToken"], supply_tokens * 10**18)
+        self.disperse = self._deploy(arts["Disperse"])
+
+    def _deploy(self, art: dict, *args):
+        factory = self.w3.eth.contract(abi=art["abi"], bytecode=art["bin"])
+        tx_hash = factory.constructor(*args).transact({"from": self.funder})
+        addr = self.w3.eth.wait_for_transaction_receipt(tx_hash)["contractAddress"]
+        return self.w3.eth.contract(address=addr, abi=art["abi"])
+
+    @property
+    def chain_id(self) -> int:
+        return self.w3.eth.chain_id
+
+    def balance_of(self, addr: str) -> int:
+        with self._lock:
+            return self.token.functions.balanceOf(Web3.to_checksum_address(addr)).call()
+
+    def handle(self, req: dict) -> dict:
+        with self._lock:
+            try:
+                resp = self._call(req["method"], req.get("params") or [])
+            except Exception as e:   # reverts, bad nonces, unknown methods
+                resp = {"error": {"code": -32000, "message": str(e)}}
+        resp = dict(resp)
+        resp["jsonrpc"], resp["id"] = "2.0", req.get("id")
+        return resp
+
+    def _tick(self):
+        while not self._stop.wait(self.block_time):
+            with self._lock:
+                self.tester.mine_blocks()
+
+    def serve(self, port: int = 0) -> str:
+        """Start the JSON-RPC endpoint (and the block ticker); returns its URL."""
+        chain = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive, like a real RPC endpoint
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                out = [chain.handle(r) for r in body] if isinstance(body, list) else chain.handle(body)
+                data = json.dumps(out, cls=Web3JsonEncoder).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="bench-rpc", daemon=True).start()
+        if self.block_time > 0:
+            threading.Thread(target=self._tick, name="bench-miner", daemon=True).start()
+        url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        logging.info("Local chain %d on %s (token %s)", self.chain_id, url, self.token.address)
+        return url
+
+    def close(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
@@ -0,0 +1,85 @@
+# bench/contracts.py
+# Minimal ERC-20 and Disperse, compiled once with py-solc-x and cached.
+import os
+import json
+
+SOLC_VERSION = os.getenv("BENCH_SOLC_VERSION", "0.8.24")
+CACHE_FILE   = os.path.join(os.path.dirname(__file__), ".cache", f"contracts-{SOLC_VERSION}.json")
+
+SOURCE = """
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+contract BenchToken {
+    string public name = "Bench CIK";
+    string public symbol = "CIK";
+    uint8 public decimals = 18;
+    uint256 public totalSupply;
+    mapping(address => uint256) public balanceOf;
+    mapping(address => mapping(address => uint256)) public allowance;
+
+    event Transfer(address indexed from, address indexed to, uint256 value);
+    event Approval(address indexed owner, address indexed spender, uint256 value);
+
+    constructor(uint256 supply) {
+        totalSupply = supply;
+        balanceOf[msg.sender] = supply;
+        emit Transfer(address(0), msg.sender, supply);
+    }
+
+    function transfer(address to, uint256 value) external returns (bool) {
+        _move(msg.sender, to, value);
+        return true;
+    }
+
+    function approve(address spender, uint256 value) external returns (bool) {
+        allowance[msg.sender][spender] = value;
+        emit Approval(msg.sender, spender, value);
+        return true;
+    }
+
+    function transferFrom(address from, address to, uint256 value) external returns (bool) {
+        uint256 a = allowance[from][msg.sender];
+        if (a != type(uint256).max) {
+            require(a >= value, "allowance");
+            allowance[from][msg.sender] = a - value;
+        }
+        _move(from, to, value);
+        return true;
+    }
+
+    function _move(address from, address to, uint256 value) internal {
+        require(balanceOf[from] >= value, "balance");
+        balanceOf[from] -= value;
+        balanceOf[to] += value;
+        emit Transfer(from, to, value);
+    }
+}
+
+interface IERC20 {
+    function transferFrom(address from, address to, uint256 value) external returns (bool);
+}
+
+contract Disperse {
+    function disperseToken(IERC20 token, address[] calldata recipients, uint256[] calldata values) external {
+        for (uint256 i = 0; i < recipients.length; i++)
+            require(token.transferFrom(msg.sender, recipients[i], values[i]));
+    }
+}
+"""
+
+def load() -> dict[str, dict]:
+    """{"BenchToken": {"abi", "bin"}, "Disperse": {...}}; compiles on first use."""
+    if os.path.exists(CACHE_FILE):
+        with open(CACHE_FILE) as f:
+            return json.load(f)
+    import solcx
+    if SOLC_VERSION not in {str(v) for v in solcx.get_installed_solc_versions()}:
+        solcx.install_solc(SOLC_VERSION)
+    out = solcx.compile_source(SOURCE, output_values=["abi", "bin"], solc_version=SOLC_VERSION)
+    arts = {key.split(":")[-1]: {"abi": v["abi"], "bin": v["bin"]}
+            for key, v in out.items() if key.split(":")[-1] in ("BenchToken", "Disperse")}
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    with open(CACHE_FILE, "w") as f:
+        json.dump(arts, f)
+    return arts
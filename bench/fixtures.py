@@ -0,0 +1,133 @@
+# bench/fixtures.py
+# Synthetic mention traffic and a fake x.com that Playwright serves in place
+# of the real one: the mentions timeline (HTML + v2 JSON pages), tweet pages
+# with a reply box, and the CreateTweet endpoint.
+import re
+import json
+import random
+import asyncio
+from urllib.parse import urlparse, parse_qs
+
+MENTIONS_HTML = """<!doctype html><html><body><div style="height:20000px"></div><script>
+let next = 0, busy = false;
+async function more() {
+  if (busy || next === null) return;
+  busy = true;
+  const r = await fetch('/i/api/2/notifications/mentions.json?cursor=' + next);
+  next = (await r.json()).next_cursor;
+  busy = false;
+}
+more();
+addEventListener('wheel', more);
+</script></body></html>"""
+
+STATUS_HTML = """<!doctype html><html><body>
+<div role="textbox" contenteditable="true" style="min-height:40px"></div>
+<input type="file" data-testid="fileInput" multiple>
+<div data-testid="tweetButtonInline" role="button">Reply</div>
+<script>
+const box = document.querySelector("div[role='textbox']");
+function post() {
+  fetch('/i/api/graphql/bench/CreateTweet', {method: 'POST',
+    body: JSON.stringify({status: location.pathname, text: box.innerText})});
+}
+document.querySelector("[data-testid='tweetButtonInline']").onclick = post;
+box.addEventListener('keydown', e => { if (e.ctrlKey && e.key === 'Enter') post(); });
+</script></body></html>"""
+
+STATUS_RE = re.compile(r"^/[A-Za-z0-9_]+/status/\d+$")
+
+def _addr(rng: random.Random) -> str:
+    return "0x" + "".join(rng.choice("0123456789abcdef") for _ in range(40))
+
+class MentionMix:
+    """Generates mentions of `bot` in the given bind / bare-address / bless ratio.
+
+    Bind traffic comes from fresh users; blessings come from bound users and
+    target a mix of bound and unknown handles, so later bare-address replies
+    from those targets hit the pending-blessing path.
+    """
+
+    def __init__(self, bot: str, bind: float = 0.4, addr: float = 0.2, bless: float = 0.4, seed: int = 1):
+        self.bot = bot
+        self.weights = (bind, addr, bless)
+        self.rng = random.Random(seed)
+        self.next_id = 1_000
+        self.fresh = 0
+        self.bound: list[str] = []
+        self.blessed: list[str] = []
+
+    def _user(self) -> str:
+        self.fresh += 1
+        return f"user{self.fresh}"
+
+    def take(self, n: int) -> list[dict]:
+        out = []
+        for _ in range(n):
+            kind = self.rng.choices(("bind", "addr", "bless"), self.weights)[0]
+            if kind == "bless" and not self.bound:
+                kind = "bind"
+            if kind == "bind":
+                who = self._user()
+                text = f"@{self.bot} bind me {_addr(self.rng)}"
+                self.bound.append(who)
+            elif kind == "addr":
+                who = self.blessed.pop() if self.blessed else self._user()
+                text = f"@{self.bot} {_addr(self.rng)}"
+            else:
+                who = self.rng.choice(self.bound)
+                others = [u for u in self.bound if u != who]
+                target = self.rng.choice(others) if others and self.rng.random() < 0.5 else self._user()
+                if target not in self.bound:
+                    self.blessed.append(target)
+                text = f"@{self.bot} bless @{target}"
+            self.next_id += self.rng.randint(1, 50)
+            out.append({"id": self.next_id, "handle": who, "text": text})
+        return out
+
+class FakeX:
+    """Route handler for https://x.com/** inside the bot's browser context."""
+
+    def __init__(self, bot: str, page_size: int = 20, latency: float = 0.0):
+        self.bot = bot
+        self.page_size = page_size
+        self.latency = latency
+        # an old tweet at the bottom so the scraper sees since_id and stops scrolling
+        self.timeline: list[dict] = [{"id": 1, "handle": "genesis", "text": f"@{bot} hello"}]
+        self.replies: list[dict] = []
+
+    def add(self, mentions: list[dict]):
+        self.timeline.extend(mentions)
+        self.timeline.sort(key=lambda m: m["id"], reverse=True)
+
+    def page(self, cursor: int) -> dict:
+        chunk = self.timeline[cursor:cursor + self.page_size]
+        tweets, users = {}, {}
+        for m in chunk:
+            uid = str(abs(hash(m["handle"])) % 10**12)
+            users[uid] = {"id_str": uid, "screen_name": m["handle"]}
+            tweets[str(m["id"])] = {"id_str": str(m["id"]), "user_id_str": uid, "full_text": m["text"],
+                                    "entities": {"user_mentions": [{"screen_name": self.bot}]}}
+        nxt = cursor + self.page_size
+        return {"globalObjects": {"tweets": tweets, "users": users},
+                "next_cursor": nxt if nxt < len(self.timeline) else None}
+
+    async def route(self, route):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        req = route.request
+        path = urlparse(req.url).path
+        if path == "/notifications/mentions":
+            await route.fulfill(content_type="text/html", body=MENTIONS_HTML)
+        elif path.endswith("/notifications/mentions.json"):
+            cursor = int(parse_qs(urlparse(req.url).query).get("cursor", ["0"])[0])
+            await route.fulfill(content_type="application/json", body=json.dumps(self.page(cursor)))
+        elif path.endswith("/CreateTweet"):
+            self.replies.append(json.loads(req.post_data or "{}"))
+            rest_id = str(10**18 + len(self.replies))
+            await route.fulfill(content_type="application/json",
+                                body=json.dumps({"data": {"create_tweet": {"tweet_results": {"result": {"rest_id": rest_id}}}}}))
+        elif STATUS_RE.match(path):
+            await route.fulfill(content_type="text/html", body=STATUS_HTML)
+        else:
+            await route.fulfill(status=204, body="")
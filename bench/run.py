@@ -0,0 +1,176 @@
+# bench/run.py
+# End-to-end benchmark: drives mainBase.main() against a local EVM and a fake
+# x.com, then reports throughput, per-stage p50/p99 latency and peak memory.
+#
+#   pip install -r requirements.txt -r bench/requirements.txt && playwright install chromium
+#   python -m bench.run --mentions 200 --rounds 3
+#   python -m bench.run --json bench_output.json                      # save a baseline
+#   python -m bench.run --baseline bench_output.json --tolerance 0.15 # fail on regressions
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import resource
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.chain import LocalChain
+from bench.fixtures import FakeX, MentionMix
+
+BOT = "cikbot"
+
+def percentile(xs: list[float], q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, max(0, round(q * len(xs)) - 1))] if xs else 0.0
+
+def bot_env(chain: LocalChain, url: str, args) -> dict:
+    return {
+        "ETH_RPC_URL": url,
+        "CHAIN_ID": str(chain.chain_id),
+        "FUNDER_PRIVATE_KEY": chain.funder_key.to_hex(),
+        "FUNDER_ADDRESS": chain.funder,
+        "TOKEN_ADDRESS": chain.token.address,
+        "DISPERSE_ADDRESS": chain.disperse.address,
+        "BATCH_PAYOUTS": "1" if args.batch else "0",
+        "X_USERNAME": BOT,
+        "X_PASSWORD": "bench",
+        "IMAGE_DIR": "images",
+        "PRIORITY_FEE_GWEI": "1",
+        "CONFIRMATIONS": str(args.confirmations),
+        "BLOCK_POLL_SECS": str(min(args.block_time, 1.0) or 0.2),
+        "MENTIONS_PAGE_TIMEOUT": "1",
+        "MENTIONS_IDLE_SCROLLS": "1",
+        "REPLY_BACKOFF_SECS": "0.1",
+    }
+
+async def _install_routes(browser, fake: FakeX):
+    ctx = await browser.context()
+    await ctx.route("https://x.com/**", fake.route)
+
+def run(args) -> dict:
+    work = tempfile.mkdtemp(prefix="cik-bench-")
+    os.chdir(work)   # users.db, last_id.txt, x_state.json and token_meta.json are cwd-relative
+    os.makedirs("images")
+    with open("x_state.json", "w") as f:
+        json.dump({"cookies": [], "origins": []}, f)
+    with open("last_id.txt", "w") as f:
+        f.write("1")
+
+    chain = LocalChain(block_time=args.block_time)
+    url = chain.serve()
+    for k, v in bot_env(chain, url, args).items():
+        os.environ.setdefault(k, v)
+
+    import metrics
+    samples = metrics.keep_samples()
+    import mainBase as bot
+
+    fake = FakeX(BOT, page_size=args.page_size, latency=args.latency)
+    mix = MentionMix(BOT, *args.mix, seed=args.seed)
+    bot.startup()
+    bot.BROWSER.run(_install_routes(bot.BROWSER, fake))
+
+    tracemalloc.start()
+    rounds, total = [], 0
+    t_start = time.perf_counter()
+    for r in range(args.rounds):
+        batch = mix.take(args.mentions)
+        fake.add(batch)
+        t0 = time.perf_counter()
+        bot.main()
+        t_loop = time.perf_counter() - t0
+        deadline = time.time() + args.settle_timeout
+        while bot.CONFIRMS is not None and bot.CONFIRMS.pending() and time.time() < deadline:
+            time.sleep(0.05)
+        bot.settle_payouts()   # records and replies for the confirmed payouts
+        t_settled = time.perf_counter() - t0
+        rounds.append({"mentions": len(batch), "loop_s": t_loop, "settled_s": t_settled})
+        total += len(batch)
+        print(f"round {r + 1}: {len(batch)} mentions, loop {t_loop:.2f}s, settled {t_settled:.2f}s", file=sys.stderr)
+    elapsed = time.perf_counter() - t_start
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    processed = bot.conn.execute("SELECT reason, count(*) FROM processed_tweets GROUP BY reason").fetchall()
+    report = {
+        "mentions": total,
+        "rounds": rounds,
+        "throughput_mps": total / sum(r["loop_s"] for r in rounds),
+        "settled_throughput_mps": total / elapsed,
+        "stages": {k: {"n": len(v), "p50_ms": percentile(v, .50) * 1e3, "p99_ms": percentile(v, .99) * 1e3}
+                   for k, v in sorted(samples.items())},
+        "peak_python_heap_mb": py_peak / 2**20,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "replies": len(fake.replies),
+        "processed": dict(processed),
+        "funder_balance": chain.balance_of(chain.funder) / 10**18,
+    }
+
+    bot.BROWSER.run(bot.BROWSER.close())
+    if bot.RPC is not None:
+        bot.RPC.close()
+    chain.close()
+    return report
+
+def print_report(rep: dict):
+    print(f"\n{rep['mentions']} mentions in {len(rep['rounds'])} round(s)")
+    print(f"  throughput       {rep['throughput_mps']:8.2f} mentions/s (loop)")
+    print(f"                   {rep['settled_throughput_mps']:8.2f} mentions/s (incl. confirmations)")
+    print(f"  peak heap / RSS  {rep['peak_python_heap_mb']:8.1f} / {rep['peak_rss_mb']:.1f} MB")
+    print(f"  replies posted   {rep['replies']:8d}")
+    print(f"\n  {'stage':<20}{'n':>7}{'p50 ms':>11}{'p99 ms':>11}")
+    for name, s in rep["stages"].items():
+        print(f"  {name:<20}{s['n']:>7}{s['p50_ms']:>11.2f}{s['p99_ms']:>11.2f}")
+    print("\n  processed: " + ", ".join(f"{k}={v}" for k, v in sorted(rep["processed"].items())))
+
+def regressions(rep: dict, base: dict, tol: float) -> list[str]:
+    out = []
+    if rep["throughput_mps"] < base["throughput_mps"] * (1 - tol):
+        out.append(f"throughput {rep['throughput_mps']:.2f} < baseline {base['throughput_mps']:.2f}")
+    for name, s in rep["stages"].items():
+        b = base["stages"].get(name)
+        if b and b["p99_ms"] > 1 and s["p99_ms"] > b["p99_ms"] * (1 + tol):
+            out.append(f"{name} p99 {s['p99_ms']:.1f}ms > baseline {b['p99_ms']:.1f}ms")
+    if rep["peak_python_heap_mb"] > base["peak_python_heap_mb"] * (1 + tol):
+        out.append(f"peak heap {rep['peak_python_heap_mb']:.1f}MB > baseline {base['peak_python_heap_mb']:.1f}MB")
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="End-to-end bot benchmark on a local chain and a fake x.com")
+    ap.add_argument("--mentions", type=int, default=100, help="mentions per round")
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--mix", type=float, nargs=3, default=(0.4, 0.2, 0.4), metavar=("BIND", "ADDR", "BLESS"))
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--batch", action="store_true", help="BATCH_PAYOUTS=1 (one disperse tx per round)")
+    ap.add_argument("--block-time", type=float, default=0.5, help="seconds between empty blocks; 0 = automine only")
+    ap.add_argument("--confirmations", type=int, default=1)
+    ap.add_argument("--page-size", type=int, default=20, help="tweets per timeline JSON page")
+    ap.add_argument("--latency", type=float, default=0.0, help="added to every fake x.com response, seconds")
+    ap.add_argument("--settle-timeout", type=float, default=120)
+    ap.add_argument("--json", help="write the report here")
+    ap.add_argument("--baseline", help="compare against a saved report; exit 1 on regressions")
+    ap.add_argument("--tolerance", type=float, default=0.15)
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(message)s")
+    json_out = args.json and os.path.abspath(args.json)   # run() chdirs into a scratch dir
+    baseline = args.baseline and os.path.abspath(args.baseline)
+    rep = run(args)
+    print_report(rep)
+    if json_out:
+        with open(json_out, "w") as f:
+            json.dump(rep, f, indent=2)
+    if baseline:
+        with open(baseline) as f:
+            bad = regressions(rep, json.load(f), args.tolerance)
+        for line in bad:
+            print("REGRESSION:", line)
+        sys.exit(1 if bad else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# fee_oracle.py
+# Block-scoped fee and gas cache shared by the bot (mainBase.py) and the API (webapp.py).
+import os
+import time
+import logging
+import threading
+
+from web3 import Web3
+
+import metrics
+
+ETH_TRANSFER_GAS = 21_000
+GAS_HEADROOM     = 1.10   # unused gas is refunded, so pad memoized estimates a little
+
+class FeeOracle:
+    """Caches base fee / tip per block and ERC-20 transfer gas per (token, cold|warm).
+
+    The head is re-read at most once per `head_ttl` seconds (Base produces a
+    block every 2s), so every quote and payout inside one block shares a
+    single `eth_getBlockByNumber`; concurrent callers wait for one fetch
+    rather than each making their own. Transfer gas depends on whether the
+    recipient's balance slot is already non-zero, so it is estimated once
+    against a fresh (always cold) address and once against a recipient we
+    know holds the token, then reused for every later transfer.
+    """
+
+    def __init__(self, w3: Web3, priority_fee_gwei: float | None = None, head_ttl: float = 1.0):
+        self.w3 = w3
+        self.tip = w3.to_wei(priority_fee_gwei, "gwei") if priority_fee_gwei is not None else None
+        self.head_ttl = head_ttl
+        self._lock = threading.Lock()
+        self._fetch = threading.Lock()   # single-flight for head()
+        self._head: tuple[int, int, int] | None = None   # (block number, base fee, tip)
+        self._head_at = 0.0
+        self._gas: dict[tuple[str, bool], int] = {}
+        self._warm: set[tuple[str, str]] = set()
+        self._cold_probe = Web3.to_checksum_address(os.urandom(20))
+
+    def fresh(self) -> bool:
+        return self._head is not None and time.time() - self._head_at < self.head_ttl
+
+    def head(self) -> tuple[int, int, int]:
+        if self.fresh():
+            return self._head
+        with self._fetch:
+            if self.fresh():
+                return self._head
+            blk = self.w3.eth.get_block("latest")
+            tip = self.w3.eth.max_priority_fee if self.needs_tip(blk["number"]) else None
+            return self.note_head(blk["number"], blk["baseFeePerGas"], tip)
+
+    def needs_tip(self, number: int) -> bool:
+        """Whether a head at `number` should come with the node's suggested tip."""
+        head = self._head
+        return self.tip is None and (head is None or head[0] != number)
+
+    def note_head(self, number: int, base_fee: int, tip: int | None = None) -> tuple[int, int, int]:
+        """Adopt a head fetched by someone else (e.g. inside an RPC batch).
+        Callers on an event loop pass `tip` when `needs_tip()`; otherwise the
+        configured or last known tip is kept."""
+        if tip is None and self.tip is None and self._head is None:
+            tip = self.w3.eth.max_priority_fee
+        with self._lock:
+            if self._head is None or number != self._head[0]:
+                if tip is None:
+                    tip = self.tip if self.tip is not None else self._head[2]
+                self._head = (number, base_fee, tip)
+            self._head_at = time.time()
+            return self._head
+
+    def fees(self) -> tuple[int, int]:
+        """(maxPriorityFeePerGas, maxFeePerGas) for a tx sent now."""
+        _, base_fee, tip = self.head()
+        return tip, base_fee + tip * 2
+
+    def is_warm(self, token_addr: str, to: str) -> bool:
+        return (token_addr.lower(), to.lower()) in self._warm
+
+    def mark_warm(self, token_addr: str, to: str):
+        self._warm.add((token_addr.lower(), to.lower()))
+
+    def gas_key(self, token_addr: str, to: str) -> tuple[str, bool]:
+        return token_addr.lower(), self.is_warm(token_addr, to)
+
+    def cached_gas(self, key: tuple[str, bool]) -> int | None:
+        return self._gas.get(key)
+
+    def probe_for(self, key: tuple[str, bool], to: str) -> str:
+        """Recipient to estimate against for `key`: the real one if warm, else a fresh address."""
+        return Web3.to_checksum_address(to) if key[1] else self._cold_probe
+
+    def note_gas(self, key: tuple[str, bool], estimate: int) -> int:
+        gas = self._gas[key] = int(estimate * GAS_HEADROOM)
+        logging.info("Memoized %s transfer gas for %s: %d", "warm" if key[1] else "cold", key[0], gas)
+        return gas
+
+    def transfer_gas(self, token, to: str, sender: str, amount: int) -> int | None:
+        """Memoized gas limit for token.transfer(to, amount); None if the node
+        refuses to estimate (caller picks its own fallback)."""
+        key = self.gas_key(token.address, to)
+        gas = self.cached_gas(key)
+        if gas is not None:
+            return gas
+        try:
+            with metrics.timed("gas_estimate"):
+                est = token.functions.transfer(self.probe_for(key, to), amount).estimate_gas({"from": sender})
+        except Exception as e:
+            logging.warning("Transfer gas estimate for %s failed: %s", token.address, e)
+            metrics.RPC_ERRORS.labels("eth_estimateGas").inc()
+            return None
+        return self.note_gas(key, est)
+
+    def quote(self, gas: int) -> tuple[int, int]:
+        """(gas, expected cost in wei) at the current base fee + tip."""
+        _, base_fee, tip = self.head()
+        return gas, gas * (base_fee + tip)
@@ -0,0 +1,170 @@
+# indexer.py
+# Mirrors the token's Transfer logs sent by the funder wallets, and the legs a
+# relay (the disperse contract) fans out for them, into users.db
+# (chain_transfers) and reconciles them with the bot's payout ledger. Run it
+# with `python mainBase.py index`; the tables come from storage.py's migrations.
+import time
+import asyncio
+import logging
+import sqlite3
+from datetime import datetime, timezone
+
+import metrics
+
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+def _topic(addr: str) -> str:
+    return "0x" + addr.lower()[2:].rjust(64, "0")
+
+def _hex(b) -> str:
+    return b if isinstance(b, str) else "0x" + bytes(b).hex()
+
+def _addr(topic) -> str:
+    return "0x" + _hex(topic)[-40:].lower()
+
+class TransferIndexer:
+    """Walks `eth_getLogs` over block ranges, `confirmations` behind the head.
+
+    Each range is upserted together with the block checkpoint, so a restart
+    resumes where the last commit left off and re-reading a range is
+    harmless. The range grows while the node answers and halves when it
+    refuses (most providers cap a getLogs response by blocks or results).
+
+    A batched payout moves the funds funder -> relay -> recipients, so the
+    recipients' logs come `from` the relay. Those are kept only for txs a
+    funder sent; the relay pays out for anyone who calls it.
+    """
+
+    def __init__(self, db: sqlite3.Connection, rpc, token: str, funders: list[str], *,
+                 relays: list[str] = (), confirmations: int = 2, chunk: int = 2000, max_chunk: int = 10_000,
+                 start_block: int | None = None, backfill: int = 43_200, name: str = "funder_transfers"):
+        self.db = db
+        self.rpc = rpc
+        self.token = token.lower()
+        self.funders = sorted({f.lower() for f in funders})
+        self.relays = sorted({r.lower() for r in relays})
+        self.confirmations = confirmations
+        self.chunk = chunk
+        self.max_chunk = max_chunk
+        self.start_block = start_block
+        self.backfill = backfill
+        self.name = name
+
+    def checkpoint(self) -> int | None:
+        row = self.db.execute("SELECT block FROM index_state WHERE name=?", (self.name,)).fetchone()
+        return row[0] if row else None
+
+    async def _fetch(self, lo: int, hi: int) -> tuple[list[tuple], int]:
+        aw3 = self.rpc.w3
+        with metrics.timed("index_get_logs"):
+            logs = await aw3.eth.get_logs({"fromBlock": lo, "toBlock": hi, "address": aw3.to_checksum_address(self.token),
+                                           "topics": [TRANSFER_TOPIC, [_topic(a) for a in self.funders + self.relays]]})
+        logs = [l for l in logs if not l.get("removed")]
+        blocks = sorted({l["blockNumber"] for l in logs} | {hi})
+        relayed = sorted({_hex(l["transactionHash"]).lower() for l in logs if _addr(l["topics"][1]) in self.relays})
+        # one batched round trip for every timestamp in the range and every relay tx's sender
+        found = await asyncio.gather(*(aw3.eth.get_block(n) for n in blocks),
+                                     *(aw3.eth.get_transaction(h) for h in relayed))
+        ts = {b["number"]: b["timestamp"] for b in found[:len(blocks)]}
+        foreign = {h for h, tx in zip(relayed, found[len(blocks):]) if tx["from"].lower() not in self.funders}
+        rows = []
+        for l in logs:
+            tx_hash, frm = _hex(l["transactionHash"]).lower(), _addr(l["topics"][1])
+            if frm in self.relays and tx_hash in foreign:
+                continue
+            rows.append((tx_hash, l["logIndex"], l["blockNumber"], ts[l["blockNumber"]], self.token,
+                         frm, _addr(l["topics"][2]), str(int(_hex(l["data"]), 16))))
+        return rows, ts[hi]
+
+    def step(self) -> int | None:
+        """Index the next range; returns the number of logs stored, or None when caught up."""
+        head = self.rpc.run(self.rpc.w3.eth.block_number) - self.confirmations
+        done = self.checkpoint()
+        if done is None:
+            done = (self.start_block if self.start_block is not None else max(head - self.backfill, 0)) - 1
+        if done >= head:
+            return None
+        lo = done + 1
+        while True:
+            hi = min(lo + self.chunk - 1, head)
+            try:
+                rows, hi_ts = self.rpc.run(self._fetch(lo, hi))
+                break
+            except Exception as e:
+                if self.chunk == 1:
+                    raise
+                self.chunk = max(self.chunk // 2, 1)
+                logging.warning("getLogs %d-%d refused (%s); retrying with %d blocks", lo, hi, e, self.chunk)
+        if self.chunk < self.max_chunk:
+            self.chunk = min(self.chunk * 2, self.max_chunk)
+
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.executemany(
+                """INSERT INTO chain_transfers(tx_hash, log_index, block_number, ts, token, from_addr, to_addr, amount)
+                   VALUES(?,?,?,?,?,?,?,?)
+                   ON CONFLICT(tx_hash, log_index) DO UPDATE SET block_number=excluded.block_number, ts=excluded.ts""",
+                rows)
+            self.db.execute("""INSERT INTO index_state(name, block, ts) VALUES(?,?,?)
+                               ON CONFLICT(name) DO UPDATE SET block=excluded.block, ts=excluded.ts""",
+                            (self.name, hi, hi_ts))
+            self.db.execute("COMMIT")
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+        logging.info("Indexed blocks %d-%d: %d transfer(s)", lo, hi, len(rows))
+        return len(rows)
+
+    def catch_up(self, budget: float = 30.0) -> int:
+        """Index ranges until caught up or `budget` seconds have passed."""
+        t0, total = time.time(), 0
+        while time.time() - t0 < budget:
+            n = self.step()
+            if n is None:
+                break
+            total += n
+        return total
+
+    def reconcile(self, grace: float = 600) -> dict[str, list]:
+        """Compare the payout ledger with what the chain shows, up to the checkpoint.
+
+        missing:        a payout the bot reported sent that never landed (replaced, reverted, dropped)
+        unrecorded:     a funder transfer with no payout behind it (manual send, lost ledger write);
+                        a funder's pull into a relay is not a payout and is skipped
+        duplicate:      one tweet paid more than once
+        pending_unpaid: a consumed pending blessing with no payout carrying it
+        """
+        row = self.db.execute("SELECT ts FROM index_state WHERE name=?", (self.name,)).fetchone()
+        if row is None:
+            return {}
+        indexed_ts = row[0]
+        start = self.db.execute("SELECT min(sent_at) FROM payouts").fetchone()[0]
+        if start is None:
+            return {}
+        q = self.db.execute
+        out = {
+            "missing": q("""SELECT id, tid, kind, tx_hash, to_addr, amount FROM payouts p
+                            WHERE sent_at < ? AND NOT EXISTS (
+                              SELECT 1 FROM chain_transfers c WHERE c.tx_hash = p.tx_hash AND c.to_addr = p.to_addr)""",
+                         (indexed_ts - grace,)).fetchall(),
+            "unrecorded": q("""SELECT tx_hash, log_index, to_addr, amount FROM chain_transfers c
+                               WHERE ts >= ? AND token = ? AND to_addr NOT IN (%s) AND NOT EXISTS (
+                                 SELECT 1 FROM payouts p WHERE p.tx_hash = c.tx_hash AND p.to_addr = c.to_addr)"""
+                            % ",".join("?" * len(self.relays)), (int(start), self.token, *self.relays)).fetchall(),
+            "duplicate": q("""SELECT p.tid, count(*), group_concat(p.tx_hash) FROM payouts p
+                              JOIN chain_transfers c ON c.tx_hash = p.tx_hash AND c.to_addr = p.to_addr
+                              WHERE p.tid IS NOT NULL GROUP BY p.tid HAVING count(*) > 1""").fetchall(),
+            # retention moves old consumed rows to the archive; they still count
+            "pending_unpaid": q("""SELECT id, recipient, amount FROM (
+                                     SELECT id, recipient, amount, created_at FROM pending_blessings WHERE consumed = 1
+                                     UNION ALL
+                                     SELECT id, recipient, amount, created_at FROM pending_blessings_archive) b
+                                   WHERE created_at >= ?
+                                     AND NOT EXISTS (SELECT 1 FROM payouts p WHERE p.pending_id = b.id)""",
+                                (datetime.fromtimestamp(start, timezone.utc).isoformat(),)).fetchall(),
+        }
+        for issue, rows in out.items():
+            metrics.RECONCILE_ISSUES.labels(issue).set(len(rows))
+            if rows:
+                logging.warning("Reconcile: %d %s, e.g. %s", len(rows), issue, [tuple(r) for r in rows[:3]])
+        return out
@@ -0,0 +1,111 @@
+# jobs.py
+# Durable work queue in users.db. The scrape, payout and reply workers of
+# mainBase.py hand work to each other through it; the table itself is created
+# by storage.py's schema migrations.
+import json
+import time
+import logging
+import sqlite3
+
+import metrics
+
+class Job:
+    __slots__ = ("id", "kind", "key", "tid", "payload", "attempts", "result")
+
+    def __init__(self, row):
+        self.id, self.kind, self.key, self.tid = row["id"], row["kind"], row["key"], row["tid"]
+        self.payload = json.loads(row["payload"])
+        self.attempts = row["attempts"]
+        self.result = json.loads(row["result"]) if row["result"] else None
+
+    def __repr__(self) -> str:
+        return f"{self.kind} job {self.id} ({self.key})"
+
+class JobQueue:
+    """Leased jobs with retries and a dead-letter state.
+
+    `lease` hands out due jobs for `lease_secs`; a worker that dies simply
+    lets the lease run out and the job is handed to someone else. Writes that
+    matter for correctness (`checkpoint`, `complete`, `fail`) only land while
+    the caller still owns the lease, so a worker that stalled past its lease
+    finds out before it acts twice. (kind, key) is unique: enqueueing the
+    same work again is a no-op.
+    """
+
+    def __init__(self, db: sqlite3.Connection, owner: str, lease_secs: float = 120,
+                 max_attempts: int = 5, backoff: float = 5.0):
+        self.db = db
+        self.owner = owner
+        self.lease_secs = lease_secs
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+
+    def enqueue(self, kind: str, key: str, payload: dict, tid: int | None = None, holds=()) -> bool:
+        now = time.time()
+        cur = self.db.execute(
+            """INSERT OR IGNORE INTO jobs(kind, key, tid, payload, holds, run_at, created_at, updated_at)
+               VALUES(?,?,?,?,?,?,?,?)""",
+            (kind, key, tid, json.dumps(payload), json.dumps([list(h) for h in holds]) if holds else None,
+             now, now, now))
+        return cur.rowcount == 1
+
+    def lease(self, kind: str, limit: int) -> list[Job]:
+        now = time.time()
+        rows = self.db.execute(
+            """UPDATE jobs SET state='leased', lease_owner=?, lease_until=?, attempts=attempts+1, updated_at=?
+               WHERE id IN (SELECT id FROM jobs
+                            WHERE kind=? AND state IN ('ready','leased')
+                              AND CASE state WHEN 'ready' THEN run_at ELSE lease_until END <= ?
+                            ORDER BY run_at, id LIMIT ?)
+               RETURNING id, kind, key, tid, payload, attempts, result""",
+            (self.owner, now + self.lease_secs, now, kind, now, limit)).fetchall()
+        return sorted((Job(r) for r in rows), key=lambda j: j.id)
+
+    def _owned(self, sql: str, args: tuple, job: Job) -> bool:
+        cur = self.db.execute(sql + " WHERE id=? AND state='leased' AND lease_owner=?", (*args, job.id, self.owner))
+        if cur.rowcount != 1:
+            logging.warning("Lost the lease on %s; leaving it to its new owner", job)
+            return False
+        return True
+
+    def checkpoint(self, job: Job, result: dict) -> bool:
+        """Persist progress (e.g. a signed tx) before acting on it."""
+        job.result = result
+        return self._owned("UPDATE jobs SET result=?, updated_at=?", (json.dumps(result), time.time()), job)
+
+    def complete(self, job: Job, result: dict | None = None) -> bool:
+        if result is not None:
+            job.result = result
+        ok = self._owned("UPDATE jobs SET state='done', result=?, lease_owner=NULL, updated_at=?",
+                         (json.dumps(job.result) if job.result else None, time.time()), job)
+        if ok:
+            metrics.JOBS.labels(job.kind, "done").inc()
+        return ok
+
+    def last_attempt(self, job: Job) -> bool:
+        """Whether failing `job` now dead-letters it."""
+        return job.attempts >= self.max_attempts
+
+    def fail(self, job: Job, err) -> bool:
+        """Schedule a retry with exponential backoff; True if the job was dead-lettered instead."""
+        dead = self.last_attempt(job)
+        retry_at = time.time() + self.backoff * 2 ** (job.attempts - 1)
+        ok = self._owned("UPDATE jobs SET state=?, run_at=?, last_error=?, lease_owner=NULL, updated_at=?",
+                         ("dead" if dead else "ready", retry_at, str(err)[:500], time.time()), job)
+        if ok:
+            metrics.JOBS.labels(job.kind, "dead" if dead else "retry").inc()
+            log = logging.error if dead else logging.warning
+            log("%s %s after %d attempt(s): %s", job, "dead-lettered" if dead else "will retry", job.attempts, err)
+        return ok and dead
+
+    def open_holds(self) -> set[tuple[str, str]]:
+        """(handle, kind) rate-limit slots claimed by payouts not yet sent."""
+        out = set()
+        for (holds,) in self.db.execute(
+                "SELECT holds FROM jobs WHERE kind='payout' AND state IN ('ready','leased') AND holds IS NOT NULL"):
+            out.update(tuple(h) for h in json.loads(holds))
+        return out
+
+    def counts(self) -> dict[tuple[str, str], int]:
+        return {(r[0], r[1]): r[2] for r in
+                self.db.execute("SELECT kind, state, count(*) FROM jobs GROUP BY kind, state")}
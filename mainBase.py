@@ -1,18 +1,40 @@
 #!/usr/bin/env python3
+from __future__ import annotations
+
 import os
 import re
+import sys
+import socket
+import random
+import asyncio
+import contextlib
 import time
+import json
+import heapq
+import queue
+import signal
 import sqlite3
 import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from decimal import Decimal, ROUND_DOWN
 from datetime import datetime, timezone, timedelta
+from typing import TYPE_CHECKING, Iterator, NamedTuple
 
 from dotenv import load_dotenv
-from playwright.sync_api import sync_playwright
-from web3 import Web3
+
+import storage
+from jobs import JobQueue
+
+if TYPE_CHECKING:
+    from rpc import AsyncRPC
+
+# web3 (~1.5s), Playwright and aiohttp are imported on first use; see init_chain()
 
 # ── CONFIG & AUTH ─────────────────────────────────
 load_dotenv()
+import metrics  # after load_dotenv: picks up PROMETHEUS_MULTIPROC_DIR
 logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s [%(levelname)s] %(message)s")
 
@@ -22,15 +44,44 @@ X_PASSWORD    = os.getenv("X_PASSWORD")
 STATE_FILE    = "x_state.json"
 LAST_ID_FILE  = "last_id.txt"
 
+# Browser session
+BROWSER_HEADLESS   = os.getenv("BROWSER_HEADLESS", "1") == "1"
+BROWSER_IDLE_PAGES = int(os.getenv("BROWSER_IDLE_PAGES", "5"))
+STATE_REFRESH_SECS = int(os.getenv("STATE_REFRESH_SECS", "900"))
+REPLY_TABS         = int(os.getenv("REPLY_TABS", "4"))
+REPLY_RETRIES      = int(os.getenv("REPLY_RETRIES", "3"))
+REPLY_BACKOFF_SECS = float(os.getenv("REPLY_BACKOFF_SECS", "2"))
+
+# Mention ingestion: "network" reads the timeline JSON, "dom" scrapes articles
+MENTIONS_SOURCE       = os.getenv("MENTIONS_SOURCE", "network")
+MENTIONS_API_RE       = re.compile(os.getenv("MENTIONS_API_PATTERN",
+                                             r"/i/api/(2/notifications/mentions\.json|graphql/[^/]+/\w*Mentions)"))
+MENTIONS_MAX_PAGES    = int(os.getenv("MENTIONS_MAX_PAGES", "20"))
+MENTIONS_IDLE_SCROLLS = int(os.getenv("MENTIONS_IDLE_SCROLLS", "2"))
+MENTIONS_PAGE_TIMEOUT = float(os.getenv("MENTIONS_PAGE_TIMEOUT", "10"))
+
+# scrape scheduling (see PollScheduler)
+POLL_MIN_SECS         = float(os.getenv("POLL_MIN_SECS", "5"))
+POLL_MAX_SECS         = float(os.getenv("POLL_MAX_SECS", "300"))
+POLL_TARGET_BATCH     = int(os.getenv("POLL_TARGET_BATCH", "10"))   # mentions we aim to pick up per scrape
+POLL_JITTER           = float(os.getenv("POLL_JITTER", "0.2"))
+POLL_BACKOFF_MAX_SECS = float(os.getenv("POLL_BACKOFF_MAX_SECS", "900"))
+
 # Network / funder
 ETH_RPC_URL     = os.getenv("ETH_RPC_URL")  # Base mainnet RPC
 FUNDER_KEY      = os.getenv("FUNDER_PRIVATE_KEY")
-FUNDER_ADDRESS  = Web3.to_checksum_address(os.getenv("FUNDER_ADDRESS"))
+FUNDER_ADDRESS  = os.getenv("FUNDER_ADDRESS")    # set by init_chain() to the first lane's address
+# Funder pool: comma-separated keys, one payout lane (nonce stream) each; the first also quotes gas
+FUNDER_KEYS     = [k.strip() for k in os.getenv("FUNDER_KEYS", "").split(",") if k.strip()] or [FUNDER_KEY]
+LANE_MAX_INFLIGHT    = int(os.getenv("LANE_MAX_INFLIGHT", "16"))
+BALANCE_REFRESH_SECS = float(os.getenv("BALANCE_REFRESH_SECS", "60"))
+CHAIN_ID_ENV    = os.getenv("CHAIN_ID", "8453")   # Base mainnet; keys the token metadata cache
 
 # $CIK token
-TOKEN_ADDRESS   = Web3.to_checksum_address(os.getenv("TOKEN_ADDRESS"))
+TOKEN_ADDRESS   = os.getenv("TOKEN_ADDRESS")
 TOKEN_DECIMALS_ENV = os.getenv("TOKEN_DECIMALS")
 TOKEN_SYMBOL_ENV   = os.getenv("TOKEN_SYMBOL")
+TOKEN_META_FILE    = os.getenv("TOKEN_META_FILE", "token_meta.json")
 
 # amounts (human units, not wei)
 TRANSFER_AMOUNT_TOKENS = Decimal(os.getenv("TRANSFER_AMOUNT_TOKENS", "1"))
@@ -39,6 +90,43 @@ BIND_REWARD_TOKENS     = Decimal(os.getenv("BIND_REWARD_TOKENS",     "1"))
 # tx behavior
 PRIORITY_FEE_GWEI = float(os.getenv("PRIORITY_FEE_GWEI", "2"))
 CONFIRMATIONS     = int(os.getenv("CONFIRMATIONS", "2"))
+RECEIPT_TIMEOUT   = int(os.getenv("RECEIPT_TIMEOUT", "180"))
+BLOCK_POLL_SECS   = float(os.getenv("BLOCK_POLL_SECS", "1"))
+STALL_SECS        = float(os.getenv("STALL_SECS", "30"))
+
+# batched payouts (one disperse tx per window / mention batch)
+BATCH_PAYOUTS        = os.getenv("BATCH_PAYOUTS", "0") == "1"
+DISPERSE_ADDRESS     = os.getenv("DISPERSE_ADDRESS")
+BATCH_WINDOW_SECS    = float(os.getenv("BATCH_WINDOW_SECS", "0"))  # 0 = flush once per mention batch
+BATCH_MAX_RECIPIENTS = int(os.getenv("BATCH_MAX_RECIPIENTS", "100"))
+
+# async RPC (JSON-RPC batching over a pooled session)
+RPC_MAX_BATCH = int(os.getenv("RPC_MAX_BATCH", "50"))
+RPC_POOL_SIZE = int(os.getenv("RPC_POOL_SIZE", "8"))
+
+# job queue (scrape / payout / reply worker roles; see ENTRY POINT)
+JOB_LEASE_SECS   = float(os.getenv("JOB_LEASE_SECS", "120"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_SECS = float(os.getenv("JOB_BACKOFF_SECS", "5"))
+JOB_POLL_SECS    = float(os.getenv("JOB_POLL_SECS", "1"))
+WORKER_INDEX     = int(os.getenv("WORKER_INDEX", "0"))   # payout workers split FUNDER_KEYS between them
+WORKER_COUNT     = int(os.getenv("WORKER_COUNT", "1"))
+
+# on-chain indexer (`index` role; see indexer.py)
+INDEX_FROM_BLOCK     = int(os.getenv("INDEX_FROM_BLOCK")) if os.getenv("INDEX_FROM_BLOCK") else None  # default: ~1 day back
+INDEX_CHUNK_BLOCKS   = int(os.getenv("INDEX_CHUNK_BLOCKS", "2000"))
+INDEX_POLL_SECS      = float(os.getenv("INDEX_POLL_SECS", "30"))
+RECONCILE_GRACE_SECS = float(os.getenv("RECONCILE_GRACE_SECS", "600"))
+
+# retention (see retention.py); runs between mention batches in the all / scrape roles
+RETAIN_TRANSFERS_DAYS = float(os.getenv("RETAIN_TRANSFERS_DAYS", "7"))   # raw rows; older ones become daily counts
+RETAIN_TWEETS_DAYS    = float(os.getenv("RETAIN_TWEETS_DAYS", "7"))      # behind last_id
+RETAIN_PENDING_DAYS   = float(os.getenv("RETAIN_PENDING_DAYS", "30"))    # consumed pending blessings
+RETENTION_EVERY_SECS  = float(os.getenv("RETENTION_EVERY_SECS", "3600"))
+RETENTION_CHUNK       = int(os.getenv("RETENTION_CHUNK", "500"))
+
+# Metrics (see metrics.py); ignored when PROMETHEUS_MULTIPROC_DIR is set
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
 
 # keywords
 KEYWORD_BIND  = "bind me"
@@ -55,9 +143,6 @@ IMG_BLESS_FAILED         = os.getenv("IMG_BLESS_FAILED", "bless_failed.png")
 IMG_BIND_REWARD_FAILED   = os.getenv("IMG_BIND_REWARD_FAILED", "bind_failed.png")
 
 # ── WEB3 SETUP ────────────────────────────────────
-w3       = Web3(Web3.HTTPProvider(ETH_RPC_URL))
-CHAIN_ID = w3.eth.chain_id  # Base mainnet = 8453
-
 # ERC-20 minimal ABI
 ERC20_ABI = [
     {"constant": False, "inputs":[{"name":"to","type":"address"},{"name":"amount","type":"uint256"}],
@@ -65,67 +150,145 @@ ERC20_ABI = [
     {"constant": True, "inputs":[], "name":"decimals","outputs":[{"name":"","type":"uint8"}], "type":"function"},
     {"constant": True, "inputs":[], "name":"symbol","outputs":[{"name":"","type":"string"}], "type":"function"},
     {"constant": True, "inputs":[{"name":"owner","type":"address"}], "name":"balanceOf","outputs":[{"name":"","type":"uint256"}], "type":"function"},
+    {"constant": True, "inputs":[{"name":"owner","type":"address"},{"name":"spender","type":"address"}],
+     "name":"allowance","outputs":[{"name":"","type":"uint256"}], "type":"function"},
+    {"constant": False, "inputs":[{"name":"spender","type":"address"},{"name":"amount","type":"uint256"}],
+     "name":"approve","outputs":[{"name":"","type":"bool"}], "type":"function"},
 ]
 
-token = w3.eth.contract(address=TOKEN_ADDRESS, abi=ERC20_ABI)
+# Disperse-style multi-transfer: pulls the total via transferFrom, then fans out
+DISPERSE_ABI = [
+    {"constant": False, "inputs":[{"name":"token","type":"address"},{"name":"recipients","type":"address[]"},
+                                   {"name":"values","type":"uint256[]"}],
+     "name":"disperseToken","outputs":[], "type":"function"},
+]
 
-# Discover token meta
-try:
-    TOKEN_DECIMALS = int(TOKEN_DECIMALS_ENV) if TOKEN_DECIMALS_ENV else int(token.functions.decimals().call())
-except Exception:
-    TOKEN_DECIMALS = 18
-try:
-    TOKEN_SYMBOL = TOKEN_SYMBOL_ENV or str(token.functions.symbol().call())
-except Exception:
-    TOKEN_SYMBOL = "CIK"
+# Token metadata, cached on disk per chain + token so a restart needs no RPC.
+def _meta_key(chain_id) -> str:
+    return f"{chain_id}:{(TOKEN_ADDRESS or '').lower()}"
 
-logging.info("Token %s at %s (decimals=%d)", TOKEN_SYMBOL, TOKEN_ADDRESS, TOKEN_DECIMALS)
+def _load_token_meta(chain_id) -> dict | None:
+    try:
+        with open(TOKEN_META_FILE) as f:
+            return json.load(f).get(_meta_key(chain_id))
+    except (FileNotFoundError, ValueError):
+        return None
 
-# Seed nonce from pending txs
-NEXT_NONCE = w3.eth.get_transaction_count(FUNDER_ADDRESS, "pending")
-logging.info("Loaded NEXT_NONCE from pending: %s", NEXT_NONCE)
+def _save_token_meta(chain_id, meta: dict):
+    try:
+        with open(TOKEN_META_FILE) as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        cache = {}
+    cache[_meta_key(chain_id)] = meta
+    with open(TOKEN_META_FILE, "w") as f:
+        json.dump(cache, f, indent=2)
+
+_meta = _load_token_meta(CHAIN_ID_ENV) or {}
+TOKEN_DECIMALS = int(TOKEN_DECIMALS_ENV) if TOKEN_DECIMALS_ENV else _meta.get("decimals")
+TOKEN_SYMBOL   = TOKEN_SYMBOL_ENV or _meta.get("symbol")
+
+def token_meta_known() -> bool:
+    return TOKEN_DECIMALS is not None and TOKEN_SYMBOL is not None
+
+# Filled in by init_chain()
+Web3 = TransactionNotFound = None
+w3 = RPC = token = disperse = CHAIN_ID = None
+POOL = FEES = CONFIRMS = None
+_chain_lock = threading.Lock()
+
+def init_chain():
+    """Import web3, connect, and build the chain-side singletons. Runs once,
+    on the first payout (or at startup when token metadata isn't cached)."""
+    global Web3, TransactionNotFound, w3, RPC, token, disperse, CHAIN_ID, POOL, FEES, CONFIRMS
+    global FUNDER_ADDRESS, TOKEN_ADDRESS, TOKEN_DECIMALS, TOKEN_SYMBOL, BATCH_PAYOUTS
+    if CONFIRMS is not None:
+        return
+    with _chain_lock:
+        if CONFIRMS is not None:
+            return
+        from web3 import Web3 as _Web3
+        from web3.exceptions import TransactionNotFound as _NotFound
+        from fee_oracle import FeeOracle
+        from rpc import AsyncRPC
+        Web3, TransactionNotFound = _Web3, _NotFound
+
+        TOKEN_ADDRESS  = Web3.to_checksum_address(TOKEN_ADDRESS)
+        w3       = Web3(Web3.HTTPProvider(ETH_RPC_URL))
+        RPC      = AsyncRPC(ETH_RPC_URL, max_batch=RPC_MAX_BATCH, pool_size=RPC_POOL_SIZE)
+        CHAIN_ID = w3.eth.chain_id
+        if str(CHAIN_ID) != CHAIN_ID_ENV:
+            logging.warning("RPC reports chain %s but CHAIN_ID=%s; using the RPC's", CHAIN_ID, CHAIN_ID_ENV)
+
+        token = w3.eth.contract(address=TOKEN_ADDRESS, abi=ERC20_ABI)
+        if DISPERSE_ADDRESS:
+            disperse = w3.eth.contract(address=Web3.to_checksum_address(DISPERSE_ADDRESS), abi=DISPERSE_ABI)
+        elif BATCH_PAYOUTS:
+            logging.warning("BATCH_PAYOUTS=1 but DISPERSE_ADDRESS is unset; falling back to single transfers")
+            BATCH_PAYOUTS = False
+
+        meta = _load_token_meta(CHAIN_ID)
+        if meta is None:
+            try:
+                decimals = int(token.functions.decimals().call())
+            except Exception:
+                decimals = 18
+            try:
+                symbol = str(token.functions.symbol().call())
+            except Exception:
+                symbol = "CIK"
+            meta = {"decimals": decimals, "symbol": symbol}
+            _save_token_meta(CHAIN_ID, meta)
+        TOKEN_DECIMALS = int(TOKEN_DECIMALS_ENV) if TOKEN_DECIMALS_ENV else meta["decimals"]
+        TOKEN_SYMBOL   = TOKEN_SYMBOL_ENV or meta["symbol"]
+        logging.info("Token %s at %s (decimals=%d) on chain %s", TOKEN_SYMBOL, TOKEN_ADDRESS, TOKEN_DECIMALS, CHAIN_ID)
+
+        from eth_account import Account
+        keys = FUNDER_KEYS[WORKER_INDEX::WORKER_COUNT]   # disjoint nonce streams per payout worker
+        if not keys:
+            raise RuntimeError(f"WORKER_INDEX={WORKER_INDEX} has no funder key (FUNDER_KEYS has {len(FUNDER_KEYS)})")
+        POOL = FunderPool([FunderLane(w3, Account.from_key(k)) for k in keys],
+                          LANE_MAX_INFLIGHT, BALANCE_REFRESH_SECS)
+        if FUNDER_ADDRESS and Web3.to_checksum_address(FUNDER_ADDRESS) != POOL.lanes[0].address:
+            logging.warning("FUNDER_ADDRESS does not match the first funder key; using %s", POOL.lanes[0].address)
+        FUNDER_ADDRESS = POOL.lanes[0].address
+        POOL.refresh(force=True)
+        FEES     = FeeOracle(w3, PRIORITY_FEE_GWEI)
+        CONFIRMS = ConfirmationTracker(RPC, CONFIRMATIONS, BLOCK_POLL_SECS, STALL_SECS, RECEIPT_TIMEOUT)
 
 # ── DATABASE SETUP ────────────────────────────────
-DB_FILE = "users.db"
-conn    = sqlite3.connect(DB_FILE, check_same_thread=False)
-conn.row_factory = sqlite3.Row
-c       = conn.cursor()
-
-c.execute("""
-CREATE TABLE IF NOT EXISTS bindings (
-    handle   TEXT PRIMARY KEY,
-    eth_addr TEXT NOT NULL,
-    bound_at TIMESTAMP NOT NULL
-)
-""")
-c.execute("""
-CREATE TABLE IF NOT EXISTS transfers (
-    id     INTEGER PRIMARY KEY AUTOINCREMENT,
-    handle TEXT NOT NULL,
-    kind   TEXT CHECK(kind IN ('sent','recv')) NOT NULL,
-    ts     TIMESTAMP NOT NULL
-)
-""")
-c.execute("""
-CREATE TABLE IF NOT EXISTS pending_blessings (
-  id         INTEGER PRIMARY KEY AUTOINCREMENT,
-  recipient  TEXT NOT NULL,
-  amount     REAL NOT NULL,       -- stored as human token units
-  sender     TEXT NOT NULL,
-  origin_tid INTEGER,
-  created_at TIMESTAMP NOT NULL,
-  consumed   INTEGER NOT NULL DEFAULT 0
-)
-""")
-# NEW: processed tweets for idempotency
-c.execute("""
-CREATE TABLE IF NOT EXISTS processed_tweets (
-  tweet_id     INTEGER PRIMARY KEY,
-  reason       TEXT,
-  processed_at TIMESTAMP NOT NULL
-)
-""")
-conn.commit()
+conn: sqlite3.Connection | None = None
+c:    sqlite3.Cursor | None = None
+
+def init_db():
+    """Open the DB, bring the schema up to date and hydrate in-memory state.
+    Idempotent; an up-to-date schema costs one PRAGMA read."""
+    global conn, c
+    if conn is not None:
+        return
+    conn = storage.connect(storage.DB_PATH)
+    c = conn.cursor()
+    storage.migrate(conn)
+    LIMITS.hydrate(conn)
+
+
+_tx_depth = 0
+
+@contextlib.contextmanager
+def transaction():
+    """Group writes into one commit. The commit happens even if the body
+    raises: the rows record payouts and replies that already went out."""
+    global _tx_depth
+    if _tx_depth == 0:
+        c.execute("BEGIN")
+    _tx_depth += 1
+    try:
+        yield
+    finally:
+        _tx_depth -= 1
+        if _tx_depth == 0:
+            with metrics.timed("db_commit"):
+                c.execute("COMMIT")
 
 # ── UTILITIES ─────────────────────────────────────
 ETH_ADDR_RE = re.compile(r"\b0x[a-f0-9]{40}\b")
@@ -143,82 +306,223 @@ def save_last_id(n: int):
     with open(LAST_ID_FILE, "w") as f:
         f.write(str(n))
 
+# ── RATE LIMITS ───────────────────────────────────
+RATE_WINDOW = timedelta(hours=24)
+
+class RateLimiter:
+    """Last `sent`/`recv` time per handle, kept in memory.
+
+    Hydrated from `transfers` at startup and written through by `record`;
+    entries older than the window are evicted, so checks never touch SQLite.
+    """
+
+    def __init__(self, window: timedelta):
+        self.window = window.total_seconds()
+        self._last: dict[tuple[str, str], float] = {}
+        self._order: deque[tuple[float, tuple[str, str]]] = deque()  # oldest first
+
+    def hydrate(self, db: sqlite3.Connection):
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=self.window)).isoformat()
+        rows = db.execute("""SELECT handle, kind, max(ts) AS ts FROM transfers
+                             WHERE ts >= ? GROUP BY handle, kind""", (cutoff,)).fetchall()
+        seen = sorted((_ts_epoch(r["ts"]), (r["handle"], r["kind"])) for r in rows)
+        for ts, (handle, kind) in seen:
+            self.note(handle, kind, ts)
+        logging.info("Rate limiter hydrated with %d active entries", len(self._last))
+
+    def note(self, handle: str, kind: str, ts: float):
+        key = (handle, kind)
+        if ts > self._last.get(key, 0.0):
+            self._last[key] = ts
+            self._order.append((ts, key))
+
+    def allowed(self, handle: str, kind: str) -> bool:
+        now = time.time()
+        self._evict(now)
+        last = self._last.get((handle, kind))
+        return last is None or last < now - self.window
+
+    def _evict(self, now: float):
+        cutoff = now - self.window
+        while self._order and self._order[0][0] < cutoff:
+            ts, key = self._order.popleft()
+            if self._last.get(key) == ts:
+                del self._last[key]
+
+def _ts_epoch(ts: str) -> float:
+    d = datetime.fromisoformat(ts)
+    if d.tzinfo is None:
+        d = d.replace(tzinfo=timezone.utc)
+    return d.timestamp()
+
+LIMITS = RateLimiter(RATE_WINDOW)
+
 def can_do(handle: str, kind: str) -> bool:
-    cutoff = datetime.now(timezone.utc) - timedelta(hours=24)
     hn = norm_handle(handle)
-    c.execute("SELECT ts FROM transfers WHERE lower(handle)=? AND kind=? ORDER BY ts DESC LIMIT 1", (hn, kind))
-    row = c.fetchone()
-    if not row:
-        return True
-    last_ts = datetime.fromisoformat(row["ts"])
-    if last_ts.tzinfo is None:
-        last_ts = last_ts.replace(tzinfo=timezone.utc)
-    return last_ts < cutoff
+    if PAYOUTS.holds(hn, kind):  # payout queued in the current batch
+        return False
+    return LIMITS.allowed(hn, kind)
 
 def record(handle: str, kind: str):
-    c.execute("INSERT INTO transfers(handle,kind,ts) VALUES(?,?,?)",
-              (norm_handle(handle), kind, datetime.now(timezone.utc).isoformat()))
-    conn.commit()
+    hn = norm_handle(handle)
+    now = datetime.now(timezone.utc)
+    c.execute("INSERT INTO transfers(handle,kind,ts) VALUES(?,?,?)", (hn, kind, now.isoformat()))
+    LIMITS.note(hn, kind, now.timestamp())
+
+# ── BATCH SNAPSHOT ────────────────────────────────
+class Snapshot:
+    """Processed flags, bindings and open pending rows for one mention batch,
+    loaded with a few IN (...) queries and kept current by the write helpers.
+    Keys outside the batch fall through to SQLite. A tweet that already has
+    queued jobs or a payout queued or in flight counts as processed: a worker
+    or `settle_payouts` owns it."""
+
+    CHUNK = 500  # stay well under SQLITE_MAX_VARIABLE_NUMBER
+
+    def __init__(self):
+        self.processed: set[int] = set()
+        self.tweet_ids: set[int] = set()
+        self.bindings: dict[str, str | None] = {}
+        self.pending: dict[str, dict | None] = {}   # recipient -> oldest open row
+
+    @classmethod
+    @metrics.timed("db_snapshot")
+    def load(cls, mentions: list[dict]) -> "Snapshot":
+        snap = cls()
+        handles = set()
+        for m in mentions:
+            snap.tweet_ids.add(m["id"])
+            handles.add(norm_handle(m["handle"]))
+            target = parse_bless_target(m["text"].lower())
+            if target:
+                handles.add(norm_handle(target))
+        for chunk in _chunks(sorted(snap.tweet_ids), cls.CHUNK):
+            marks = ",".join("?" * len(chunk))
+            q = f"""SELECT tweet_id FROM processed_tweets WHERE tweet_id IN ({marks})
+                     UNION SELECT tid FROM jobs WHERE tid IN ({marks})"""
+            snap.processed.update(r[0] for r in conn.execute(q, chunk + chunk))
+        snap.processed |= snap.tweet_ids & PAYOUTS.tids()
+        snap.bindings = dict.fromkeys(handles)
+        snap.pending = dict.fromkeys(handles)
+        for chunk in _chunks(sorted(handles), cls.CHUNK):
+            marks = ",".join("?" * len(chunk))
+            for r in conn.execute(f"SELECT handle, eth_addr FROM bindings WHERE handle IN ({marks})", chunk):
+                snap.bindings[r["handle"]] = r["eth_addr"]
+            for r in conn.execute(f"""SELECT * FROM pending_blessings
+                                      WHERE recipient IN ({marks}) AND consumed=0
+                                      ORDER BY created_at DESC""", chunk):
+                snap.pending[r["recipient"]] = dict(r)   # DESC, so the oldest wins
+        return snap
+
+def _chunks(seq: list, n: int):
+    for i in range(0, len(seq), n):
+        yield seq[i:i + n]
+
+_snap: Snapshot | None = None
+
+@contextlib.contextmanager
+def prefetch(mentions: list[dict]):
+    global _snap
+    _snap = Snapshot.load(mentions)
+    try:
+        yield _snap
+    finally:
+        _snap = None
 
+# ── STATE HELPERS ─────────────────────────────────
 def get_binding(handle: str):
     hn = norm_handle(handle)
-    c.execute("SELECT eth_addr FROM bindings WHERE lower(handle)=?", (hn,))
-    row = c.fetchone()
-    return row["eth_addr"] if row else None
+    if _snap is not None and hn in _snap.bindings:
+        return _snap.bindings[hn]
+    return storage.binding(conn, hn)
 
 def bind_wallet_if_new(handle: str, addr: str) -> bool:
     if get_binding(handle):
         return False
     now = datetime.now(timezone.utc).isoformat()
-    chk = Web3.to_checksum_address(addr)
+    from eth_utils import to_checksum_address  # light; avoids importing web3 just to bind
+    chk = to_checksum_address(addr)
     c.execute("INSERT INTO bindings(handle,eth_addr,bound_at) VALUES(?,?,?)",
               (norm_handle(handle), chk, now))
-    conn.commit()
+    if _snap is not None:
+        _snap.bindings[norm_handle(handle)] = chk
     return True
 
 def has_unconsumed_pending(recipient: str) -> bool:
-    rn = norm_handle(recipient)
-    c.execute("SELECT 1 FROM pending_blessings WHERE lower(recipient)=? AND consumed=0 LIMIT 1", (rn,))
-    return c.fetchone() is not None
+    return get_first_pending(recipient) is not None
 
 def get_first_pending(recipient: str):
     rn = norm_handle(recipient)
-    c.execute("""SELECT * FROM pending_blessings
-                 WHERE lower(recipient)=? AND consumed=0
-                 ORDER BY created_at ASC LIMIT 1""", (rn,))
-    return c.fetchone()
+    if _snap is not None and rn in _snap.pending:
+        return _snap.pending[rn]
+    return storage.open_pending(conn, rn)
 
 def queue_single_pending(recipient: str, amount_tokens: Decimal, sender: str, origin_tid: int | None) -> bool:
     if has_unconsumed_pending(recipient):
         return False
+    row = {"recipient": norm_handle(recipient), "amount": float(amount_tokens), "sender": norm_handle(sender),
+           "origin_tid": origin_tid, "created_at": datetime.now(timezone.utc).isoformat(), "consumed": 0}
     c.execute(
         "INSERT INTO pending_blessings(recipient,amount,sender,origin_tid,created_at,consumed) VALUES(?,?,?,?,?,0)",
-        (norm_handle(recipient), float(amount_tokens), norm_handle(sender), origin_tid, datetime.now(timezone.utc).isoformat())
+        (row["recipient"], row["amount"], row["sender"], row["origin_tid"], row["created_at"])
     )
-    conn.commit()
+    if _snap is not None:
+        _snap.pending[row["recipient"]] = dict(row, id=c.lastrowid)
     logging.info("Queued pending blessing: %s <- %s (%.6f %s) tid=%s",
                  norm_handle(recipient), norm_handle(sender), float(amount_tokens), TOKEN_SYMBOL, origin_tid)
     return True
 
 def consume_pending(pending_id: int):
     c.execute("UPDATE pending_blessings SET consumed=1 WHERE id=?", (pending_id,))
-    conn.commit()
+    if _snap is not None:
+        for rn, row in _snap.pending.items():
+            if row is not None and row["id"] == pending_id:
+                # at most one open row per recipient (queue_single_pending)
+                _snap.pending[rn] = None
+                break
+
+def record_payout(tx_hex: str, to_addr: str, amount: Decimal, kind: str, d: dict):
+    """Ledger row for a broadcast payout; the indexer reconciles these against the chain."""
+    c.execute("INSERT INTO payouts(tx_hash,tid,kind,to_addr,amount,pending_id,sent_at) VALUES(?,?,?,?,?,?,?)",
+              (tx_hex.lower(), d.get("tid"), kind, to_addr.lower(), str(tokens_to_uint(amount)),
+               d.get("pending_id"), time.time()))
 
 def fmt_amount(x: Decimal) -> str:
     q = Decimal(10) ** -TOKEN_DECIMALS
     return str(x.quantize(q, rounding=ROUND_DOWN).normalize())
 
 # NEW: idempotency helpers
+PAYOUT_CLAIM = "payout_pending"   # processed_tweets.reason while the tweet's payout is unsettled
+
 def was_processed(tweet_id: int) -> bool:
-    c.execute("SELECT 1 FROM processed_tweets WHERE tweet_id=?", (tweet_id,))
+    if _snap is not None and tweet_id in _snap.tweet_ids:
+        return tweet_id in _snap.processed
+    if tweet_id in PAYOUTS.tids():
+        return True
+    c.execute("SELECT 1 FROM processed_tweets WHERE tweet_id=? UNION ALL SELECT 1 FROM jobs WHERE tid=? LIMIT 1",
+              (tweet_id, tweet_id))
     return c.fetchone() is not None
 
 def mark_processed(tweet_id: int, reason: str):
+    # the final reason replaces a payout claim; any other mark stays
     c.execute(
-        "INSERT OR IGNORE INTO processed_tweets(tweet_id,reason,processed_at) VALUES(?,?,?)",
-        (tweet_id, reason, datetime.now(timezone.utc).isoformat())
+        """INSERT INTO processed_tweets(tweet_id,reason,processed_at) VALUES(?,?,?)
+           ON CONFLICT(tweet_id) DO UPDATE SET reason=excluded.reason, processed_at=excluded.processed_at
+           WHERE processed_tweets.reason=?""",
+        (tweet_id, reason, datetime.now(timezone.utc).isoformat(), PAYOUT_CLAIM)
     )
-    conn.commit()
+    metrics.PROCESSED.labels(reason).inc()
+    if _snap is not None:
+        _snap.processed.add(tweet_id)
+
+def claim_for_payout(tweet_id: int):
+    """Mark a tweet whose payout is about to be queued, so neither a re-scrape
+    nor a restart plans it again while the tx is unsettled (or after a crash
+    left it unknown); its reply's mark_processed replaces the claim."""
+    c.execute("INSERT OR IGNORE INTO processed_tweets(tweet_id,reason,processed_at) VALUES(?,?,?)",
+              (tweet_id, PAYOUT_CLAIM, datetime.now(timezone.utc).isoformat()))
+    if _snap is not None:
+        _snap.processed.add(tweet_id)
 
 # ── IMAGE HELPERS ─────────────────────────────────
 def _p(name: str) -> str:
@@ -243,395 +547,1741 @@ def images_for(event: str) -> list[str]:
     }
     return _filter_existing(mapping.get(event, []))
 
-# ── ERC-20 TRANSFER ───────────────────────────────
-def _wait_for_confirmations(base_block: int, min_conf: int):
-    if min_conf <= 1:
-        return
-    deadline = time.time() + 180
-    target = base_block + (min_conf - 1)
-    while time.time() < deadline:
-        latest = w3.eth.block_number
-        if latest >= target:
+# ── NONCE MANAGER ─────────────────────────────────
+NONCE_ERRORS = ("nonce too low", "already known", "replacement transaction underpriced",
+                "known transaction")
+KNOWN_TX     = ("already known", "known transaction")
+
+def _rejected(e: Exception) -> bool:
+    """Did the node answer and refuse the tx? A timeout or reset proves
+    nothing (the tx may have gone out), and "already known" means it did."""
+    return isinstance(e, ValueError) and not any(k in str(e).lower() for k in KNOWN_TX)
+
+class NonceManager:
+    """Hands out funder nonces back-to-back without waiting on receipts.
+
+    Nonces released by a broadcast the node refused are reused first so they
+    never leave a gap; a broadcast that may have gone out keeps its nonce.
+    The pending count is re-read before the first `reserve` and whenever the
+    node tells us our view is stale (replaced tx, restart, manual send from
+    the wallet). `reserve` does that with a sync call, so code on the RPC
+    loop awaits `sync_async` first while `needs_sync()`.
+    """
+
+    def __init__(self, w3, address: str):
+        self.w3 = w3
+        self.address = address
+        self._lock = threading.Lock()
+        self._next: int | None = None
+        self._gaps: list[int] = []           # min-heap of released nonces
+        self._stale = False
+        self.reserved: set[int] = set()      # handed out, not yet broadcast
+        self.inflight: dict[int, str] = {}   # nonce -> tx hash
+
+    def needs_sync(self) -> bool:
+        return self._next is None or self._stale
+
+    def sync(self):
+        self._synced(self.w3.eth.get_transaction_count(self.address, "pending"))
+
+    async def sync_async(self, aw3):
+        self._synced(await aw3.eth.get_transaction_count(self.address, "pending"))
+
+    def _synced(self, chain_next: int):
+        with self._lock:
+            self._stale = False
+            if self._next is None or chain_next > self._next:
+                self._next = chain_next
+            self._gaps = [n for n in self._gaps if n >= chain_next]
+            heapq.heapify(self._gaps)
+        logging.info("Nonce sync for %s: next=%d gaps=%s", self.address, self._next, sorted(self._gaps))
+
+    def reserve(self) -> int:
+        if self.needs_sync():
+            self.sync()
+        with self._lock:
+            if self._gaps:
+                n = heapq.heappop(self._gaps)
+            else:
+                n = self._next
+                self._next += 1
+            self.reserved.add(n)
+            return n
+
+    def release(self, nonce: int, err: Exception | None = None):
+        """Give back a nonce whose tx never reached the mempool (see `_rejected`)."""
+        with self._lock:
+            self.reserved.discard(nonce)
+            if err is not None and any(k in str(err).lower() for k in NONCE_ERRORS):
+                # the node already has something at this nonce; our counter is
+                # behind, so re-read it before the next reserve
+                self._stale = True
+            elif nonce not in self._gaps:
+                heapq.heappush(self._gaps, nonce)
+
+    def track(self, nonce: int, tx_hex: str):
+        with self._lock:
+            self.reserved.discard(nonce)
+            self.inflight[nonce] = tx_hex
+
+    def settle(self, nonce: int):
+        with self._lock:
+            self.inflight.pop(nonce, None)
+
+    def gaps_below(self, nonce: int) -> list[int]:
+        with self._lock:
+            return sorted(n for n in self._gaps if n < nonce)
+
+    def take_gap(self, nonce: int) -> bool:
+        with self._lock:
+            if nonce not in self._gaps:
+                return False
+            self._gaps.remove(nonce)
+            heapq.heapify(self._gaps)
+            return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self.inflight) + len(self.reserved)
+
+# ── FUNDER POOL ───────────────────────────────────
+class FunderLane:
+    """One funder wallet: its key, its own nonce stream and a running balance."""
+
+    def __init__(self, w3, account):
+        self.address = account.address
+        self.key = account.key
+        self.nonces = NonceManager(w3, self.address)
+        self.balance = 0         # token base units; debited when a payout is routed here
+        self.eth = 0
+        self.allowance: int | None = None   # for the disperse contract, read on first use
+        self.stalled = False     # set by the confirmation tracker
+
+    def __repr__(self) -> str:
+        return f"lane {self.address[:8]}"
+
+class FunderPool:
+    """Routes each payout to the least-loaded lane that can cover it.
+
+    A lane that has a stalled tx or `max_inflight` unconfirmed ones is passed
+    over while any other lane is usable, so one stuck nonce stream doesn't
+    hold up the rest. Balances are re-read every `refresh` seconds and
+    debited locally in between; `pick` re-reads them with sync calls, so code
+    on the RPC loop awaits `refresh_async` first while `due()`.
+    """
+
+    def __init__(self, lanes: list[FunderLane], max_inflight: int, refresh: float):
+        self.lanes = lanes
+        self.max_inflight = max_inflight
+        self.refresh_secs = refresh
+        self._lock = threading.Lock()
+        self._refreshed_at = 0.0
+
+    def due(self) -> bool:
+        return time.time() - self._refreshed_at >= self.refresh_secs
+
+    def refresh(self, force: bool = False):
+        if not force and not self.due():
+            return
+        for lane in self.lanes:
+            try:
+                lane.balance = token.functions.balanceOf(lane.address).call()
+                lane.eth = w3.eth.get_balance(lane.address)
+            except Exception as e:
+                logging.warning("Balance refresh for %s failed: %s", lane, e)
+        self._refreshed()
+
+    async def refresh_async(self, aw3):
+        """`refresh` in one batched round trip, for callers on the RPC loop."""
+        atoken = aw3.eth.contract(address=TOKEN_ADDRESS, abi=ERC20_ABI)
+        found = await asyncio.gather(*(c for l in self.lanes for c in (atoken.functions.balanceOf(l.address).call(),
+                                                                        aw3.eth.get_balance(l.address))),
+                                     return_exceptions=True)
+        for lane, balance, eth in zip(self.lanes, found[::2], found[1::2]):
+            err = next((r for r in (balance, eth) if isinstance(r, Exception)), None)
+            if err is not None:
+                logging.warning("Balance refresh for %s failed: %s", lane, err)
+                continue
+            lane.balance, lane.eth = balance, eth
+        self._refreshed()
+
+    def _refreshed(self):
+        self._refreshed_at = time.time()
+        logging.info("Funder lanes: %s", ", ".join(
+            f"{l.address} {fmt_amount(Decimal(l.balance) / 10**TOKEN_DECIMALS)} {TOKEN_SYMBOL}" for l in self.lanes))
+
+    def pick(self, amount_uint: int = 0) -> FunderLane:
+        self.refresh()
+        with self._lock:
+            funded = [l for l in self.lanes if l.balance >= amount_uint and l.eth > 0] or self.lanes
+            ready = [l for l in funded if not l.stalled and l.nonces.pending() < self.max_inflight] or funded
+            lane = min(ready, key=lambda l: l.nonces.pending())
+            lane.balance -= amount_uint
+            return lane
+
+    def refund(self, lane: FunderLane, amount_uint: int):
+        with self._lock:
+            lane.balance += amount_uint
+
+    def pending(self) -> int:
+        return sum(l.nonces.pending() for l in self.lanes)
+
+# ── CONFIRMATION TRACKER ──────────────────────────
+class TxReplaced(Exception):
+    pass
+
+class _Tracked:
+    __slots__ = ("tx_hash", "tx_hex", "nonce", "raw", "lane", "future", "since", "receipt", "misses")
+
+    def __init__(self, tx_hash, nonce: int, raw: bytes, lane: FunderLane):
+        self.tx_hash, self.tx_hex, self.nonce, self.raw = tx_hash, w3.to_hex(tx_hash), nonce, raw
+        self.lane = lane
+        self.future: Future = Future()
+        self.since = time.time()
+        self.receipt = None
+        self.misses = 0      # heads seen with our nonce mined but no receipt for our hash
+
+class ConfirmationTracker:
+    """One block poller for every in-flight payout.
+
+    Each new head costs one batched round trip: the head, each busy lane's
+    mined nonce and the receipts of all tracked hashes. A tx's future resolves to
+    its receipt once it has `confirmations` blocks, or to an exception if it
+    reverted, was replaced or timed out. Stalled txs get their nonce gaps
+    filled and are rebroadcast if the mempool lost them.
+    """
+
+    def __init__(self, rpc: AsyncRPC, confirmations: int, poll: float, stall: float, timeout: float):
+        self.rpc = rpc
+        self.confirmations = max(confirmations, 1)
+        self.poll, self.stall, self.timeout = poll, stall, timeout
+        self._txs: dict[str, _Tracked] = {}
+        self._task: asyncio.Task | None = None
+        self._head = -1
+
+    def track(self, tx_hash, nonce: int, raw: bytes, lane: FunderLane) -> Future:
+        t = _Tracked(tx_hash, nonce, raw, lane)
+        t.future.add_done_callback(lambda f, t=t: _log_outcome(t, f))
+        self.rpc.loop.call_soon_threadsafe(self._add, t)
+        return t.future
+
+    def pending(self) -> int:
+        return len(self._txs)
+
+    def _add(self, t: _Tracked):
+        self._txs[t.tx_hex] = t
+        if self._task is None or self._task.done():
+            self._task = self.rpc.loop.create_task(self._run())
+
+    async def _run(self):
+        while self._txs:
+            try:
+                await self._tick()
+            except Exception:
+                logging.exception("Confirmation poll failed")
+            await asyncio.sleep(self.poll)
+
+    def _resolve(self, t: _Tracked, receipt=None, exc: Exception | None = None):
+        self._txs.pop(t.tx_hex, None)
+        t.lane.nonces.settle(t.nonce)
+        if exc is not None:
+            t.future.set_exception(exc)
+        else:
+            metrics.observe("confirmation_wait", time.time() - t.since)
+            t.future.set_result(receipt)
+
+    async def _tick(self):
+        aw3 = self.rpc.w3
+        # `track` may add txs on other lanes while this awaits: judge only this snapshot
+        txs = list(self._txs.values())
+        lanes = list({t.lane.address: t.lane for t in txs}.values())
+        head, *counts = await asyncio.gather(aw3.eth.get_block("latest"),
+                                             *(aw3.eth.get_transaction_count(l.address, "latest") for l in lanes))
+        mined_next = {l.address: n for l, n in zip(lanes, counts)}
+        if head["number"] == self._head:
             return
-        time.sleep(2)
-    logging.warning("Timed out waiting for %d confirmations (latest=%d target=%d)", min_conf, latest, target)
+        self._head = head["number"]
+        tip = await aw3.eth.max_priority_fee if FEES.needs_tip(head["number"]) else None
+        FEES.note_head(head["number"], head["baseFeePerGas"], tip)
+
+        waiting = [t for t in txs if t.receipt is None]
+        receipts = await asyncio.gather(*(aw3.eth.get_transaction_receipt(t.tx_hash) for t in waiting),
+                                        return_exceptions=True)
+        now = time.time()
+        stalled = []
+        for t, r in zip(waiting, receipts):
+            if isinstance(r, TransactionNotFound):
+                if t.nonce < mined_next[t.lane.address]:
+                    t.misses += 1
+                    if t.misses >= 2:
+                        self._resolve(t, exc=TxReplaced(f"nonce {t.nonce} mined by another transaction"))
+                elif now - t.since > self.timeout:
+                    self._resolve(t, exc=TimeoutError(f"No receipt for {t.tx_hex} after {self.timeout:.0f}s"))
+                elif now - t.since > self.stall:
+                    stalled.append(t)
+            elif isinstance(r, Exception):
+                metrics.RPC_ERRORS.labels("eth_getTransactionReceipt").inc()
+                logging.warning("Receipt lookup for %s failed: %s", t.tx_hex, r)
+            elif r["status"] != 1:
+                self._resolve(t, exc=RuntimeError(
+                    f"Transaction {t.tx_hex} failed (status={r['status']}) in block {r['blockNumber']}"))
+            else:
+                t.receipt = r
+                metrics.observe("receipt_wait", now - t.since)
+
+        for t in list(self._txs.values()):
+            if t.receipt is not None and self._head >= t.receipt["blockNumber"] + self.confirmations - 1:
+                self._resolve(t, t.receipt)
+
+        stuck = {t.lane.address for t in stalled}
+        for lane in lanes:
+            if lane.stalled != (lane.address in stuck):
+                lane.stalled = lane.address in stuck
+                logging.warning("%s %s", lane, "stalled; routing payouts elsewhere" if lane.stalled else "recovered")
+        if stalled:
+            await self._unstick(stalled)
+
+    async def _unstick(self, stalled: list[_Tracked]):
+        loop = asyncio.get_running_loop()
+        for lane in {t.lane for t in stalled}:
+            top = max(t.nonce for t in stalled if t.lane is lane)
+            for gap in lane.nonces.gaps_below(top):
+                await loop.run_in_executor(None, _fill_gap, lane, gap)
+        aw3 = self.rpc.w3
+        found = await asyncio.gather(*(aw3.eth.get_transaction(t.tx_hash) for t in stalled), return_exceptions=True)
+        dropped = [t for t, f in zip(stalled, found) if isinstance(f, TransactionNotFound)]
+        for t in dropped:
+            logging.warning("Tx %s (nonce %d) dropped from mempool; rebroadcasting", t.tx_hex, t.nonce)
+        res = await asyncio.gather(*(aw3.eth.send_raw_transaction(t.raw) for t in dropped), return_exceptions=True)
+        for t, r in zip(dropped, res):
+            if isinstance(r, Exception):
+                logging.warning("Rebroadcast of nonce %d rejected: %s", t.nonce, r)
+
+def _log_outcome(t: _Tracked, fut: Future):
+    err = fut.exception()
+    metrics.TX_OUTCOMES.labels("confirmed" if err is None else "replaced" if isinstance(err, TxReplaced)
+                                else "timeout" if isinstance(err, TimeoutError) else "reverted").inc()
+    if err is None:
+        r = fut.result()
+        logging.info("Finalized %s in block %d (+%d conf)", t.tx_hex, r["blockNumber"], max(CONFIRMATIONS-1, 0))
+    elif isinstance(err, TxReplaced):
+        logging.error("Tx %s was replaced: %s", t.tx_hex, err)
+        threading.Thread(target=t.lane.nonces.sync, name="nonce-sync", daemon=True).start()
+    else:
+        logging.error("%s", err)
 
+# ── ERC-20 TRANSFER ───────────────────────────────
 def tokens_to_uint(amount_tokens: Decimal) -> int:
     scale = Decimal(10) ** TOKEN_DECIMALS
     return int((amount_tokens * scale).to_integral_exact(rounding=ROUND_DOWN))
 
-def send_tokens(to_addr: str, amount_tokens: Decimal) -> str:
-    global NEXT_NONCE
-    to = Web3.to_checksum_address(to_addr)
-    amt_uint = tokens_to_uint(amount_tokens)
-
-    priority = w3.to_wei(PRIORITY_FEE_GWEI, "gwei")
-    base_fee = w3.eth.get_block("latest")["baseFeePerGas"]
-    max_fee  = base_fee + priority * 2
+def _fee_params() -> tuple[int, int]:
+    return FEES.fees()
 
-    tx = token.functions.transfer(to, amt_uint).build_transaction({
-        "from":    FUNDER_ADDRESS,
-        "nonce":   NEXT_NONCE,
-        "chainId": CHAIN_ID,
-        "value":   0,
-        "maxPriorityFeePerGas": priority,
-        "maxFeePerGas":         max_fee,
-    })
+@metrics.timed("sign")
+def _sign(tx: dict, lane: FunderLane) -> bytes:
+    signed = w3.eth.account.sign_transaction(tx, lane.key)
+    return getattr(signed, "raw_transaction", None) or getattr(signed, "rawTransaction", None)
 
+def _fill_gap(lane: FunderLane, nonce: int):
+    """Burn a released nonce with a 0-value self-transfer so later txs can mine."""
+    if not lane.nonces.take_gap(nonce):
+        return
+    priority, max_fee = _fee_params()
+    raw = _sign({"to": lane.address, "value": 0, "gas": 21_000, "nonce": nonce, "chainId": CHAIN_ID,
+                 "maxPriorityFeePerGas": priority, "maxFeePerGas": max_fee}, lane)
     try:
-        gas_est = w3.eth.estimate_gas(tx)
+        w3.eth.send_raw_transaction(raw)
+        logging.warning("Filled nonce gap %d on %s with a no-op self-transfer", nonce, lane)
     except Exception as e:
-        logging.error("Gas estimation failed (%s). Falling back to 80000.", e)
-        gas_est = 80_000
-    tx["gas"] = gas_est
-
-    signed = w3.eth.account.sign_transaction(tx, FUNDER_KEY)
-    raw = getattr(signed, "raw_transaction", None) or getattr(signed, "rawTransaction", None)
-    tx_hash = w3.eth.send_raw_transaction(raw)
-    tx_hex  = w3.to_hex(tx_hash)
-
-    logging.info("Broadcast %s %s → %s | nonce=%d gas=%d tip=%dgwei maxFee=%dgwei tx=%s",
-                 fmt_amount(amount_tokens), TOKEN_SYMBOL, to, NEXT_NONCE, gas_est,
-                 priority // 10**9, max_fee // 10**9, tx_hex)
-
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=180)
-    if receipt.status != 1:
-        raise RuntimeError(f"Transaction {tx_hex} failed (status={receipt.status}) in block {receipt.blockNumber}")
-    _wait_for_confirmations(receipt.blockNumber, CONFIRMATIONS)
+        lane.nonces.release(nonce, e)
+        logging.error("Could not fill nonce gap %d on %s: %s", nonce, lane, e)
+
+def _unanswered(raw: bytes, lane: FunderLane, nonce: int, e: Exception):
+    """A send that may have been delivered: keep the nonce and track the tx by
+    its own hash. The tracker confirms it, rebroadcasts it if the mempool
+    never got it, or reports it replaced."""
+    tx_hash = w3.keccak(raw)
+    logging.warning("Broadcast of nonce %d on %s not acknowledged (%r); tracking %s",
+                    nonce, lane, e, w3.to_hex(tx_hash))
+    return tx_hash
+
+def _broadcast(call, fallback_gas: int, desc: str, gas: int | None = None,
+               lane: FunderLane | None = None, amount_uint: int = 0) -> tuple[str, Future]:
+    """Sign and send a contract call on the next free nonce of `lane` (or of
+    the pool's pick for `amount_uint`); confirmation runs in the background
+    so the mention loop never waits on block time. Returns the tx hash and
+    the tracker's future for its outcome. Pass `gas` to skip the per-tx
+    estimate."""
+    priority, max_fee = _fee_params()
+
+    lane = lane or POOL.pick(amount_uint)
+    nonce = lane.nonces.reserve()
+    try:
+        tx = call.build_transaction({
+            "from":    lane.address,
+            "nonce":   nonce,
+            "chainId": CHAIN_ID,
+            "value":   0,
+            "maxPriorityFeePerGas": priority,
+            "maxFeePerGas":         max_fee,
+        })
+
+        gas_est = gas
+        if gas_est is None:
+            try:
+                with metrics.timed("gas_estimate"):
+                    gas_est = w3.eth.estimate_gas(tx)
+            except Exception as e:
+                logging.error("Gas estimation failed (%s). Falling back to %d.", e, fallback_gas)
+                metrics.RPC_ERRORS.labels("eth_estimateGas").inc()
+                metrics.FALLBACKS.labels("gas_limit").inc()
+                gas_est = fallback_gas
+        tx["gas"] = gas_est
 
-    logging.info("Finalized %s in block %d (+%d conf)", tx_hex, receipt.blockNumber, max(CONFIRMATIONS-1, 0))
-    NEXT_NONCE += 1
-    return tx_hex
+        raw = _sign(tx, lane)
+    except Exception as e:
+        lane.nonces.release(nonce, e)
+        POOL.refund(lane, amount_uint)
+        raise
+    try:
+        with metrics.timed("broadcast"):
+            tx_hash = w3.eth.send_raw_transaction(raw)
+    except Exception as e:
+        if _rejected(e):
+            lane.nonces.release(nonce, e)
+            POOL.refund(lane, amount_uint)
+            raise
+        tx_hash = _unanswered(raw, lane, nonce, e)
+    tx_hex = w3.to_hex(tx_hash)
+    lane.nonces.track(nonce, tx_hex)
+
+    logging.info("Broadcast %s | %s nonce=%d gas=%d tip=%dgwei maxFee=%dgwei tx=%s",
+                 desc, lane, nonce, gas_est, priority // 10**9, max_fee // 10**9, tx_hex)
+
+    return tx_hex, CONFIRMS.track(tx_hash, nonce, raw, lane)
+
+def _ensure_disperse_allowance(lane: FunderLane, total_uint: int):
+    if lane.allowance is None:
+        lane.allowance = token.functions.allowance(lane.address, disperse.address).call()
+    if lane.allowance >= total_uint:
+        return
+    max_uint = 2**256 - 1
+    # approve lands on a lower nonce, so it is mined before the disperse that needs it
+    _broadcast(token.functions.approve(disperse.address, max_uint), 60_000,
+               f"approve {disperse.address} for {TOKEN_SYMBOL}", lane=lane)
+    lane.allowance = max_uint
+
+def send_batch(payouts: list[tuple[str, Decimal]]) -> tuple[str, Future]:
+    init_chain()
+    recipients = [Web3.to_checksum_address(a) for a, _ in payouts]
+    values = [tokens_to_uint(x) for _, x in payouts]
+    lane = POOL.pick(sum(values))
+    try:
+        _ensure_disperse_allowance(lane, sum(values))
+    except Exception:
+        POOL.refund(lane, sum(values))
+        raise
+    sent = _broadcast(disperse.functions.disperseToken(TOKEN_ADDRESS, recipients, values),
+                        60_000 + 40_000 * len(recipients),
+                        f"{fmt_amount(sum((x for _, x in payouts), Decimal(0)))} {TOKEN_SYMBOL} → "
+                        f"{len(recipients)} recipients", lane=lane, amount_uint=sum(values))
+    for to in recipients:
+        FEES.mark_warm(TOKEN_ADDRESS, to)
+    lane.allowance -= sum(values)
+    return sent
+
+async def _prepare_many(payouts: list[tuple[str, Decimal]]) -> tuple[list, tuple[int, int]]:
+    """Route and sign one transfer per payout after a single JSON-RPC round
+    trip for the fee head and any missing gas estimates (plus one for lane
+    balances and nonce counts when those are due). Returns the signed
+    (lane, nonce, raw, to, amt, x, gas) tuples, in order, and the fees used."""
+    aw3 = RPC.w3
+    atoken = aw3.eth.contract(address=TOKEN_ADDRESS, abi=ERC20_ABI)
+    items = [(Web3.to_checksum_address(a), tokens_to_uint(x), x) for a, x in payouts]
+    # balances and nonce counts through the batching provider, so pick/reserve make no sync call on this loop
+    await asyncio.gather(*([POOL.refresh_async(aw3)] if POOL.due() else []),
+                         *(l.nonces.sync_async(aw3) for l in POOL.lanes if l.nonces.needs_sync()))
+    picked = []
+    for _, amt, _ in items:
+        lane = POOL.pick(amt)   # first, so gas is estimated from the sender
+        picked.append((lane, lane.nonces.reserve()))   # now, so the next pick sees this lane's load
+    try:
+        return await _sign_many(aw3, atoken, items, picked)
+    except Exception:
+        for (lane, nonce), (_, amt, _) in zip(picked, items):
+            lane.nonces.release(nonce)
+            POOL.refund(lane, amt)
+        raise
+
+async def _sign_many(aw3, atoken, items: list, picked: list) -> tuple[list, tuple[int, int]]:
+    """`_prepare_many`'s lookups and signing, on lanes and nonces already picked."""
+    lookups = {}
+    if not FEES.fresh():
+        lookups["head"] = aw3.eth.get_block("latest")
+        if FEES.tip is None:
+            lookups["tip"] = aw3.eth.max_priority_fee
+    for (to, amt, _), (lane, _) in zip(items, picked):
+        key = FEES.gas_key(TOKEN_ADDRESS, to)
+        if FEES.cached_gas(key) is None and key not in lookups:
+            lookups[key] = atoken.functions.transfer(FEES.probe_for(key, to), amt).estimate_gas({"from": lane.address})
+    with metrics.timed("gas_estimate"):
+        found = dict(zip(lookups, await asyncio.gather(*lookups.values(), return_exceptions=True)))
+    tip = found.pop("tip", None)
+    if isinstance(tip, Exception):
+        logging.error("Batched tip lookup failed: %s", tip)
+        tip = None
+    for key, res in found.items():
+        if isinstance(res, Exception):
+            logging.error("Batched %s lookup failed: %s", key, res)
+        elif key == "head":
+            FEES.note_head(res["number"], res["baseFeePerGas"], tip)
+        else:
+            FEES.note_gas(key, res)
+    priority, max_fee = _fee_params()
+
+    signed = []
+    for (to, amt, x), (lane, nonce) in zip(items, picked):
+        gas = FEES.cached_gas(FEES.gas_key(TOKEN_ADDRESS, to))
+        if gas is None:
+            metrics.FALLBACKS.labels("gas_limit").inc()
+            gas = 80_000
+        raw = _sign({"to": TOKEN_ADDRESS, "data": token.encodeABI(fn_name="transfer", args=[to, amt]),
+                     "value": 0, "gas": gas, "nonce": nonce, "chainId": CHAIN_ID,
+                     "maxPriorityFeePerGas": priority, "maxFeePerGas": max_fee}, lane)
+        signed.append((lane, nonce, raw, to, amt, x, gas))
+    return signed, (priority, max_fee)
+
+async def _broadcast_signed(signed: list, fees: tuple[int, int]) -> list:
+    """Send everything `_prepare_many` signed in one round trip. Returns, in
+    order, (tx hash, confirmation future) or the exception for each; nonces
+    of txs the node refused go back to their lane."""
+    aw3 = RPC.w3
+    priority, max_fee = fees
+    with metrics.timed("broadcast"):
+        sent = await asyncio.gather(*(aw3.eth.send_raw_transaction(raw) for _, _, raw, *_ in signed),
+                                    return_exceptions=True)
+    out = []
+    for (lane, nonce, raw, to, amt, x, gas), res in zip(signed, sent):
+        if isinstance(res, Exception) and _rejected(res):
+            lane.nonces.release(nonce, res)
+            POOL.refund(lane, amt)
+            out.append(res)
+            continue
+        if isinstance(res, Exception):
+            res = _unanswered(raw, lane, nonce, res)
+        tx_hex = w3.to_hex(res)
+        lane.nonces.track(nonce, tx_hex)
+        FEES.mark_warm(TOKEN_ADDRESS, to)
+        logging.info("Broadcast %s %s → %s | %s nonce=%d gas=%d tip=%dgwei maxFee=%dgwei tx=%s",
+                     fmt_amount(x), TOKEN_SYMBOL, to, lane, nonce, gas, priority // 10**9, max_fee // 10**9, tx_hex)
+        out.append((tx_hex, CONFIRMS.track(res, nonce, raw, lane)))
+    return out
+
+async def _send_many(payouts: list[tuple[str, Decimal]]) -> list:
+    """Broadcast one transfer per payout in two JSON-RPC round trips: fee head
+    plus any missing gas estimates, then every signed tx. Returns (tx hash,
+    confirmation future) or the exception for each payout, in order."""
+    return await _broadcast_signed(*await _prepare_many(payouts))
+
+def send_many(payouts: list[tuple[str, Decimal]]) -> list:
+    init_chain()
+    return RPC.run(_send_many(payouts))
+
+# ── PAYOUT BATCHING ───────────────────────────────
+class Payout:
+    """`kind` and `data` name what the payout is for (see payout_sent /
+    payout_failed), so a queued payout survives being written to the jobs table."""
+    __slots__ = ("to_addr", "amount", "kind", "data", "holds")
+
+    def __init__(self, to_addr, amount, kind, data, holds):
+        self.to_addr, self.amount = to_addr, amount
+        self.kind, self.data, self.holds = kind, data, holds
+
+class PayoutBatcher:
+    """Collects payouts and sends them together: one disperse tx per funder
+    lane when BATCH_PAYOUTS is on, otherwise individual transfers spread over
+    the lanes and pipelined through one batched RPC round trip (see `send_many`).
+
+    A payout's effects wait for its tx: `settle` runs payout_sent once it has
+    confirmed, or payout_failed if it was rejected, reverted, replaced or
+    timed out. Each payout carries the (handle, kind) rate-limit slots it
+    will fill, so `can_do` refuses a second payout for the same handle while
+    the first is queued or in flight.
+    """
+
+    def __init__(self, window: float, max_size: int):
+        self.window = window
+        self.max_size = max_size
+        self.items: list[Payout] = []
+        self.inflight: list[tuple[Payout, object]] = []   # (payout, (tx hash, future) or exception)
+        self.opened_at = 0.0
+        self._deferred = False
+
+    def add(self, to_addr: str, amount: Decimal, kind: str, data: dict, holds=()):
+        if not self.items:
+            self.opened_at = time.time()
+        self.items.append(Payout(to_addr, amount, kind, data, tuple(holds)))
+        if self._deferred:
+            return   # queued inside a transaction; the caller flushes once it has committed
+        if len(self.items) >= self.max_size or (self.window and time.time() - self.opened_at >= self.window):
+            self.flush()
+
+    def holds(self, handle: str, kind: str) -> bool:
+        key = (handle, kind)
+        return any(key in p.holds for p in self.items) or any(key in p.holds for p, _ in self.inflight)
+
+    def tids(self) -> set[int]:
+        """Tweets with a payout queued or in flight."""
+        return {p.data["tid"] for p in self.items} | {p.data["tid"] for p, _ in self.inflight}
+
+    @contextlib.contextmanager
+    def deferred(self):
+        """Queue without flushing, so no RPC runs while a transaction holds
+        the write lock; `flush` after it commits."""
+        self._deferred = True
+        try:
+            yield
+        finally:
+            self._deferred = False
+
+    def flush(self):
+        """Broadcast everything queued; the outcomes are picked up by `settle`."""
+        while self.items:
+            batch, self.items = self.items[:self.max_size], self.items[self.max_size:]
+            pairs = [(p.to_addr, p.amount) for p in batch]
+            if BATCH_PAYOUTS:
+                init_chain()
+                # one disperse per lane, so the parts ride parallel nonce streams
+                size = -(-len(pairs) // min(len(POOL.lanes), len(pairs)))
+                results = []
+                for i in range(0, len(pairs), size):
+                    part = pairs[i:i + size]
+                    try:
+                        results += [send_batch(part)] * len(part)
+                    except Exception as e:
+                        logging.error("Batch payout of %d recipients failed: %s", len(part), e)
+                        results += [e] * len(part)
+            else:
+                try:
+                    results = send_many(pairs)
+                except Exception as e:
+                    logging.error("Pipelined payout of %d transfers failed: %s", len(batch), e)
+                    results = [e] * len(batch)
+            self.inflight += zip(batch, results)
+
+    def ready(self) -> bool:
+        return any(isinstance(res, Exception) or res[1].done() for _, res in self.inflight)
+
+    def settle(self) -> int:
+        """Apply the outcome of every payout whose tx has confirmed or failed.
+        Call inside a transaction, then `flush` for any fallback payouts.
+        Returns the number still in flight."""
+        done, keep = [], []
+        for p, res in self.inflight:
+            (done if isinstance(res, Exception) or res[1].done() else keep).append((p, res))
+        self.inflight = keep
+        with self.deferred():
+            for p, res in done:
+                err = res if isinstance(res, Exception) else res[1].exception()
+                try:
+                    if err is not None:
+                        payout_failed(p.kind, p.data, err)
+                    else:
+                        record_payout(res[0], p.to_addr, p.amount, p.kind, p.data)
+                        payout_sent(p.kind, p.data, res[0])
+                except Exception:
+                    logging.exception("Payout callback failed")
+        return len(self.inflight)
+
+PAYOUTS = PayoutBatcher(BATCH_WINDOW_SECS, BATCH_MAX_RECIPIENTS)
+JOBS: JobQueue | None = None   # set by start_worker() for the scrape / payout / reply roles
+
+def pay(to_addr: str, amount: Decimal, kind: str, data: dict, holds=()):
+    """Queue a payout; it goes out when the batch is flushed (end of the
+    mention batch, BATCH_WINDOW_SECS or BATCH_MAX_RECIPIENTS), or as a
+    payout job when running as separate workers. Either way the tweet is
+    claimed in the caller's transaction: by its job row, or by a
+    processed_tweets claim."""
+    if JOBS is not None:
+        JOBS.enqueue("payout", f"{data['tid']}:{kind}",
+                     {"to": to_addr, "amount": str(amount), "kind": kind, "data": data},
+                     tid=data["tid"], holds=holds)
+        return
+    claim_for_payout(data["tid"])
+    PAYOUTS.add(to_addr, amount, kind, data, holds)
+
+# ── BROWSER SESSION ───────────────────────────────
+class BrowserSession:
+    """One Chromium and one logged-in context, kept alive across loop iterations.
+
+    Playwright runs on its own event-loop thread; callers hand it coroutines
+    through `run()`. The browser is relaunched only after a crash, an expired
+    session is re-authenticated inside the live context, and the storage
+    state is written back from that context.
+    """
+
+    def __init__(self, headless: bool = True):
+        self.headless = headless
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="browser", daemon=True)
+        self._thread.start()
+        self._pw = None
+        self.browser = None
+        self.ctx = None
+        self._idle: list = []          # pages ready for reuse
+        self._state_saved_at = 0.0
+
+    def run(self, coro, timeout: float | None = None):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    async def context(self):
+        if self.ctx is None or not self.browser.is_connected():
+            await self._launch()
+        return self.ctx
+
+    async def _launch(self):
+        if self.browser is not None:
+            logging.warning("Chromium is gone; relaunching")
+            try:
+                await self.browser.close()
+            except Exception:
+                pass
+        with metrics.timed("browser_launch"):
+            if self._pw is None:
+                from playwright.async_api import async_playwright
+                self._pw = await async_playwright().start()
+            self.browser = await self._pw.chromium.launch(headless=self.headless)
+            self.ctx = await self.browser.new_context(
+                storage_state=STATE_FILE if os.path.exists(STATE_FILE) else None)
+        self._idle = []
+        logging.info("Launched Chromium (headless=%s)", self.headless)
+
+    @contextlib.asynccontextmanager
+    async def page(self):
+        ctx = await self.context()
+        page = None
+        while self._idle and page is None:
+            p = self._idle.pop()
+            page = None if p.is_closed() else p
+        page = page or await ctx.new_page()
+        try:
+            yield page
+        except Exception:
+            # don't hand a page in an unknown state to the next caller
+            with contextlib.suppress(Exception):
+                await page.close()
+            raise
+        if page.is_closed() or page.context is not self.ctx:
+            return
+        if len(self._idle) < BROWSER_IDLE_PAGES:
+            self._idle.append(page)
+        else:
+            await page.close()
+
+    async def login(self):
+        """Log in inside the current context and persist the fresh cookies."""
+        async with self.page() as page:
+            await page.goto("https://x.com/i/flow/login", wait_until="domcontentloaded")
+            await page.fill("input[name='text']", X_USERNAME)
+            await page.click("button:has-text('Next')")
+            await page.fill("input[name='password']", X_PASSWORD)
+            await page.click("button:has-text('Log in')")
+            await page.wait_for_url("https://x.com/home", timeout=30000)
+        await self.save_state()
+        logging.info("✅ Logged in and saved session to %s", STATE_FILE)
+
+    async def save_state(self):
+        await self.ctx.storage_state(path=STATE_FILE)
+        self._state_saved_at = time.time()
+
+    async def maybe_save_state(self):
+        if time.time() - self._state_saved_at >= STATE_REFRESH_SECS:
+            await self.save_state()
+
+    async def close(self):
+        if self.browser is not None:
+            await self.browser.close()
+        if self._pw is not None:
+            await self._pw.stop()
+        self.browser = self.ctx = self._pw = None
+
+BROWSER = BrowserSession(headless=BROWSER_HEADLESS)
 
 # ── X LOGIN ───────────────────────────────────────
 def login_and_save_state():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        ctx     = browser.new_context()
-        page    = ctx.new_page()
-        page.goto("https://x.com/i/flow/login", wait_until="domcontentloaded")
-        page.fill("input[name='text']", X_USERNAME)
-        page.click("button:has-text('Next')")
-        page.fill("input[name='password']", X_PASSWORD)
-        page.click("button:has-text('Log in')")
-        page.wait_for_url("https://x.com/home", timeout=30000)
-        ctx.storage_state(path=STATE_FILE)
-        browser.close()
-    logging.info("✅ Logged in and saved session to %s", STATE_FILE)
+    BROWSER.run(BROWSER.login())
 
-# ── FETCH MENTIONS ───────────────────────────────
-def fetch_mentions(since_id: int):
-    out = []
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        ctx     = browser.new_context(storage_state=STATE_FILE)
-        page    = ctx.new_page()
+async def _login_required(page) -> bool:
+    try:
+        return page.url.startswith("https://x.com/i/flow/login") or await page.locator("input[name='text']").is_visible()
+    except Exception:
+        return False
 
-        page.goto("https://x.com/notifications/mentions", wait_until="domcontentloaded", timeout=60000)
+# ── FETCH MENTIONS ───────────────────────────────
+MENTIONS_URL = "https://x.com/notifications/mentions"
+_DONE = object()
+
+class ScrapeStatus:
+    """What the last scrape ran into, for the scheduler."""
+    __slots__ = ("relogin", "logged_out", "truncated", "reached", "since_id", "oldest")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.relogin = False      # the session had expired and was refreshed
+        self.logged_out = False   # ...and is still invalid
+        self.truncated = False    # stopped at MENTIONS_MAX_PAGES before reaching since_id
+        self.reached = True       # got back to since_id; if not, the oldest mentions are still unfetched
+        self.since_id = 0
+        self.oldest: int | None = None   # oldest tweet id the scrape got to
+
+SCRAPE = ScrapeStatus()
+
+def _wants(text: str) -> bool:
+    low = text.lower()
+    return (KEYWORD_BIND in low) or (KEYWORD_BLESS in low) or bool(ETH_ADDR_RE.search(low))
+
+def _tweet_from_legacy(tid: str, leg: dict, screen_name: str) -> dict:
+    mentions = [u.get("screen_name", "") for u in (leg.get("entities") or {}).get("user_mentions", [])]
+    return {"id": int(tid), "handle": screen_name, "text": (leg.get("full_text") or leg.get("text") or "").strip(),
+            "mentions": [norm_handle(u) for u in mentions if u]}
+
+def _tweets_from_payload(data) -> Iterator[dict]:
+    """Yield tweets from either the v2 adaptive JSON or a GraphQL timeline."""
+    g = data.get("globalObjects") if isinstance(data, dict) else None
+    if g:
+        users = g.get("users", {})
+        for t in g.get("tweets", {}).values():
+            u = users.get(t.get("user_id_str"), {})
+            yield _tweet_from_legacy(t["id_str"], t, u.get("screen_name", ""))
+        return
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            if node.get("__typename") == "Tweet" and "legacy" in node and "rest_id" in node:
+                user = ((node.get("core") or {}).get("user_results") or {}).get("result") or {}
+                name = (user.get("legacy") or {}).get("screen_name") or (user.get("core") or {}).get("screen_name", "")
+                yield _tweet_from_legacy(node["rest_id"], node["legacy"], name)
+                continue  # don't descend into quoted/retweeted tweets
+            stack.extend(node.values())
+
+async def _open_mentions(page) -> bool:
+    await page.goto(MENTIONS_URL, wait_until="domcontentloaded", timeout=60000)
+    if await _login_required(page):
+        logging.warning("Session invalid or login required; refreshing session in place…")
+        SCRAPE.relogin = True
+        await BROWSER.login()
+        await page.goto(MENTIONS_URL, wait_until="domcontentloaded", timeout=60000)
+        if await _login_required(page):
+            logging.error("Still logged out after refreshing the session")
+            SCRAPE.logged_out = True
+            return False
+    return True
 
+async def _dom_mentions(page, since_id: int) -> list[dict]:
+    out = []
+    try:
+        await page.wait_for_load_state("networkidle", timeout=30000)
+    except Exception:
+        logging.warning("networkidle wait timed out; continuing anyway")
+
+    selectors = [
+        "article",
+        "div[data-testid='cellInnerDiv'] article",
+        "div[data-testid='tweet']",
+    ]
+    articles = []
+    for sel in selectors:
         try:
-            if page.url.startswith("https://x.com/i/flow/login") or page.locator("input[name='text']").is_visible(timeout=3000):
-                logging.warning("Session invalid or login required; refreshing STATE_FILE…")
-                browser.close()
-                login_and_save_state()
-                return []
+            await page.wait_for_selector(sel, timeout=25000)
+            articles = await page.query_selector_all(sel)
+            if articles:
+                break
         except Exception:
-            pass
+            continue
+
+    if not articles:
+        logging.warning("No articles found on notifications page (layout change or empty inbox).")
+        return []
 
+    for art in articles:
         try:
-            page.wait_for_load_state("networkidle", timeout=30000)
+            text = (await art.inner_text()).strip()
         except Exception:
-            logging.warning("networkidle wait timed out; continuing anyway")
-
-        selectors = [
-            "article",
-            "div[data-testid='cellInnerDiv'] article",
-            "div[data-testid='tweet']",
-        ]
-        articles = []
-        for sel in selectors:
-            try:
-                page.wait_for_selector(sel, timeout=25000)
-                articles = page.query_selector_all(sel)
-                if articles:
-                    break
-            except Exception:
-                continue
+            continue
 
-        if not articles:
-            logging.warning("No articles found on notifications page (layout change or empty inbox).")
-            browser.close()
-            return []
+        if not _wants(text):
+            continue
 
-        for art in articles:
-            try:
-                text = art.inner_text().strip()
-            except Exception:
-                continue
-            low = text.lower()
+        link = await art.query_selector("a[href*='/status/']")
+        if not link:
+            continue
+        href = ((await link.get_attribute("href")) or "").strip("/")
+        parts = href.split("/")
+        if len(parts) < 3 or parts[1] != "status":
+            continue
 
-            if (KEYWORD_BIND not in low) and (KEYWORD_BLESS not in low) and (not ETH_ADDR_RE.search(low)):
-                continue
+        handle, _, tid_s = parts
+        if not tid_s.isdigit():
+            continue
+        tid = int(tid_s)
 
-            link = art.query_selector("a[href*='/status/']")
-            if not link:
-                continue
-            href = (link.get_attribute("href") or "").strip("/")
-            parts = href.split("/")
-            if len(parts) < 3 or parts[1] != "status":
-                continue
+        if tid <= since_id or norm_handle(handle) == norm_handle(X_USERNAME):
+            continue
 
-            handle, _, tid_s = parts
-            if not tid_s.isdigit():
-                continue
-            tid = int(tid_s)
+        out.append({"id": tid, "handle": handle, "text": text})
+    return out
 
-            if tid <= since_id or norm_handle(handle) == norm_handle(X_USERNAME):
-                continue
+async def _stream_mentions(since_id: int, sink: queue.Queue, floor: int | None = None):
+    """Capture the mentions timeline JSON and scroll until `since_id` (or the
+    end of the timeline) is reached, pushing each wanted tweet into `sink`.
 
-            out.append({"id": tid, "handle": handle, "text": text})
+    `floor` is where a previous scrape from the same `since_id` stopped short;
+    pages above it were covered then and don't count toward
+    MENTIONS_MAX_PAGES, so a backlog deeper than one scrape still drains."""
+    me = norm_handle(X_USERNAME)
+    payloads: asyncio.Queue = asyncio.Queue()
 
-        browser.close()
+    def on_response(resp):
+        if MENTIONS_API_RE.search(resp.url):
+            payloads.put_nowait(resp)
 
-    return sorted(out, key=lambda x: x["id"])
+    try:
+        async with BROWSER.page() as page:
+            page.on("response", on_response)
+            try:
+                if not await _open_mentions(page):
+                    return
+                seen: set[int] = set()
+                captured, fresh, reached, idle, oldest = 0, 0, False, 0, None
+                while not reached and idle < MENTIONS_IDLE_SCROLLS and fresh < MENTIONS_MAX_PAGES:
+                    try:
+                        resp = await asyncio.wait_for(payloads.get(), timeout=MENTIONS_PAGE_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        idle += 1
+                        await page.mouse.wheel(0, 8000)
+                        continue
+                    try:
+                        data = await resp.json()
+                    except Exception:
+                        continue
+                    captured += 1
+                    idle = 0
+                    page_oldest = None
+                    for tw in _tweets_from_payload(data):
+                        if tw["id"] <= since_id:
+                            reached = True
+                            continue
+                        page_oldest = min(page_oldest or tw["id"], tw["id"])
+                        if tw["id"] in seen or norm_handle(tw["handle"]) == me:
+                            continue
+                        if tw["mentions"] and me not in tw["mentions"]:
+                            continue  # conversation context, not a mention of us
+                        seen.add(tw["id"])
+                        if _wants(tw["text"]):
+                            sink.put({"id": tw["id"], "handle": tw["handle"], "text": tw["text"]})
+                    if page_oldest is not None:
+                        oldest = min(oldest or page_oldest, page_oldest)
+                        if floor is None or page_oldest < floor:
+                            fresh += 1
+                    if payloads.empty():
+                        await page.mouse.wheel(0, 8000)
+
+                SCRAPE.truncated = not reached and fresh >= MENTIONS_MAX_PAGES
+                # ending where the last short scrape ended, without the page cap, is the end of the timeline
+                SCRAPE.reached = reached or not since_id or (
+                    not SCRAPE.truncated and floor is not None and oldest is not None and oldest >= floor)
+                SCRAPE.oldest = oldest
+                if not captured:
+                    logging.warning("No mentions timeline responses captured; falling back to DOM scrape")
+                    for m in await _dom_mentions(page, since_id):
+                        sink.put(m)
+            finally:
+                page.remove_listener("response", on_response)
+        await BROWSER.maybe_save_state()
+    finally:
+        sink.put(_DONE)
+
+async def _fetch_mentions_dom(since_id: int) -> list[dict]:
+    async with BROWSER.page() as page:
+        out = await _dom_mentions(page, since_id) if await _open_mentions(page) else []
+    await BROWSER.maybe_save_state()
+    return out
+
+def iter_mentions(since_id: int) -> Iterator[dict]:
+    """Yield new mentions as the timeline pages arrive (unordered)."""
+    floor = SCRAPE.oldest if SCRAPE.since_id == since_id and not SCRAPE.reached else None
+    SCRAPE.reset()
+    SCRAPE.since_id = since_id
+    if MENTIONS_SOURCE == "dom":
+        yield from BROWSER.run(_fetch_mentions_dom(since_id))
+        return
+    SCRAPE.reached = False
+    sink: queue.Queue = queue.Queue()
+    fut = asyncio.run_coroutine_threadsafe(_stream_mentions(since_id, sink, floor), BROWSER.loop)
+    while (item := sink.get()) is not _DONE:
+        yield item
+    fut.result()
+
+def fetch_mentions(since_id: int):
+    return sorted(iter_mentions(since_id), key=lambda x: x["id"])
 
 # ── REPLY VIA UI (with optional images) ──────────
-def reply_via_ui(tweet_id: int, handle: str, msg: str, image_paths: list[str] | None = None):
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        ctx     = browser.new_context(storage_state=STATE_FILE)
-        page    = ctx.new_page()
-        page.goto(f"https://x.com/{handle}/status/{tweet_id}", wait_until="domcontentloaded", timeout=30000)
-        page.wait_for_selector("div[role='textbox']", timeout=15000)
-        page.click("div[role='textbox']")
+TWEET_BTN = 'div[data-testid="tweetButtonInline"]:not([aria-disabled="true"])'
+
+def _is_create_tweet(resp) -> bool:
+    return "CreateTweet" in resp.url and resp.request.method == "POST"
+
+async def _reply_via_ui(tweet_id: int, handle: str, msg: str, image_paths: list[str] | None):
+    async with BROWSER.page() as page:
+        await page.goto(f"https://x.com/{handle}/status/{tweet_id}", wait_until="domcontentloaded", timeout=30000)
+        await page.wait_for_selector("div[role='textbox']", timeout=15000)
+        await page.click("div[role='textbox']")
 
         if image_paths:
-            page.locator("input[data-testid='fileInput']").set_input_files(image_paths)
-            time.sleep(1.5)
-
-        page.fill("div[role='textbox']", f"@{handle} {msg}")
-        time.sleep(0.8)
-
-        clicked = False
-        for _ in range(12):
-            btn = page.query_selector('div[data-testid="tweetButtonInline"]:not([aria-disabled="true"])')
-            if btn and btn.is_visible():
-                page.evaluate("b => b.click()", btn)
-                clicked = True
-                break
-            time.sleep(0.25)
-        if not clicked:
-            page.keyboard.press("Control+Enter")
-        time.sleep(1)
-        browser.close()
+            await page.locator("input[data-testid='fileInput']").set_input_files(image_paths)
+            await page.locator("[data-testid='attachments']").wait_for(timeout=15000)
+
+        await page.fill("div[role='textbox']", f"@{handle} {msg}")
+
+        # the button only enables once text is in and any uploads have finished
+        async with page.expect_response(_is_create_tweet, timeout=20000) as resp_info:
+            try:
+                await page.locator(TWEET_BTN).click(timeout=5000)
+            except Exception:
+                await page.keyboard.press("Control+Enter")
+        resp = await resp_info.value
+        body = await resp.json() if resp.ok else {}
+        errors = body.get("errors") or []
+        # 187 = duplicate status: an earlier attempt already went through
+        if not resp.ok or any(e.get("code") != 187 for e in errors):
+            raise RuntimeError(f"CreateTweet rejected (HTTP {resp.status}): {errors or resp.status_text}")
     logging.info("Replied to @%s (tweet %d)%s", handle, tweet_id,
                  f" with {len(image_paths)} image(s)" if image_paths else "")
 
+# ── REPLY DISPATCHER ──────────────────────────────
+class ReplyDispatcher:
+    """Posts replies in parallel from at most `tabs` pages of the shared browser.
+
+    `submit` returns at once. `drain` waits for everything in flight, marks
+    the tweets whose reply X acknowledged as processed (in one short
+    transaction, after the last post has settled), and returns the ids that
+    still failed after retries.
+    """
+
+    def __init__(self, session: BrowserSession, tabs: int, retries: int, backoff: float):
+        self.session = session
+        self.tabs = tabs
+        self.retries = retries
+        self.backoff = backoff
+        self._sem: asyncio.Semaphore | None = None
+        self._inflight: list[tuple[int, str, object]] = []
+
+    def submit(self, tweet_id: int, handle: str, msg: str, images: list[str] | None, reason: str):
+        fut = asyncio.run_coroutine_threadsafe(self._post(tweet_id, handle, msg, images), self.session.loop)
+        self._inflight.append((tweet_id, reason, fut))
+
+    async def _post(self, tweet_id: int, handle: str, msg: str, images: list[str] | None):
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.tabs)
+        async with self._sem:
+            for attempt in range(self.retries):
+                try:
+                    with metrics.timed("reply_post"):
+                        res = await _reply_via_ui(tweet_id, handle, msg, images)
+                    metrics.REPLY_ATTEMPTS.labels("ok").inc()
+                    return res
+                except Exception as e:
+                    if attempt == self.retries - 1:
+                        metrics.REPLY_ATTEMPTS.labels("failed").inc()
+                        raise
+                    metrics.REPLY_ATTEMPTS.labels("retry").inc()
+                    delay = self.backoff * 2 ** attempt * (1 + random.random() / 2)
+                    logging.warning("Reply to tweet %d failed (%s); retry %d in %.1fs",
+                                    tweet_id, e, attempt + 1, delay)
+                    await asyncio.sleep(delay)
+
+    def wait(self):
+        """Block until every submitted post has settled, without writing anything."""
+        wait([fut for _, _, fut in self._inflight])
+
+    def drain(self) -> list[int]:
+        # settle every post before the first write, so the transaction
+        # doesn't hold the write lock while replies are still in flight
+        self.wait()
+        inflight, self._inflight = self._inflight, []
+        failed = []
+        with transaction():
+            for tid, reason, fut in inflight:
+                try:
+                    fut.result()
+                except Exception as e:
+                    logging.error("Giving up on reply to tweet %d: %s", tid, e)
+                    failed.append(tid)
+                    continue
+                mark_processed(tid, reason)
+        return failed
+
+REPLIES = ReplyDispatcher(BROWSER, REPLY_TABS, REPLY_RETRIES, REPLY_BACKOFF_SECS)
+
 # NEW: convenience wrapper to reply and mark processed
 def reply_and_mark(tweet_id: int, handle: str, msg: str, images: list[str] | None, reason: str):
-    reply_via_ui(tweet_id, handle, msg, images)
-    mark_processed(tweet_id, reason)
+    if JOBS is not None:
+        JOBS.enqueue("reply", str(tweet_id),
+                     {"handle": handle, "msg": msg, "images": images or [], "reason": reason}, tid=tweet_id)
+        return
+    REPLIES.submit(tweet_id, handle, msg, images, reason)
 
 # ── CORE LOGIC ────────────────────────────────────
 def parse_bless_target(text: str) -> str | None:
     m = re.search(r"\bbless\b\s+@?([A-Za-z0-9_]{1,15})", text)
     return m.group(1) if m else None
 
-def process_pending_after_bind(bound_handle: str, bound_addr: str) -> tuple[bool, str | None]:
-    row = get_first_pending(bound_handle)
+def reward_bind(tid: int, author_raw: str, author: str, addr: str, sfx: str = ""):
+    """Pay the bind reward, folding in the first pending blessing if one is waiting.
+    If the combined payout fails, payout_failed falls back to the bare reward."""
+    d = {"tid": tid, "handle": author_raw, "author": author, "addr": addr, "sfx": sfx}
+    row = get_first_pending(author)
     if not row:
-        return False, None
-    total_send = BIND_REWARD_TOKENS + Decimal(row["amount"])
-    txh = send_tokens(bound_addr, total_send)
-    record(bound_handle, "recv")
-    consume_pending(row["id"])
-    return True, txh
-
-def main():
-    last_id  = load_last_id()
-    mentions = fetch_mentions(last_id)
-    if not mentions:
-        logging.info("No new mentions.")
+        pay(addr, BIND_REWARD_TOKENS, "bind_reward", d, holds=[(author, "recv")])
         return
-
-    for m in mentions:
+    pay(addr, BIND_REWARD_TOKENS + Decimal(row["amount"]), "bind_pending", dict(d, pending_id=row["id"]),
+        holds=[(author, "recv")])
+
+def bless(tid: int, author_raw: str, author: str, target: str, target_norm: str, target_addr: str):
+    pay(target_addr, TRANSFER_AMOUNT_TOKENS, "bless",
+        {"tid": tid, "handle": author_raw, "author": author, "target": target, "target_norm": target_norm},
+        holds=[(author, "sent"), (target_norm, "recv")])
+
+def payout_sent(kind: str, d: dict, txh: str):
+    if kind == "bless":
+        record(d["author"], "sent")
+        record(d["target_norm"], "recv")
+        reply_and_mark(
+            d["tid"], d["handle"],
+            f"→ @{d['target']}: {fmt_amount(TRANSFER_AMOUNT_TOKENS)} {TOKEN_SYMBOL} sent! "
+            f"Tx: https://basescan.org/tx/{txh}",
+            images_for("bless_sent"),
+            "bless_sent"
+        )
+    elif kind == "bind_pending":
+        record(d["author"], "recv")
+        consume_pending(d["pending_id"])
+        reply_and_mark(
+            d["tid"], d["handle"],
+            f"your wallet {d['addr']} is bound. You’ve received {fmt_amount(BIND_REWARD_TOKENS)} {TOKEN_SYMBOL} (bind) + "
+            f"{fmt_amount(TRANSFER_AMOUNT_TOKENS)} {TOKEN_SYMBOL} blessing. Tx: https://basescan.org/tx/{txh}",
+            images_for("bind_success"),
+            "bind_and_fulfill_pending" + d["sfx"]
+        )
+    else:
+        record(d["author"], "recv")
+        reply_and_mark(
+            d["tid"], d["handle"],
+            f"your wallet {d['addr']} is bound and you’ve received {fmt_amount(BIND_REWARD_TOKENS)} {TOKEN_SYMBOL}! "
+            f"Tx: https://basescan.org/tx/{txh}",
+            images_for("bind_success"),
+            "bind_reward" + d["sfx"]
+        )
+
+def payout_failed(kind: str, d: dict, e: Exception):
+    if kind == "bless":
+        logging.error("Bless send failed: %s", e)
+        reply_and_mark(d["tid"], d["handle"], "failed to send blessing.",
+                       images_for("bless_failed"), "bless_failed")
+    elif kind == "bind_pending" and not isinstance(e, TimeoutError):
+        # a timed-out tx may still mine, so only a proven failure falls back to the bare reward
+        logging.error("Pending-fulfillment send failed: %s", e)
+        d = {k: v for k, v in d.items() if k != "pending_id"}
+        pay(d["addr"], BIND_REWARD_TOKENS, "bind_reward", d, holds=[(d["author"], "recv")])
+    else:
+        logging.error("Bind reward send failed: %s", e)
+        reply_and_mark(d["tid"], d["handle"], "bind saved but reward failed to send.",
+                       images_for("bind_failed"), "bind_reward_failed" + d["sfx"])
+
+# ── PLAN ──────────────────────────────────────────
+class Reject(NamedTuple):
+    """Reply only; `reason` is what mark_processed records."""
+    tid: int
+    handle: str
+    msg: str
+    images: str
+    reason: str
+
+class Bind(NamedTuple):
+    tid: int
+    handle: str     # as written, for the reply
+    author: str     # normalized
+    addr: str
+    bare: bool      # a bare address answering a pending blessing
+
+class Bless(NamedTuple):
+    tid: int
+    handle: str
+    author: str
+    target: str
+    target_norm: str
+    target_addr: str
+
+class Enqueue(NamedTuple):
+    tid: int
+    handle: str
+    author: str
+    target: str
+    target_norm: str
+
+Action = Reject | Bind | Bless | Enqueue
+
+class Planner:
+    """Turns mentions into actions using only the batch snapshot and the rate
+    limiter. Each decision's effects (new bindings, queued pendings, claimed
+    rate-limit slots) are carried forward so later mentions in the same batch
+    are judged as if the earlier ones had already run."""
+
+    def __init__(self, claimed=()):
+        self.bound: dict[str, str] = {}
+        self.pending: set[str] = set()
+        self.claimed: set[tuple[str, str]] = set(claimed)
+
+    def binding(self, hn: str) -> str | None:
+        return self.bound.get(hn) or get_binding(hn)
+
+    def has_pending(self, hn: str) -> bool:
+        return hn in self.pending or has_unconsumed_pending(hn)
+
+    def allowed(self, hn: str, kind: str) -> bool:
+        return (hn, kind) not in self.claimed and can_do(hn, kind)
+
+    def _bind(self, tid: int, author_raw: str, author: str, addr: str, bare: bool) -> Bind:
+        from eth_utils import to_checksum_address
+        self.bound[author] = to_checksum_address(addr)
+        self.claimed.add((author, "recv"))
+        return Bind(tid, author_raw, author, addr, bare)
+
+    def classify(self, m: dict) -> Action | None:
         tid        = m["id"]
         author_raw = m["handle"]
         author     = norm_handle(author_raw)
-        text       = m["text"].strip()
-        low        = text.lower()
+        low        = m["text"].strip().lower()
 
-        # Skip if already processed (idempotent)
         if was_processed(tid):
             logging.info("Skipping already-processed tweet %d", tid)
-            continue
-
+            return None
         logging.info("Processing @%s (tweet %d): %s", author_raw, tid, low)
 
-        # 0) Bare address reply handler (only when pending)
-        if ETH_ADDR_RE.search(low) and ("bind me" not in low):
-            addr = ETH_ADDR_RE.search(low).group(0)
-            if get_binding(author):
-                reply_and_mark(tid, author_raw, f"you’re already bound to {get_binding(author)}. No changes made.",
-                               images_for("bind_failed"), "already_bound_bare")
-                continue
-            if has_unconsumed_pending(author):
-                created = bind_wallet_if_new(author, addr)
-                if created:
-                    try:
-                        sent, txh = process_pending_after_bind(author, addr)
-                    except Exception as e:
-                        logging.error("Pending-fulfillment send failed: %s", e)
-                        sent, txh = False, None
-                    if sent:
-                        reply_and_mark(
-                            tid, author_raw,
-                            f"your wallet {addr} is bound. You’ve received {fmt_amount(BIND_REWARD_TOKENS)} {TOKEN_SYMBOL} (bind) + "
-                            f"{fmt_amount(TRANSFER_AMOUNT_TOKENS)} {TOKEN_SYMBOL} blessing. Tx: https://basescan.org/tx/{txh}",
-                            images_for("bind_success"),
-                            "bind_and_fulfill_pending_bare"
-                        )
-                    else:
-                        try:
-                            txh = send_tokens(addr, BIND_REWARD_TOKENS)
-                            record(author, "recv")
-                            reply_and_mark(
-                                tid, author_raw,
-                                f"your wallet {addr} is bound and you’ve received {fmt_amount(BIND_REWARD_TOKENS)} {TOKEN_SYMBOL}! "
-                                f"Tx: https://basescan.org/tx/{txh}",
-                                images_for("bind_success"),
-                                "bind_reward_bare"
-                            )
-                        except Exception as e:
-                            logging.error("Bind reward send failed: %s", e)
-                            reply_and_mark(tid, author_raw, "bind saved but reward failed to send.",
-                                           images_for("bind_failed"), "bind_reward_failed_bare")
-                else:
-                    reply_and_mark(tid, author_raw, "binding exists already.",
-                                   images_for("bind_failed"), "bind_exists_bare")
-                continue
-            reply_and_mark(tid, author_raw, 'to bind, reply: "bind me 0xYOURADDRESS"',
-                           images_for("needs_bind"), "bind_instructions")
-            continue
-
-        # 1) Explicit Binding flow
+        # 0) Bare address reply (only binds when a blessing is waiting)
+        addr_match = ETH_ADDR_RE.search(low)
+        if addr_match and "bind me" not in low:
+            existing = self.binding(author)
+            if existing:
+                return Reject(tid, author_raw, f"you’re already bound to {existing}. No changes made.",
+                              "bind_failed", "already_bound_bare")
+            if self.has_pending(author):
+                return self._bind(tid, author_raw, author, addr_match.group(0), True)
+            return Reject(tid, author_raw, 'to bind, reply: "bind me 0xYOURADDRESS"',
+                          "needs_bind", "bind_instructions")
+
+        # 1) Explicit binding
         bind_match = re.search(r"bind me\s+(0x[a-f0-9]{40})", low)
         if bind_match:
             addr = bind_match.group(1)
-            existing = get_binding(author)
+            existing = self.binding(author)
+            if existing and existing.lower() == addr:
+                return Reject(tid, author_raw, f"you’re already bound to {existing}. No changes made.",
+                              "bind_failed", "already_bound_same")
             if existing:
-                if existing.lower() == addr.lower():
-                    reply_and_mark(tid, author_raw, f"you’re already bound to {existing}. No changes made.",
-                                   images_for("bind_failed"), "already_bound_same")
-                else:
-                    reply_and_mark(tid, author_raw, f"you’re already bound to {existing}. Binding cannot be changed.",
-                                   images_for("bind_failed"), "already_bound_diff")
-                continue
-
-            created = bind_wallet_if_new(author, addr)
-            if not created:
-                reply_and_mark(tid, author_raw, "binding exists already.",
-                               images_for("bind_failed"), "bind_exists_explicit")
-                continue
+                return Reject(tid, author_raw, f"you’re already bound to {existing}. Binding cannot be changed.",
+                              "bind_failed", "already_bound_diff")
+            return self._bind(tid, author_raw, author, addr, False)
 
-            try:
-                sent, txh = process_pending_after_bind(author, addr)
-            except Exception as e:
-                logging.error("Pending-fulfillment send failed: %s", e)
-                sent, txh = False, None
-
-            if sent:
-                reply_and_mark(
-                    tid, author_raw,
-                    f"your wallet {addr} is bound. You’ve received {fmt_amount(BIND_REWARD_TOKENS)} {TOKEN_SYMBOL} (bind) + "
-                    f"{fmt_amount(TRANSFER_AMOUNT_TOKENS)} {TOKEN_SYMBOL} blessing. Tx: https://basescan.org/tx/{txh}",
-                    images_for("bind_success"),
-                    "bind_and_fulfill_pending"
-                )
-            else:
-                try:
-                    txh = send_tokens(addr, BIND_REWARD_TOKENS)
-                    record(author, "recv")
-                    reply_and_mark(
-                        tid, author_raw,
-                        f"your wallet {addr} is bound and you’ve received {fmt_amount(BIND_REWARD_TOKENS)} {TOKEN_SYMBOL}! "
-                        f"Tx: https://basescan.org/tx/{txh}",
-                        images_for("bind_success"),
-                        "bind_reward"
-                    )
-                except Exception as e:
-                    logging.error("Bind reward send failed: %s", e)
-                    reply_and_mark(tid, author_raw, "bind saved but reward failed to send.",
-                                   images_for("bind_failed"), "bind_reward_failed")
-            continue
-
-        # 2) Bless flow
+        # 2) Bless
         target = parse_bless_target(low)
-        if target:
-            target_norm = norm_handle(target)
+        if not target:
+            return None
+        target_norm = norm_handle(target)
+        if target_norm == author:
+            return Reject(tid, author_raw, "you can’t bless yourself.", "bless_failed", "self_bless_block")
+        if not self.allowed(author, "sent"):
+            return Reject(tid, author_raw, "you can only send a blessing once every 24h.",
+                          "sender_rate_limit", "sender_rate_limit")
+        target_addr = self.binding(target_norm)
+        if target_addr:
+            if not self.allowed(target_norm, "recv"):
+                return Reject(tid, author_raw, f"@{target} already received {TOKEN_SYMBOL} in last 24h.",
+                              "recipient_rate_limit", "recipient_rate_limit")
+            self.claimed.update({(author, "sent"), (target_norm, "recv")})
+            return Bless(tid, author_raw, author, target, target_norm, target_addr)
+        if self.has_pending(target_norm):
+            return Reject(tid, author_raw, f"@{target} needs to join the faith first. Please drop your ETH wallet below",
+                          "needs_bind", "needs_bind_existing_pending")
+        self.pending.add(target_norm)
+        self.claimed.add((author, "sent"))
+        return Enqueue(tid, author_raw, author, target, target_norm)
+
+def plan(mentions: list[dict]) -> list[Action]:
+    claimed = ()
+    if JOBS is not None:
+        # payout workers record transfers in their own process: take their
+        # unsent payouts first, then whatever they recorded (never neither)
+        claimed = JOBS.open_holds()
+        LIMITS.hydrate(conn)
+    planner, actions = Planner(claimed), []
+    for m in mentions:
+        with metrics.timed("classify"):
+            a = planner.classify(m)
+        if a is not None:
+            actions.append(a)
+    return actions
+
+# ── EXECUTE ───────────────────────────────────────
+def execute(actions: list[Action]) -> list[int]:
+    """Run a batch plan grouped by kind: DB writes, then replies that need no
+    payout (posting in the background), then every payout in one flush.
+    The writes (and, with workers, the reply and payout jobs) commit in one
+    short transaction before anything is broadcast or posted. Returns the
+    tweet ids whose reply still failed after retries."""
+    try:
+        with transaction(), PAYOUTS.deferred():
+            binds = [a for a in actions if isinstance(a, Bind)]
+            with metrics.timed("db_writes"):
+                for a in list(binds):
+                    if not bind_wallet_if_new(a.author, a.addr):
+                        binds.remove(a)
+                        reply_and_mark(a.tid, a.handle, "binding exists already.", images_for("bind_failed"),
+                                       "bind_exists_bare" if a.bare else "bind_exists_explicit")
+                enqueues = [a for a in actions if isinstance(a, Enqueue)]
+                for a in enqueues:
+                    if queue_single_pending(a.target_norm, TRANSFER_AMOUNT_TOKENS, a.author, a.tid):
+                        record(a.author, "sent")
+
+            for a in actions:
+                if isinstance(a, Reject):
+                    reply_and_mark(a.tid, a.handle, a.msg, images_for(a.images), a.reason)
+            for a in enqueues:
+                reply_and_mark(a.tid, a.handle, f"@{a.target} needs to join the faith first. Please drop your ETH wallet below",
+                               images_for("needs_bind"), "needs_bind_enqueued")
+
+            for a in binds:
+                reward_bind(a.tid, a.handle, a.author, a.addr, "_bare" if a.bare else "")
+            for a in actions:
+                if isinstance(a, Bless):
+                    bless(a.tid, a.handle, a.author, a.target, a.target_norm, a.target_addr)
+    finally:
+        try:
+            # queued payouts must go out even if a later action blew up
+            PAYOUTS.flush()
+        finally:
+            failed = REPLIES.drain()
+    return failed
+
+# ── WORKERS ───────────────────────────────────────
+async def _resume_payout(r: dict):
+    """Settle a retried payout job against the tx it already signed: its hash
+    if that tx was sent, None if it can never mine (sign afresh), or the error."""
+    aw3 = RPC.w3
+
+    async def receipt():
+        try:
+            return await aw3.eth.get_transaction_receipt(r["hash"])
+        except TransactionNotFound:
+            return None
 
-            # self-bless guard
-            if target_norm == author:
-                reply_and_mark(tid, author_raw, "you can’t bless yourself.",
-                               images_for("bless_failed"), "self_bless_block")
-                continue
+    rec = await receipt()
+    if rec is not None:
+        return r["hash"] if rec["status"] == 1 else None   # a revert moved nothing
+    try:
+        await aw3.eth.get_transaction(r["hash"])
+        return r["hash"]                                   # still in the mempool
+    except TransactionNotFound:
+        pass
+    if await aw3.eth.get_transaction_count(r["from"], "latest") > r["nonce"]:
+        rec = await receipt()                              # it may have mined since the first look
+        return r["hash"] if rec is not None and rec["status"] == 1 else None
+    try:
+        await aw3.eth.send_raw_transaction(r["raw"])
+        logging.warning("Rebroadcast checkpointed payout tx %s (nonce %d)", r["hash"], r["nonce"])
+        return r["hash"]
+    except Exception as e:
+        return e if _rejected(e) else r["hash"]
 
-            # sender daily limit
-            if not can_do(author, "sent"):
-                reply_and_mark(tid, author_raw, "you can only send a blessing once every 24h.",
-                               images_for("sender_rate_limit"), "sender_rate_limit")
-                continue
+async def _resume_payouts(results: list[dict]) -> list:
+    return await asyncio.gather(*(_resume_payout(r) for r in results), return_exceptions=True)
 
-            target_addr = get_binding(target_norm)
-            if target_addr:
-                if not can_do(target_norm, "recv"):
-                    reply_and_mark(tid, author_raw, f"@{target} already received {TOKEN_SYMBOL} in last 24h.",
-                                   images_for("recipient_rate_limit"), "recipient_rate_limit")
+async def _await_payout(tx_hash: str):
+    """Wait until a resumed payout's tx has CONFIRMATIONS blocks. Raises if it
+    reverted or no receipt showed up within RECEIPT_TIMEOUT."""
+    aw3 = RPC.w3
+    deadline = time.time() + RECEIPT_TIMEOUT
+    while True:
+        try:
+            rec = await aw3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            rec = None
+        if rec is not None:
+            if rec["status"] != 1:
+                raise RuntimeError(f"Transaction {tx_hash} failed (status={rec['status']}) in block {rec['blockNumber']}")
+            if await aw3.eth.block_number >= rec["blockNumber"] + CONFIRMATIONS - 1:
+                return rec
+        elif time.time() > deadline:
+            raise TimeoutError(f"No receipt for {tx_hash} after {RECEIPT_TIMEOUT:.0f}s")
+        await asyncio.sleep(BLOCK_POLL_SECS)
+
+async def _await_payouts(hashes: list[str]) -> list:
+    return await asyncio.gather(*(_await_payout(h) for h in hashes), return_exceptions=True)
+
+async def _last_look(r: dict) -> str:
+    """Where a checkpointed payout tx stands before its job is given up on:
+    "mined", "dead" (reverted, or its nonce went to another tx) or "unknown"
+    (pending, or lost but still mineable)."""
+    aw3 = RPC.w3
+
+    async def receipt():
+        try:
+            return await aw3.eth.get_transaction_receipt(r["hash"])
+        except TransactionNotFound:
+            return None
+
+    rec = await receipt()
+    if rec is None and await aw3.eth.get_transaction_count(r["from"], "latest") > r["nonce"]:
+        rec = await receipt()                              # it may have mined since the first look
+        if rec is None:
+            return "dead"
+    if rec is None:
+        return "unknown"
+    return "mined" if rec["status"] == 1 else "dead"
+
+async def _last_looks(results: list[dict]) -> list:
+    return await asyncio.gather(*(_last_look(r) for r in results), return_exceptions=True)
+
+def run_payout_jobs() -> int:
+    """Lease a batch of payout jobs, send them and wait for their txs. Each
+    signed tx is checkpointed into its job before broadcast, so a retry after
+    a crash or a lost lease re-sends or adopts that tx instead of paying
+    twice. A job completes only once its tx has confirmed; a revert,
+    replacement or timeout fails it and the retry settles against the
+    checkpoint. On the last attempt the checkpointed tx gets one more look:
+    if it mined the job completes, and if it may still mine the job is
+    dead-lettered without the failure reply or fallback. Completion and
+    effects (transfer records, reply job, fallback payout) commit together.
+    Returns the number of jobs leased."""
+    jobs = JOBS.lease("payout", BATCH_MAX_RECIPIENTS)
+    if not jobs:
+        return 0
+    init_chain()
+    results: dict[int, object] = {}   # job id -> confirmed tx hash, or the exception
+    try:
+        adopted: dict[int, str] = {}
+        resumed = [j for j in jobs if j.result]
+        if resumed:
+            for j, res in zip(resumed, RPC.run(_resume_payouts([j.result for j in resumed]))):
+                if isinstance(res, Exception):
+                    results[j.id] = res
+                elif res is not None:
+                    adopted[j.id] = res
+        tracked: dict[int, tuple[str, Future]] = {}
+        fresh = [j for j in jobs if j.id not in results and j.id not in adopted]
+        if fresh:
+            signed, fees = RPC.run(_prepare_many([(j.payload["to"], Decimal(j.payload["amount"])) for j in fresh]))
+            go = []
+            with transaction():
+                for j, s in zip(fresh, signed):
+                    lane, nonce, raw, _, amt, *_ = s
+                    if JOBS.checkpoint(j, {"from": lane.address, "nonce": nonce, "raw": w3.to_hex(raw),
+                                           "hash": w3.to_hex(w3.keccak(raw))}):
+                        go.append((j, s))
+                    else:
+                        lane.nonces.release(nonce)
+                        POOL.refund(lane, amt)
+            sent = RPC.run(_broadcast_signed([s for _, s in go], fees))
+            for (j, _), res in zip(go, sent):
+                if isinstance(res, Exception):
+                    results[j.id] = res
                 else:
-                    try:
-                        txh = send_tokens(target_addr, TRANSFER_AMOUNT_TOKENS)
-                        record(author, "sent")
-                        record(target_norm, "recv")
-                        reply_and_mark(
-                            tid, author_raw,
-                            f"→ @{target}: {fmt_amount(TRANSFER_AMOUNT_TOKENS)} {TOKEN_SYMBOL} sent! Tx: https://basescan.org/tx/{txh}",
-                            images_for("bless_sent"),
-                            "bless_sent"
-                        )
-                    except Exception as e:
-                        logging.error("Bless send failed: %s", e)
-                        reply_and_mark(tid, author_raw, "failed to send blessing.",
-                                       images_for("bless_failed"), "bless_failed")
+                    tracked[j.id] = res
+        if adopted:
+            for (jid, txh), res in zip(adopted.items(), RPC.run(_await_payouts(list(adopted.values())))):
+                results[jid] = res if isinstance(res, Exception) else txh
+        wait([fut for _, fut in tracked.values()])
+        for jid, (txh, fut) in tracked.items():
+            results[jid] = fut.exception() or txh
+    except Exception as e:
+        logging.error("Payout batch of %d jobs failed: %s", len(jobs), e)
+        for j in jobs:
+            results.setdefault(j.id, e)
+
+    # a job about to be dead-lettered may still have a tx out: only a tx that
+    # can no longer mine gets the "failed" reply and the fallback payout
+    unsettled = set()
+    last = [j for j in jobs if isinstance(results.get(j.id), Exception) and JOBS.last_attempt(j) and j.result]
+    if last:
+        try:
+            looks = RPC.run(_last_looks([j.result for j in last]))
+        except Exception as e:
+            looks = [e] * len(last)
+        for j, look in zip(last, looks):
+            if look == "mined":
+                results[j.id] = j.result["hash"]
+            elif look != "dead":
+                unsettled.add(j.id)
+
+    with transaction():
+        for j in jobs:
+            if j.id not in results:
+                continue   # lost the lease before broadcast
+            res, p = results[j.id], j.payload
+            try:
+                if isinstance(res, Exception):
+                    if JOBS.fail(j, res):
+                        if j.id in unsettled:
+                            logging.error("Dead-lettered %s while tx %s may still mine; no reply or fallback sent",
+                                          j, j.result["hash"])
+                        else:
+                            payout_failed(p["kind"], p["data"], res)
+                elif JOBS.complete(j, dict(j.result or {}, sent=res)):
+                    record_payout(res, p["to"], Decimal(p["amount"]), p["kind"], p["data"])
+                    payout_sent(p["kind"], p["data"], res)
+            except Exception:
+                logging.exception("Effects of %s failed", j)
+    return len(jobs)
+
+def run_reply_jobs() -> int:
+    """Lease reply jobs and post them through the dispatcher; returns the number leased."""
+    jobs = JOBS.lease("reply", REPLY_TABS * 2)
+    if not jobs:
+        return 0
+    for j in jobs:
+        p = j.payload
+        REPLIES.submit(j.tid, p["handle"], p["msg"], p["images"], p["reason"])
+    REPLIES.wait()   # post everything before taking the write lock
+    with transaction():
+        failed = set(REPLIES.drain())
+        for j in jobs:
+            if j.tid in failed:
+                JOBS.fail(j, "reply not acknowledged after retries")
             else:
-                if has_unconsumed_pending(target_norm):
-                    reply_and_mark(
-                        tid, author_raw,
-                        f"@{target} needs to join the faith first. Please drop your ETH wallet below",
-                        images_for("needs_bind"),
-                        "needs_bind_existing_pending"
-                    )
-                else:
-                    queued = queue_single_pending(target_norm, TRANSFER_AMOUNT_TOKENS, author, tid)
-                    if queued:
-                        record(author, "sent")
-                    reply_and_mark(
-                        tid, author_raw,
-                        f"@{target} needs to join the faith first. Please drop your ETH wallet below",
-                        images_for("needs_bind"),
-                        "needs_bind_enqueued"
-                    )
-            continue
+                JOBS.complete(j)
+    return len(jobs)
+
+def start_worker(role: str):
+    global JOBS
+    init_db()
+    JOBS = JobQueue(conn, f"{role}@{socket.gethostname()}:{os.getpid()}",
+                    JOB_LEASE_SECS, JOB_MAX_ATTEMPTS, JOB_BACKOFF_SECS)
+    if role == "payout" and BATCH_PAYOUTS:
+        logging.warning("BATCH_PAYOUTS is ignored by payout workers: each job is its own transfer")
+    logging.info("Worker %s started; jobs: %s", JOBS.owner,
+                 ", ".join(f"{k}/{st}={n}" for (k, st), n in sorted(JOBS.counts().items())) or "none")
+
+def start_indexer():
+    init_db()
+    init_chain()
+    from eth_account import Account
+    from indexer import TransferIndexer
+    return TransferIndexer(conn, RPC, TOKEN_ADDRESS, [Account.from_key(k).address for k in FUNDER_KEYS],
+                           relays=[DISPERSE_ADDRESS] if DISPERSE_ADDRESS else [],
+                           confirmations=CONFIRMATIONS, chunk=INDEX_CHUNK_BLOCKS, start_block=INDEX_FROM_BLOCK)
+
+# ── MAIN LOOP ─────────────────────────────────────
+def startup():
+    init_db()
+    n = conn.execute("SELECT count(*) FROM processed_tweets WHERE reason=?", (PAYOUT_CLAIM,)).fetchone()[0]
+    if n:
+        logging.warning("%d tweet(s) still claimed by a payout from an earlier run; "
+                        "they are not retried, check the index role's reconcile", n)
+    if not token_meta_known():
+        init_chain()  # first run only: fetches decimals/symbol and caches them
+
+def scrape(since_id: int) -> list[dict]:
+    with metrics.timed("mention_scrape"):
+        return fetch_mentions(since_id)
+
+def settle_payouts() -> int:
+    """Apply the outcome of payouts whose tx confirmed or failed since the
+    last call and post their replies. Returns the number still in flight."""
+    with transaction():
+        left = PAYOUTS.settle()
+    PAYOUTS.flush()   # fallbacks queued by payout_failed
+    REPLIES.drain()
+    return left
+
+def process(mentions: list[dict], last_id: int, complete: bool = True):
+    """Answer a scraped batch and move last_id past it. `complete` is False
+    when the scrape stopped before getting back to last_id."""
+    with prefetch(mentions):
+        actions = plan(mentions)
+        failed = execute(actions)
+    settle_payouts()   # rejected broadcasts; confirmations are settled while waiting on the next scrape
+
+    if not complete:
+        # the oldest mentions since last_id are still unfetched; stay put and let
+        # was_processed skip this batch when the next scrape goes back for them
+        logging.warning("Scrape stopped short of tweet %d; keeping it as last_id", last_id)
+    elif failed:
+        # keep unreplied tweets inside the next fetch window; was_processed skips the rest
+        save_last_id(max(last_id, min(failed) - 1))
+    else:
+        save_last_id(mentions[-1]["id"])
 
-    save_last_id(mentions[-1]["id"])
+def main():
+    init_db()
+    last_id  = load_last_id()
+    mentions = scrape(last_id)
+    if not mentions:
+        logging.info("No new mentions.")
+        return
+    process(mentions, last_id, SCRAPE.reached)
+
+# ── SCHEDULER ─────────────────────────────────────
+class PollScheduler:
+    """Picks the wait before the next mentions scrape.
+
+    Keeps a moving average of the mention rate and waits long enough to pick
+    up about `target` mentions, within [lo, hi]. A full or truncated batch
+    means a backlog, so the next scrape comes at the floor. Scrape errors and
+    session refreshes back off exponentially up to `backoff_max`. Every wait
+    gets +/- `jitter` and can be cut short with `wake()` (SIGUSR1).
+    """
+
+    def __init__(self, lo: float, hi: float, target: int, jitter: float, backoff_max: float, alpha: float = 0.3):
+        self.lo, self.hi = lo, hi
+        self.target = max(target, 1)
+        self.jitter = jitter
+        self.backoff_max = backoff_max
+        self.alpha = alpha
+        self.rate: float | None = None   # mentions per second
+        self.backlog = False
+        self.errors = 0
+        self._last_at = time.time()
+        self._wake = threading.Event()
+
+    def observe(self, n: int, truncated: bool = False):
+        now = time.time()
+        r = n / max(now - self._last_at, 1e-3)
+        self._last_at = now
+        self.rate = r if self.rate is None else self.alpha * r + (1 - self.alpha) * self.rate
+        self.backlog = truncated or n >= self.target
+        self.errors = 0
+
+    def failed(self):
+        self.errors += 1
+
+    def delay(self) -> float:
+        if self.errors:
+            d = min(self.lo * 2 ** self.errors, self.backoff_max)
+        elif self.backlog:
+            d = self.lo
+        elif not self.rate:
+            d = self.hi
+        else:
+            d = min(max(self.target / self.rate, self.lo), self.hi)
+        return d * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def wait(self, secs: float):
+        self._wake.wait(secs)
+        self._wake.clear()
+
+    def wake(self):
+        self._wake.set()
+
+def run_loop(sched: PollScheduler, compactor=None):
+    """Scrape, process, repeat. The next scrape is scheduled as soon as a
+    batch arrives and runs while that batch is being processed. Confirmed
+    payouts are settled and retention chunks run while waiting on a scrape."""
+    scraper = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scrape")
+
+    def scrape_after(delay: float, since_id: int):
+        if delay > 0:
+            logging.info("Next scrape in %.1fs", delay)
+            sched.wait(delay)
+        return since_id, scrape(since_id)
+
+    nxt = scraper.submit(scrape_after, 0, load_last_id())
+    while True:
+        while not nxt.done():
+            if PAYOUTS.ready():
+                try:
+                    settle_payouts()
+                except Exception:
+                    logging.exception("Settling payouts failed")
+            try:
+                more = compactor is not None and compactor.step()
+            except Exception:
+                logging.exception("Retention step failed")
+                more = False
+            if not more:
+                wait([nxt], timeout=BLOCK_POLL_SECS if PAYOUTS.inflight else None)
+        try:
+            since_id, mentions = nxt.result()
+        except Exception:
+            logging.exception("Mention scrape failed")
+            sched.failed()
+            nxt = scraper.submit(scrape_after, sched.delay(), load_last_id())
+            continue
+        last_id = load_last_id()
+        if since_id > last_id:
+            # scraped past tweets the previous batch failed to answer; start over from the saved id
+            nxt = scraper.submit(scrape_after, 0, last_id)
+            continue
+        reached = SCRAPE.reached
+        if SCRAPE.relogin or SCRAPE.logged_out:
+            sched.failed()
+        else:
+            sched.observe(len(mentions), not reached)
+        if not mentions:
+            logging.info("No new mentions.")
+        nxt = scraper.submit(scrape_after, sched.delay(), mentions[-1]["id"] if mentions and reached else since_id)
+        if mentions:
+            try:
+                process(mentions, last_id, reached)
+            except Exception:
+                logging.exception("Error processing %d mentions", len(mentions))
 
 # ── ENTRY POINT ───────────────────────────────────
+# all (default): scrape, pay and reply in this one process
+# scrape | payout | reply: one stage per process, handing work over through the jobs table
+# index: mirror funder Transfer logs and reconcile them with the payout ledger
+ROLES = ("all", "scrape", "payout", "reply", "index")
+
 if __name__ == "__main__":
-    if not os.path.exists(STATE_FILE):
+    role = sys.argv[1] if len(sys.argv) > 1 else os.getenv("WORKER_ROLE", "all")
+    if role not in ROLES:
+        sys.exit(f"usage: {sys.argv[0]} [{'|'.join(ROLES)}]")
+    metrics.serve(METRICS_PORT)
+    startup()
+    if role == "index":
+        indexer = start_indexer()
+        while True:
+            try:
+                indexer.catch_up()
+                indexer.reconcile(RECONCILE_GRACE_SECS)
+            except Exception:
+                logging.exception("Error in index worker")
+            time.sleep(INDEX_POLL_SECS)
+    if role != "all":
+        start_worker(role)
+    if role != "payout" and not os.path.exists(STATE_FILE):
         login_and_save_state()
-    while True:
-        try:
-            logging.info("--- Starting check loop ---")
-            main()
-        except Exception:
-            logging.exception("Error in main loop")
-        time.sleep(60)
+    if role in ("payout", "reply"):
+        step = run_payout_jobs if role == "payout" else run_reply_jobs
+        while True:
+            try:
+                busy = step()
+            except Exception:
+                logging.exception("Error in %s worker", role)
+                busy = 0
+            if not busy:
+                time.sleep(JOB_POLL_SECS)
+    sched = PollScheduler(POLL_MIN_SECS, POLL_MAX_SECS, POLL_TARGET_BATCH, POLL_JITTER, POLL_BACKOFF_MAX_SECS)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda *_: sched.wake())
+    from retention import Compactor
+    compactor = Compactor(conn, load_last_id, keep_transfers=max(timedelta(days=RETAIN_TRANSFERS_DAYS), RATE_WINDOW),
+                          keep_tweets=timedelta(days=RETAIN_TWEETS_DAYS),
+                          keep_pending=timedelta(days=RETAIN_PENDING_DAYS),
+                          chunk=RETENTION_CHUNK, every=RETENTION_EVERY_SECS)
+    run_loop(sched, compactor)
@@ -0,0 +1,62 @@
+# metrics.py
+# Prometheus metrics for the bot (mainBase.py) and the API (webapp.py).
+# Point PROMETHEUS_MULTIPROC_DIR at the same empty directory for both processes
+# and the API's /metrics reports the bot's numbers too; without it the bot can
+# serve its own on METRICS_PORT.
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess, start_http_server)
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# 1ms .. ~2min: covers a DB commit up to a confirmation wait
+_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 120)
+
+STAGE_SECONDS = Histogram("cik_stage_seconds", "Wall time per pipeline stage", ["stage"], buckets=_BUCKETS)
+PROCESSED     = Counter("cik_processed_tweets_total", "Mentions marked processed, by reason", ["reason"])
+RPC_ERRORS    = Counter("cik_rpc_errors_total", "Failed RPC calls", ["method"])
+FALLBACKS     = Counter("cik_fallbacks_total", "Hard-coded defaults used because a lookup failed", ["what"])
+TX_OUTCOMES   = Counter("cik_tx_outcomes_total", "Final state of broadcast transactions", ["outcome"])
+REPLY_ATTEMPTS = Counter("cik_reply_attempts_total", "Reply posts, by result", ["result"])
+JOBS          = Counter("cik_jobs_total", "Queued jobs finished, retried or dead-lettered", ["kind", "outcome"])
+COMPACTED     = Counter("cik_compacted_rows_total", "Rows rolled up, pruned or archived by retention", ["table"])
+RECONCILE_ISSUES = Gauge("cik_reconcile_issues", "Payout/chain mismatches found by the last reconcile",
+                         ["issue"], multiprocess_mode="livemax")
+
+_samples: dict[str, list[float]] | None = None
+
+@contextmanager
+def timed(stage: str):
+    """Observe the wall time of the block (or decorated call) under `stage`."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - t0)
+
+def observe(stage: str, seconds: float):
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    if _samples is not None:
+        _samples.setdefault(stage, []).append(seconds)
+
+def keep_samples() -> dict[str, list[float]]:
+    """Also keep every raw timing (bench/ needs exact percentiles, not buckets)."""
+    global _samples
+    _samples = {}
+    return _samples
+
+def serve(port: int):
+    """Standalone exporter for a process that has no web app of its own."""
+    if port and not MULTIPROC_DIR:
+        start_http_server(port)
+
+def render() -> tuple[bytes, str]:
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
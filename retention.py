@@ -0,0 +1,122 @@
+# retention.py
+# Keeps users.db bounded: transfer rows past the rate-limit window become
+# per-handle daily counts, processed_tweets (and finished jobs) well below
+# last_id are pruned, and consumed pending blessings move to an archive table.
+# Tables come from storage.py's migrations; mainBase runs the chunks between
+# mention batches.
+import time
+import logging
+import sqlite3
+from datetime import datetime, timezone, timedelta
+
+import metrics
+
+def snowflake_floor(tid: int, back: timedelta) -> int:
+    """The smallest tweet id that can have been posted `back` before `tid`."""
+    return tid - (int(back.total_seconds() * 1000) << 22)
+
+class Compactor:
+    """Runs retention one small transaction at a time.
+
+    `step()` does one chunk of the current pass and returns True while more
+    work remains, so the caller can interleave it with anything else and
+    stop whenever it likes; a new pass starts every `every` seconds.
+    """
+
+    def __init__(self, db: sqlite3.Connection, last_id, *, keep_transfers: timedelta, keep_tweets: timedelta,
+                 keep_pending: timedelta, chunk: int = 500, every: float = 3600):
+        self.db = db
+        self.last_id = last_id   # callable -> the scraper's since_id
+        self.keep_transfers = keep_transfers
+        self.keep_tweets = keep_tweets
+        self.keep_pending = keep_pending
+        self.chunk = chunk
+        self.every = every
+        self._tasks = [self._rollup_transfers, self._prune_tweets, self._prune_jobs, self._archive_pending]
+        self._todo: list = []
+        self._next_at = 0.0
+        self._done: dict[str, int] = {}
+
+    def step(self) -> bool:
+        if not self._todo:
+            if time.time() < self._next_at:
+                return False
+            self._todo = list(self._tasks)
+            self._done = {}
+        while self._todo:
+            task = self._todo[0]
+            try:
+                n = self._chunk(task)
+            except sqlite3.OperationalError as e:   # busy: try again next pass
+                logging.warning("Retention %s deferred: %s", task.__name__.lstrip("_"), e)
+                n = 0
+            except Exception:
+                # skip it for this pass so the other tasks still run
+                logging.exception("Retention %s failed", task.__name__.lstrip("_"))
+                n = 0
+            if n:
+                return True
+            self._todo.pop(0)
+        self._next_at = time.time() + self.every
+        if any(self._done.values()):
+            logging.info("Retention pass: %s", ", ".join(f"{k}={v}" for k, v in self._done.items() if v))
+        return False
+
+    def _chunk(self, task) -> int:
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            table, n = task()
+            self.db.execute("COMMIT")
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+        if n:
+            metrics.COMPACTED.labels(table).inc(n)
+            self._done[table] = self._done.get(table, 0) + n
+        return n
+
+    def _rollup_transfers(self) -> tuple[str, int]:
+        cutoff = (datetime.now(timezone.utc) - self.keep_transfers).isoformat()
+        row = self.db.execute("SELECT ts FROM transfers WHERE ts < ? ORDER BY ts LIMIT 1 OFFSET ?",
+                              (cutoff, self.chunk)).fetchone()
+        # ties on the boundary go in with this chunk
+        cond, arg = ("ts <= ?", row[0]) if row else ("ts < ?", cutoff)
+        self.db.execute(f"""INSERT INTO transfer_daily(day, handle, kind, n)
+                            SELECT substr(ts, 1, 10), handle, kind, count(*) FROM transfers WHERE {cond}
+                            GROUP BY 1, 2, 3
+                            ON CONFLICT(day, handle, kind) DO UPDATE SET n = n + excluded.n""", (arg,))
+        return "transfers", self.db.execute(f"DELETE FROM transfers WHERE {cond}", (arg,)).rowcount
+
+    def _prune_tweets(self) -> tuple[str, int]:
+        last = self.last_id()
+        if not last:
+            return "processed_tweets", 0
+        cur = self.db.execute("""DELETE FROM processed_tweets WHERE tweet_id IN (
+                                   SELECT tweet_id FROM processed_tweets WHERE tweet_id < ? ORDER BY tweet_id LIMIT ?)""",
+                              (snowflake_floor(last, self.keep_tweets), self.chunk))
+        return "processed_tweets", cur.rowcount
+
+    def _prune_jobs(self) -> tuple[str, int]:
+        last = self.last_id()
+        if not last:
+            return "jobs", 0
+        # dead jobs stay for the operator
+        cur = self.db.execute("""DELETE FROM jobs WHERE id IN (
+                                   SELECT id FROM jobs WHERE tid < ? AND state = 'done' LIMIT ?)""",
+                              (snowflake_floor(last, self.keep_tweets), self.chunk))
+        return "jobs", cur.rowcount
+
+    def _archive_pending(self) -> tuple[str, int]:
+        cutoff = (datetime.now(timezone.utc) - self.keep_pending).isoformat()
+        ids = [r[0] for r in self.db.execute(
+            "SELECT id FROM pending_blessings WHERE consumed = 1 AND created_at < ? ORDER BY id LIMIT ?",
+            (cutoff, self.chunk))]
+        if not ids:
+            return "pending_blessings", 0
+        marks = ",".join("?" * len(ids))
+        self.db.execute(f"""INSERT OR REPLACE INTO pending_blessings_archive
+                              (id, recipient, amount, sender, origin_tid, created_at, consumed, archived_at)
+                            SELECT id, recipient, amount, sender, origin_tid, created_at, consumed, ?
+                            FROM pending_blessings WHERE id IN ({marks})""",
+                        (datetime.now(timezone.utc).isoformat(), *ids))
+        return "pending_blessings", self.db.execute(f"DELETE FROM pending_blessings WHERE id IN ({marks})", ids).rowcount
@@ -0,0 +1,123 @@
+# rpc.py
+# AsyncWeb3 over one pooled keep-alive HTTP session. Requests awaited together
+# (e.g. through asyncio.gather) are coalesced into a single JSON-RPC batch.
+import json
+import asyncio
+import logging
+import itertools
+import threading
+from collections.abc import Mapping
+
+import aiohttp
+from web3 import AsyncWeb3
+from web3.providers.async_base import AsyncJSONBaseProvider
+
+import metrics
+
+class _Encoder(json.JSONEncoder):
+    """JSON for RPC params: bytes (HexBytes included) as 0x-hex, mappings
+    (AttributeDict) as objects."""
+
+    def default(self, o):
+        if isinstance(o, (bytes, bytearray)):
+            return "0x" + bytes(o).hex()
+        if isinstance(o, Mapping):
+            return dict(o)
+        return super().default(o)
+
+class BatchingHTTPProvider(AsyncJSONBaseProvider):
+    """Queues each request and ships everything queued within `linger`
+    seconds (or `max_batch` requests) as one JSON-RPC batch POST."""
+
+    def __init__(self, url: str, max_batch: int = 50, linger: float = 0.002,
+                 pool_size: int = 8, timeout: float = 30):
+        super().__init__()
+        self.url = url
+        self.max_batch = max_batch
+        self.linger = linger
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._session: aiohttp.ClientSession | None = None
+        self._queued: list[tuple[dict, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._ids = itertools.count()
+
+    def __str__(self) -> str:
+        return f"Batching RPC connection {self.url}"
+
+    async def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Content-Type": "application/json"},
+            )
+        return self._session
+
+    async def make_request(self, method, params):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        req = {"jsonrpc": "2.0", "method": method, "params": params or [], "id": next(self._ids)}
+        self._queued.append((req, fut))
+        if len(self._queued) >= self.max_batch:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.linger, self._dispatch)
+        return await fut
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._queued = self._queued, []
+        if batch:
+            asyncio.ensure_future(self._post(batch))
+
+    async def _post(self, batch: list[tuple[dict, asyncio.Future]]):
+        payload = batch[0][0] if len(batch) == 1 else [req for req, _ in batch]
+        try:
+            sess = await self.session()
+            async with sess.post(self.url, data=json.dumps(payload, cls=_Encoder)) as resp:
+                resp.raise_for_status()
+                data = await resp.json(content_type=None)
+        except Exception as e:
+            for req, fut in batch:
+                metrics.RPC_ERRORS.labels(req["method"]).inc()
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        by_id = {r.get("id"): r for r in (data if isinstance(data, list) else [data])}
+        if len(batch) > 1:
+            logging.debug("RPC batch of %d: %s", len(batch), sorted({req["method"] for req, _ in batch}))
+        for req, fut in batch:
+            if fut.done():
+                continue
+            r = by_id.get(req["id"])
+            if r is None or "error" in r:
+                metrics.RPC_ERRORS.labels(req["method"]).inc()
+            if r is None:
+                fut.set_exception(RuntimeError(f"RPC batch returned no response for {req['method']}"))
+            else:
+                fut.set_result(r)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+class AsyncRPC:
+    """An AsyncWeb3 on a batching provider, driven from its own event-loop
+    thread so synchronous callers can hand it coroutines via `run()`."""
+
+    def __init__(self, url: str, **provider_kw):
+        self.provider = BatchingHTTPProvider(url, **provider_kw)
+        self.w3 = AsyncWeb3(self.provider)
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="rpc", daemon=True)
+        self._thread.start()
+
+    def run(self, coro, timeout: float | None = None):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def close(self):
+        self.run(self.provider.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
@@ -0,0 +1,332 @@
+# storage.py
+# users.db for every process: the bot (mainBase.py and its workers) and the
+# API (webapp.py). One versioned schema, one way to open a connection, the
+# lookups both sides share, and the API's single-writer / pooled-reader
+# access. SQL that runs on the hot path is kept as constant text, so each
+# connection's statement cache prepares it once.
+import os
+import time
+import queue
+import asyncio
+import logging
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import metrics
+
+DB_PATH = os.getenv("DB_PATH", "users.db")
+
+def connect(path: str = DB_PATH, readonly: bool = False) -> sqlite3.Connection:
+    """Autocommit connection (callers BEGIN explicitly) usable from any thread.
+    WAL lets any number of readers run alongside the one writer."""
+    con = sqlite3.connect(path, check_same_thread=False, isolation_level=None, cached_statements=256)
+    con.row_factory = sqlite3.Row
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")     # durable across app crashes; WAL makes this safe
+    con.execute("PRAGMA busy_timeout=5000")
+    con.execute("PRAGMA temp_store=MEMORY")
+    con.execute("PRAGMA cache_size=-16000")      # 16 MB page cache
+    con.execute("PRAGMA mmap_size=268435456")
+    if readonly:
+        con.execute("PRAGMA query_only=ON")
+    return con
+
+# ── SCHEMA ────────────────────────────────────────
+# Each entry upgrades the schema by one version (PRAGMA user_version).
+MIGRATIONS = [
+    # 1: original tables
+    """
+    CREATE TABLE IF NOT EXISTS bindings (
+        handle   TEXT PRIMARY KEY,
+        eth_addr TEXT NOT NULL,
+        bound_at TIMESTAMP NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS transfers (
+        id     INTEGER PRIMARY KEY AUTOINCREMENT,
+        handle TEXT NOT NULL,
+        kind   TEXT CHECK(kind IN ('sent','recv')) NOT NULL,
+        ts     TIMESTAMP NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS pending_blessings (
+      id         INTEGER PRIMARY KEY AUTOINCREMENT,
+      recipient  TEXT NOT NULL,
+      amount     REAL NOT NULL,       -- stored as human token units
+      sender     TEXT NOT NULL,
+      origin_tid INTEGER,
+      created_at TIMESTAMP NOT NULL,
+      consumed   INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS processed_tweets (
+      tweet_id     INTEGER PRIMARY KEY,
+      reason       TEXT,
+      processed_at TIMESTAMP NOT NULL
+    );
+    """,
+    # 2: store handles normalized so lookups can use plain equality, then index them
+    """
+    UPDATE OR IGNORE bindings SET handle = lower(handle) WHERE handle <> lower(handle);
+    DELETE FROM bindings WHERE handle <> lower(handle);
+    UPDATE transfers SET handle = lower(handle) WHERE handle <> lower(handle);
+    UPDATE pending_blessings SET recipient = lower(recipient), sender = lower(sender)
+     WHERE recipient <> lower(recipient) OR sender <> lower(sender);
+    CREATE INDEX IF NOT EXISTS idx_transfers_handle_kind_ts ON transfers(handle, kind, ts);
+    CREATE INDEX IF NOT EXISTS idx_pending_open ON pending_blessings(recipient, created_at) WHERE consumed = 0;
+    """,
+    # 3: time-ordered scans of transfers (rate-limit hydration)
+    """
+    CREATE INDEX IF NOT EXISTS idx_transfers_ts ON transfers(ts);
+    """,
+    # 4: durable job queue for the worker roles (jobs.py)
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+      id          INTEGER PRIMARY KEY AUTOINCREMENT,
+      kind        TEXT NOT NULL,              -- 'payout' | 'reply'
+      key         TEXT NOT NULL,
+      tid         INTEGER,                    -- the mention this job answers
+      payload     TEXT NOT NULL,              -- JSON
+      holds       TEXT,                       -- JSON [[handle, kind], ...] rate-limit slots claimed
+      state       TEXT NOT NULL DEFAULT 'ready' CHECK(state IN ('ready','leased','done','dead')),
+      attempts    INTEGER NOT NULL DEFAULT 0,
+      run_at      REAL NOT NULL,
+      lease_owner TEXT,
+      lease_until REAL,
+      last_error  TEXT,
+      result      TEXT,                       -- JSON; for payouts the signed tx, written before broadcast
+      created_at  REAL NOT NULL,
+      updated_at  REAL NOT NULL,
+      UNIQUE(kind, key)
+    );
+    CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs(kind, run_at) WHERE state IN ('ready','leased');
+    CREATE INDEX IF NOT EXISTS idx_jobs_tid ON jobs(tid);
+    """,
+    # 5: payout ledger and the on-chain Transfer mirror it is reconciled against (indexer.py)
+    """
+    CREATE TABLE IF NOT EXISTS payouts (
+      id         INTEGER PRIMARY KEY AUTOINCREMENT,
+      tx_hash    TEXT NOT NULL,
+      tid        INTEGER,
+      kind       TEXT NOT NULL,     -- bind_reward | bind_pending | bless
+      to_addr    TEXT NOT NULL,     -- lowercase
+      amount     TEXT NOT NULL,     -- token base units
+      pending_id INTEGER,
+      sent_at    REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_payouts_tx ON payouts(tx_hash, to_addr);
+    CREATE INDEX IF NOT EXISTS idx_payouts_pending ON payouts(pending_id) WHERE pending_id IS NOT NULL;
+    CREATE TABLE IF NOT EXISTS chain_transfers (
+      tx_hash      TEXT NOT NULL,
+      log_index    INTEGER NOT NULL,
+      block_number INTEGER NOT NULL,
+      ts           INTEGER NOT NULL,
+      token        TEXT NOT NULL,
+      from_addr    TEXT NOT NULL,
+      to_addr      TEXT NOT NULL,
+      amount       TEXT NOT NULL,   -- token base units
+      PRIMARY KEY (tx_hash, log_index)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_chain_transfers_to ON chain_transfers(to_addr, block_number);
+    CREATE INDEX IF NOT EXISTS idx_chain_transfers_ts ON chain_transfers(ts);
+    CREATE TABLE IF NOT EXISTS index_state (
+      name  TEXT PRIMARY KEY,
+      block INTEGER NOT NULL,       -- last block fully indexed
+      ts    INTEGER NOT NULL        -- its timestamp
+    );
+    """,
+    # 6: retention (retention.py): daily rollup of old transfers, archive of consumed pendings
+    """
+    CREATE TABLE IF NOT EXISTS transfer_daily (
+      day    TEXT NOT NULL,           -- UTC, YYYY-MM-DD
+      handle TEXT NOT NULL,
+      kind   TEXT NOT NULL,
+      n      INTEGER NOT NULL,
+      PRIMARY KEY (day, handle, kind)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS pending_blessings_archive (
+      id          INTEGER PRIMARY KEY,
+      recipient   TEXT NOT NULL,
+      amount      REAL NOT NULL,
+      sender      TEXT NOT NULL,
+      origin_tid  INTEGER,
+      created_at  TIMESTAMP NOT NULL,
+      consumed    INTEGER NOT NULL,
+      archived_at TIMESTAMP NOT NULL
+    );
+    """,
+    # 7: the API's client-logged transfers get their own table; they used to be
+    #    created as `transfers` too, which clashed with the bot's (see _adopt_legacy)
+    """
+    DROP INDEX IF EXISTS idx_transfers_ts_hash;
+    DROP INDEX IF EXISTS idx_transfers_from_ts;
+    DROP INDEX IF EXISTS idx_transfers_to_ts;
+    DROP INDEX IF EXISTS idx_transfers_token_ts;
+    CREATE TABLE IF NOT EXISTS wallet_transfers (
+      hash      TEXT PRIMARY KEY,
+      from_addr TEXT, to_addr TEXT, token TEXT, amount TEXT,
+      memo      TEXT, chain_id INTEGER, ts INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS idx_wallet_transfers_ts_hash ON wallet_transfers(ts, hash);
+    CREATE INDEX IF NOT EXISTS idx_wallet_transfers_from_ts ON wallet_transfers(from_addr COLLATE NOCASE, ts);
+    CREATE INDEX IF NOT EXISTS idx_wallet_transfers_to_ts ON wallet_transfers(to_addr COLLATE NOCASE, ts);
+    CREATE INDEX IF NOT EXISTS idx_wallet_transfers_token_ts ON wallet_transfers(token, ts);
+    CREATE INDEX IF NOT EXISTS idx_payouts_to ON payouts(to_addr, sent_at);
+    """,
+    # 8: /activity?address= walks the from and to sides in (ts, hash) order,
+    #    so the per-address indexes carry the full keyset
+    """
+    DROP INDEX IF EXISTS idx_wallet_transfers_from_ts;
+    DROP INDEX IF EXISTS idx_wallet_transfers_to_ts;
+    CREATE INDEX IF NOT EXISTS idx_wallet_transfers_from_ts_hash ON wallet_transfers(from_addr COLLATE NOCASE, ts, hash);
+    CREATE INDEX IF NOT EXISTS idx_wallet_transfers_to_ts_hash ON wallet_transfers(to_addr COLLATE NOCASE, ts, hash);
+    """,
+]
+
+def _columns(db: sqlite3.Connection, table: str) -> set[str]:
+    return {r[1] for r in db.execute(f"PRAGMA table_info({table})")}
+
+def _adopt_legacy(db: sqlite3.Connection):
+    """Before v7 the API created its own `transfers` (hash, from_addr, ...)
+    and whichever process started first owned the name. Move the API's
+    table out of the way so the migrations can create the bot's."""
+    cols = _columns(db, "transfers")
+    if "hash" in cols and "handle" not in cols and not _columns(db, "wallet_transfers"):
+        db.execute("ALTER TABLE transfers RENAME TO wallet_transfers")
+        logging.warning("Renamed the API's transfers table to wallet_transfers")
+
+def migrate(db: sqlite3.Connection):
+    """Bring the schema up to date. Safe to race from several processes:
+    each step re-checks the version and every script is idempotent."""
+    if db.execute("PRAGMA user_version").fetchone()[0] >= len(MIGRATIONS):
+        return
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        _adopt_legacy(db)
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+    for v, script in enumerate(MIGRATIONS, start=1):
+        if db.execute("PRAGMA user_version").fetchone()[0] >= v:
+            continue
+        db.executescript(f"BEGIN IMMEDIATE;\n{script}\nPRAGMA user_version = {v};\nCOMMIT;")
+        logging.info("Migrated schema to v%d", v)
+
+# ── SHARED LOOKUPS ────────────────────────────────
+SQL_BINDING      = "SELECT eth_addr FROM bindings WHERE handle=?"
+SQL_OPEN_PENDING = """SELECT * FROM pending_blessings
+                      WHERE recipient=? AND consumed=0
+                      ORDER BY created_at ASC LIMIT 1"""
+SQL_PAYOUTS_TO   = """SELECT p.tx_hash, p.tid, p.kind, p.amount, p.sent_at, c.block_number
+                      FROM payouts p
+                      LEFT JOIN chain_transfers c ON c.tx_hash = p.tx_hash AND c.to_addr = p.to_addr
+                      WHERE p.to_addr=? ORDER BY p.sent_at DESC LIMIT ?"""
+
+def binding(con: sqlite3.Connection, handle: str) -> str | None:
+    """`handle` must already be normalized (lowercase, no @)."""
+    row = con.execute(SQL_BINDING, (handle,)).fetchone()
+    return row[0] if row else None
+
+def open_pending(con: sqlite3.Connection, recipient: str) -> sqlite3.Row | None:
+    return con.execute(SQL_OPEN_PENDING, (recipient,)).fetchone()
+
+def handle_state(con: sqlite3.Connection, handle: str, limit: int = 20) -> dict:
+    """What the bot knows about one (normalized) handle: its wallet, the
+    blessing waiting for it and its latest payouts (`block` is set once the
+    indexer has seen the transfer on chain)."""
+    addr = binding(con, handle)
+    pending = open_pending(con, handle)
+    payouts = con.execute(SQL_PAYOUTS_TO, (addr.lower(), limit)).fetchall() if addr else []
+    return {
+        "handle": handle,
+        "address": addr,
+        "pending": dict(pending) if pending else None,
+        "payouts": [{"tx": r["tx_hash"], "tweet": r["tid"], "kind": r["kind"], "amount": r["amount"],
+                     "sent_at": r["sent_at"], "block": r["block_number"]} for r in payouts],
+    }
+
+# ── API ACCESS ────────────────────────────────────
+class Database:
+    """SQLite access for the API without tying up FastAPI's threadpool.
+
+    Reads run on a small dedicated pool, one connection per pool thread.
+    Writes are queued to a single writer thread that commits everything
+    waiting in the queue as one transaction (group commit), each request in
+    its own savepoint so one bad write doesn't sink its neighbours.
+    """
+
+    def __init__(self, path: str, readers: int = 4):
+        self.path = path
+        self._local = threading.local()
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-read")
+        self._writes: queue.Queue = queue.Queue()
+        self._writer: threading.Thread | None = None
+
+    def open(self):
+        con = connect(self.path)
+        migrate(con)
+        self._writer = threading.Thread(target=self._write_loop, args=(con,), name="db-write", daemon=True)
+        self._writer.start()
+
+    def close(self):
+        self._writes.put(None)
+        if self._writer is not None:
+            self._writer.join(timeout=5)
+        self._readers.shutdown(wait=False)
+
+    def _reader(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._local.con = connect(self.path, readonly=True)
+        return con
+
+    async def read(self, fn):
+        """Run fn(conn) on a pooled read connection."""
+        def run():
+            with metrics.timed("db_read"):
+                return fn(self._reader())
+        return await asyncio.get_running_loop().run_in_executor(self._readers, run)
+
+    async def write(self, fn):
+        """Run fn(conn) on the writer thread inside the next group commit."""
+        fut: Future = Future()
+        self._writes.put((fn, fut))
+        return await asyncio.wrap_future(fut)
+
+    def _write_loop(self, con: sqlite3.Connection):
+        while True:
+            item = self._writes.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < 256:
+                try:
+                    nxt = self._writes.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._writes.put(None)
+                    break
+                batch.append(nxt)
+            results = []
+            t0 = time.perf_counter()
+            try:
+                con.execute("BEGIN IMMEDIATE")
+                for fn, _ in batch:
+                    con.execute("SAVEPOINT w")
+                    try:
+                        results.append((fn(con), None))
+                        con.execute("RELEASE w")
+                    except Exception as e:
+                        con.execute("ROLLBACK TO w")
+                        con.execute("RELEASE w")
+                        results.append((None, e))
+                con.execute("COMMIT")
+            except Exception as e:
+                logging.exception("Group commit of %d writes failed", len(batch))
+                if con.in_transaction:
+                    con.execute("ROLLBACK")
+                results = [(None, e)] * len(batch)
+            metrics.observe("db_write", time.perf_counter() - t0)
+            for (_, fut), (res, err) in zip(batch, results):
+                fut.set_exception(err) if err is not None else fut.set_result(res)
+        con.close()
@@ -0,0 +1,8 @@
+# tests/conftest.py
+# The bot's modules live at the repo root; run the suite from there:
+#   pip install -r requirements.txt -r bench/requirements.txt pytest
+#   python -m pytest tests
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
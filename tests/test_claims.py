@@ -0,0 +1,66 @@
+# tests/test_claims.py
+# A tweet whose payout is queued or in flight is not planned again: not when
+# the same window is re-scraped, and not after a restart forgets PAYOUTS.
+from concurrent.futures import Future
+
+import pytest
+
+import storage
+import mainBase as bot
+
+BOB = "0x" + "bb" * 20
+MENTIONS = [{"id": 11, "handle": "alice", "text": "@cikbot bless @bob"},
+            {"id": 12, "handle": "dave", "text": f"@cikbot bind me 0x{'dd' * 20}"}]
+
+@pytest.fixture
+def loop(tmp_path, monkeypatch):
+    con = storage.connect(str(tmp_path / "users.db"))
+    storage.migrate(con)
+    con.execute("INSERT INTO bindings(handle, eth_addr, bound_at) VALUES('bob', ?, '2026-01-01')", (BOB,))
+    monkeypatch.setattr(bot, "conn", con)
+    monkeypatch.setattr(bot, "c", con.cursor())
+    monkeypatch.setattr(bot, "LIMITS", bot.RateLimiter(bot.RATE_WINDOW))
+    monkeypatch.setattr(bot, "PAYOUTS", bot.PayoutBatcher(0, 100))
+    monkeypatch.setattr(bot, "JOBS", None)
+    monkeypatch.setattr(bot, "LAST_ID_FILE", str(tmp_path / "last_id.txt"))
+    monkeypatch.setattr(bot, "TOKEN_DECIMALS", 18)
+    monkeypatch.setattr(bot, "TOKEN_SYMBOL", "CIK")
+    sent, replies = [], []
+    monkeypatch.setattr(bot, "send_many", lambda pairs: [sent.append(to) or ("0x" + "ab" * 32, Future()) for to, _ in pairs])
+    monkeypatch.setattr(bot.REPLIES, "submit", lambda tid, handle, msg, images, reason: replies.append((tid, reason)))
+    yield con, sent, replies
+    con.close()
+
+def claims(con) -> dict:
+    return dict(con.execute("SELECT tweet_id, reason FROM processed_tweets").fetchall())
+
+def test_rescrape_skips_payouts_in_flight(loop):
+    con, sent, replies = loop
+    bot.process(MENTIONS, 0, complete=False)
+    assert len(sent) == 2 and replies == []
+    assert claims(con) == {11: bot.PAYOUT_CLAIM, 12: bot.PAYOUT_CLAIM}
+
+    bot.process(MENTIONS, 0)
+    assert len(sent) == 2 and replies == []
+
+def test_restart_does_not_pay_a_claimed_tweet_again(loop, monkeypatch):
+    con, sent, replies = loop
+    bot.process(MENTIONS, 0)
+    monkeypatch.setattr(bot, "PAYOUTS", bot.PayoutBatcher(0, 100))   # the process died with both in flight
+
+    bot.process(MENTIONS, 0)
+    assert len(sent) == 2 and replies == []
+
+def test_settled_reply_replaces_the_claim(loop):
+    con, sent, replies = loop
+    bot.process(MENTIONS, 0)
+    for _, (_, fut) in bot.PAYOUTS.inflight:
+        fut.set_result({"status": 1})
+    bot.settle_payouts()
+    assert sorted(replies) == [(11, "bless_sent"), (12, "bind_reward")]
+
+    with bot.transaction():
+        for tid, reason in replies:
+            bot.mark_processed(tid, reason)
+        bot.mark_processed(11, "sender_rate_limit")   # a later mark never overwrites a final one
+    assert claims(con) == {11: "bless_sent", 12: "bind_reward"}
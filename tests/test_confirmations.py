@@ -0,0 +1,57 @@
+# tests/test_confirmations.py
+# ConfirmationTracker._tick against a canned node, for what a tx tracked
+# while a tick is awaiting the node does to that tick.
+import asyncio
+
+import pytest
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+import mainBase as bot
+
+class Lane:
+    def __init__(self, address: str):
+        self.address = address
+        self.stalled = False
+        self.nonces = type("Nonces", (), {"settle": lambda self, n: None})()
+
+class CannedEth:
+    def __init__(self, on_head=None):
+        self.on_head = on_head   # runs while get_block is awaited
+
+    async def get_block(self, _):
+        await asyncio.sleep(0)
+        if self.on_head:
+            self.on_head()
+        return {"number": 7, "baseFeePerGas": 10**9}
+
+    async def get_transaction_count(self, address, _):
+        return 0
+
+    async def get_transaction_receipt(self, tx_hash):
+        raise TransactionNotFound(tx_hash)
+
+class Fees:
+    def needs_tip(self, number):
+        return False
+
+    def note_head(self, number, base, tip):
+        pass
+
+@pytest.fixture
+def tracker(monkeypatch):
+    monkeypatch.setattr(bot, "FEES", Fees())
+    monkeypatch.setattr(bot, "TransactionNotFound", TransactionNotFound)
+    monkeypatch.setattr(bot, "w3", Web3)   # _Tracked only needs to_hex
+    rpc = type("RPC", (), {"w3": type("AW3", (), {"eth": CannedEth()})})()
+    return bot.ConfirmationTracker(rpc, confirmations=1, poll=0.1, stall=60, timeout=600)
+
+def test_tx_tracked_mid_tick_on_a_new_lane(tracker):
+    a = bot._Tracked(b"\xaa" * 32, 0, b"", Lane("0x" + "01" * 20))
+    b = bot._Tracked(b"\xbb" * 32, 0, b"", Lane("0x" + "02" * 20))
+    tracker._txs[a.tx_hex] = a
+    tracker.rpc.w3.eth.on_head = lambda: tracker._txs.setdefault(b.tx_hex, b)
+
+    asyncio.run(tracker._tick())
+    assert set(tracker._txs) == {a.tx_hex, b.tx_hex}
+    assert not a.future.done() and not b.future.done()
@@ -0,0 +1,118 @@
+# tests/test_indexer.py
+# TransferIndexer against a canned chain: a batched payout lands as the
+# funder's pull into the disperse contract plus one leg per recipient, and
+# reconciles cleanly with the ledger rows the bot wrote for it; retention's
+# archive of consumed pending blessings stays in the reconcile.
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+import storage
+from indexer import TRANSFER_TOPIC, TransferIndexer, _topic
+from retention import Compactor
+
+TOKEN    = "0x" + "70" * 20
+FUNDER   = "0x" + "f0" * 20
+DISPERSE = "0x" + "d0" * 20
+STRANGER = "0x" + "5e" * 20
+R1, R2, R3 = ("0x" + c * 20 for c in ("a1", "a2", "a3"))
+BATCH, OTHER = "0x" + "aa" * 32, "0x" + "bb" * 32
+TS = 1_700_000_000
+
+class CannedEth:
+    """The slice of AsyncWeb3.eth the indexer uses; get_logs applies the topic filter."""
+
+    def __init__(self, head: int, logs: list[dict], senders: dict[str, str]):
+        self.head = head
+        self.logs = logs
+        self.senders = senders
+        self.filters: list = []
+
+    @property
+    async def block_number(self) -> int:
+        return self.head
+
+    async def get_logs(self, params: dict) -> list[dict]:
+        self.filters.append(params)
+        topic0, froms = params["topics"]
+        return [l for l in self.logs if params["fromBlock"] <= l["blockNumber"] <= params["toBlock"]
+                and l["topics"][0] == topic0 and l["topics"][1] in froms]
+
+    async def get_block(self, n: int) -> dict:
+        return {"number": n, "timestamp": TS + n}
+
+    async def get_transaction(self, h: str) -> dict:
+        return {"hash": h, "from": self.senders[h]}
+
+class CannedRPC:
+    def __init__(self, eth: CannedEth):
+        self.w3 = type("W3", (), {"eth": eth, "to_checksum_address": staticmethod(lambda a: a)})
+
+    def run(self, coro):
+        return asyncio.run(coro)
+
+def transfer(tx: str, index: int, frm: str, to: str, amount: int, block: int = 5) -> dict:
+    return {"transactionHash": tx, "logIndex": index, "blockNumber": block, "removed": False,
+            "topics": [TRANSFER_TOPIC, _topic(frm), _topic(to)], "data": hex(amount)}
+
+@pytest.fixture
+def db(tmp_path):
+    con = storage.connect(str(tmp_path / "index.db"))
+    storage.migrate(con)
+    yield con
+    con.close()
+
+def payout(db, tx: str, tid: int, to: str, amount: int):
+    db.execute("INSERT INTO payouts(tx_hash,tid,kind,to_addr,amount,sent_at) VALUES(?,?,'bless',?,?,?)",
+               (tx, tid, to, str(amount), TS))
+
+def test_disperse_payout_reconciles_cleanly(db):
+    eth = CannedEth(head=8, senders={BATCH: FUNDER, OTHER: STRANGER}, logs=[
+        transfer(BATCH, 0, FUNDER, DISPERSE, 30),
+        transfer(BATCH, 1, DISPERSE, R1, 10),
+        transfer(BATCH, 2, DISPERSE, R2, 20),
+        # someone else's batch through the same contract is not ours
+        transfer(OTHER, 0, STRANGER, DISPERSE, 5, block=6),
+        transfer(OTHER, 1, DISPERSE, R3, 5, block=6),
+    ])
+    idx = TransferIndexer(db, CannedRPC(eth), TOKEN, [FUNDER], relays=[DISPERSE], confirmations=1, start_block=0)
+    payout(db, BATCH, 1, R1, 10)
+    payout(db, BATCH, 2, R2, 20)
+
+    assert idx.catch_up() == 3
+    assert eth.filters[0]["topics"][1] == [_topic(FUNDER), _topic(DISPERSE)]
+    got = db.execute("SELECT tx_hash, from_addr, to_addr, amount FROM chain_transfers ORDER BY log_index").fetchall()
+    assert [tuple(r) for r in got] == [(BATCH, FUNDER, DISPERSE, "30"), (BATCH, DISPERSE, R1, "10"),
+                                       (BATCH, DISPERSE, R2, "20")]
+    assert idx.reconcile(grace=0) == {"missing": [], "unrecorded": [], "duplicate": [], "pending_unpaid": []}
+
+def test_without_relays_a_disperse_payout_looks_missing(db):
+    eth = CannedEth(head=8, senders={BATCH: FUNDER}, logs=[
+        transfer(BATCH, 0, FUNDER, DISPERSE, 10),
+        transfer(BATCH, 1, DISPERSE, R1, 10),
+    ])
+    idx = TransferIndexer(db, CannedRPC(eth), TOKEN, [FUNDER], confirmations=1, start_block=0)
+    payout(db, BATCH, 1, R1, 10)
+
+    idx.catch_up()
+    out = idx.reconcile(grace=0)
+    assert [r["to_addr"] for r in out["missing"]] == [R1]
+    assert [r["to_addr"] for r in out["unrecorded"]] == [DISPERSE]
+
+def test_archived_pending_still_reconciles(db):
+    eth = CannedEth(head=8, senders={}, logs=[])
+    idx = TransferIndexer(db, CannedRPC(eth), TOKEN, [FUNDER], confirmations=1, start_block=0)
+    payout(db, BATCH, 1, R1, 10)
+    created = datetime.fromtimestamp(TS + 60, timezone.utc).isoformat()
+    db.execute("INSERT INTO pending_blessings(recipient, amount, sender, created_at, consumed) VALUES('bob', 1, 'al', ?, 1)",
+               (created,))
+    idx.catch_up()
+    [unpaid] = idx.reconcile(grace=0)["pending_unpaid"]
+
+    retention = Compactor(db, lambda: 0, keep_transfers=timedelta(days=7), keep_tweets=timedelta(days=7),
+                          keep_pending=timedelta(0))
+    while retention.step():
+        pass
+    assert db.execute("SELECT count(*) FROM pending_blessings").fetchone()[0] == 0
+    assert [tuple(r) for r in idx.reconcile(grace=0)["pending_unpaid"]] == [tuple(unpaid)]
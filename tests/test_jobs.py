@@ -0,0 +1,166 @@
+# tests/test_jobs.py
+# The exactly-once claim of the payout workers: JobQueue leases and
+# lease-guarded writes, and a retried payout settling against its
+# checkpointed tx (on eth-tester) instead of signing a new one.
+import time
+import asyncio
+
+import pytest
+from eth_account import Account
+from web3 import AsyncWeb3
+from web3.exceptions import TransactionNotFound
+from web3.providers.eth_tester import AsyncEthereumTesterProvider
+
+import storage
+import mainBase as bot
+from jobs import JobQueue
+
+LEASE = 0.05
+
+@pytest.fixture
+def db(tmp_path):
+    con = storage.connect(str(tmp_path / "jobs.db"))
+    storage.migrate(con)
+    yield con
+    con.close()
+
+def queues(db, **kw):
+    return JobQueue(db, "a", lease_secs=LEASE, **kw), JobQueue(db, "b", lease_secs=LEASE, **kw)
+
+def state(db, job) -> tuple:
+    return tuple(db.execute("SELECT state, lease_owner, attempts, result FROM jobs WHERE id=?", (job.id,)).fetchone())
+
+def test_enqueue_is_idempotent(db):
+    a, _ = queues(db)
+    assert a.enqueue("payout", "1:bless", {"n": 1})
+    assert not a.enqueue("payout", "1:bless", {"n": 2})
+    [job] = a.lease("payout", 10)
+    assert job.payload == {"n": 1}
+
+def test_live_lease_is_exclusive_until_it_expires(db):
+    a, b = queues(db)
+    a.enqueue("payout", "1:bless", {})
+    [job] = a.lease("payout", 10)
+    assert b.lease("payout", 10) == []
+    time.sleep(LEASE * 2)
+    [taken] = b.lease("payout", 10)
+    assert (taken.id, taken.attempts) == (job.id, 2)
+    assert state(db, job)[:2] == ("leased", "b")
+
+def test_lost_lease_refuses_every_write(db):
+    a, b = queues(db)
+    a.enqueue("payout", "1:bless", {})
+    [mine] = a.lease("payout", 10)
+    time.sleep(LEASE * 2)
+    [theirs] = b.lease("payout", 10)
+    assert b.checkpoint(theirs, {"hash": "0xb"})
+
+    assert not a.checkpoint(mine, {"hash": "0xa"})
+    assert not a.complete(mine, {"sent": "0xa"})
+    assert not a.fail(mine, "late")
+    assert state(db, mine) == ("leased", "b", 2, '{"hash": "0xb"}')
+
+def test_takeover_sees_the_checkpoint(db):
+    a, b = queues(db)
+    a.enqueue("payout", "1:bless", {})
+    [job] = a.lease("payout", 10)
+    assert a.checkpoint(job, {"hash": "0xa", "nonce": 7})
+    time.sleep(LEASE * 2)
+    [again] = b.lease("payout", 10)
+    assert again.result == {"hash": "0xa", "nonce": 7}
+
+def test_fail_retries_then_dead_letters(db):
+    a, _ = queues(db, max_attempts=2, backoff=0)
+    a.enqueue("payout", "1:bless", {})
+    [job] = a.lease("payout", 10)
+    assert not a.last_attempt(job)
+    assert not a.fail(job, "boom")
+    assert state(db, job)[0] == "ready"
+    [job] = a.lease("payout", 10)
+    assert a.last_attempt(job)
+    assert a.fail(job, "boom")
+    assert state(db, job)[0] == "dead"
+    assert a.lease("payout", 10) == []
+
+# ── checkpointed txs on a local chain ─────────────
+class Chain:
+    def __init__(self):
+        self.provider = AsyncEthereumTesterProvider()
+        self.tester = self.provider.ethereum_tester
+        self.w3 = AsyncWeb3(self.provider)
+        self.key = self.tester.backend.account_keys[0]
+        self.sender = Account.from_key(self.key).address
+
+    def sign(self, nonce: int, value: int = 1) -> dict:
+        signed = Account.sign_transaction({"to": "0x" + "22" * 20, "value": value, "gas": 21_000, "nonce": nonce,
+                                           "chainId": 131277322940537, "maxFeePerGas": 10**10,
+                                           "maxPriorityFeePerGas": 10**9}, self.key)
+        return {"from": self.sender, "nonce": nonce, "raw": signed.rawTransaction.hex(), "hash": signed.hash.hex()}
+
+    async def send(self, r: dict):
+        await self.w3.eth.send_raw_transaction(r["raw"])
+
+    async def sent_count(self) -> int:
+        return await self.w3.eth.get_transaction_count(self.sender, "latest")
+
+@pytest.fixture
+def chain(monkeypatch):
+    c = Chain()
+
+    class RPC:
+        w3 = c.w3
+
+    monkeypatch.setattr(bot, "RPC", RPC)
+    monkeypatch.setattr(bot, "TransactionNotFound", TransactionNotFound)
+    return c
+
+def test_resume_adopts_a_mined_checkpoint(chain):
+    async def go():
+        r = chain.sign(0)
+        await chain.send(r)
+        return r, await bot._resume_payout(r), await chain.sent_count()
+
+    r, res, n = asyncio.run(go())
+    assert res == r["hash"]
+    assert n == 1   # nothing new was signed or sent
+
+def test_resume_rebroadcasts_the_checkpointed_tx(chain):
+    # crashed between checkpoint and broadcast: the same signed bytes go out
+    async def go():
+        r = chain.sign(0)
+        res = await bot._resume_payout(r)
+        tx = await chain.w3.eth.get_transaction(r["hash"])
+        return r, res, tx, await chain.sent_count()
+
+    r, res, tx, n = asyncio.run(go())
+    assert res == r["hash"]
+    assert tx["hash"].hex() == r["hash"] and n == 1
+
+def test_resume_adopts_a_pending_checkpoint(chain):
+    chain.tester.disable_auto_mine_transactions()
+
+    async def go():
+        r = chain.sign(0)
+        await chain.send(r)
+        return r, await bot._resume_payout(r)
+
+    r, res = asyncio.run(go())
+    assert res == r["hash"]
+
+def test_resume_signs_afresh_when_the_nonce_went_elsewhere(chain):
+    async def go():
+        await chain.send(chain.sign(0, value=2))   # e.g. a gap fill took the nonce
+        return await bot._resume_payout(chain.sign(0))
+
+    assert asyncio.run(go()) is None
+
+def test_last_look_before_dead_lettering(chain):
+    async def go():
+        mined = chain.sign(0)
+        await chain.send(mined)
+        replaced = chain.sign(1)
+        await chain.send(chain.sign(1, value=3))
+        unsent = chain.sign(2)                      # nonce still free: it can still mine
+        return [await bot._last_look(r) for r in (mined, replaced, unsent)]
+
+    assert asyncio.run(go()) == ["mined", "dead", "unknown"]
@@ -0,0 +1,78 @@
+# tests/test_planner.py
+# Planner.classify, table-driven. The store lookups are swapped for a small
+# in-memory world, so each case is just mentions in, decisions out.
+import pytest
+
+import mainBase as bot
+
+A = "0x" + "aa" * 20
+B = "0x" + "bb" * 20
+
+def outcome(a) -> str | None:
+    if a is None:
+        return None
+    if isinstance(a, bot.Reject):
+        return a.reason
+    if isinstance(a, bot.Bind):
+        return "bind_bare" if a.bare else "bind"
+    return type(a).__name__.lower()
+
+CASES = [
+    # (case, world, [(handle, text)], expected outcomes)
+    ("self bless", {}, [("Alice", "@cikbot bless @alice")], ["self_bless_block"]),
+    ("bless a bound target", {"bound": {"bob": B}}, [("alice", "@cikbot bless @bob")], ["bless"]),
+    ("sender limited in the store", {"bound": {"bob": B}, "limited": {("alice", "sent")}},
+     [("alice", "@cikbot bless @bob")], ["sender_rate_limit"]),
+    ("recipient limited in the store", {"bound": {"bob": B}, "limited": {("bob", "recv")}},
+     [("alice", "@cikbot bless @bob")], ["recipient_rate_limit"]),
+    ("sender limit carried forward", {"bound": {"bob": B, "carl": A}},
+     [("alice", "@cikbot bless @bob"), ("alice", "@cikbot bless @carl")], ["bless", "sender_rate_limit"]),
+    ("recipient limit carried forward", {"bound": {"bob": B}},
+     [("alice", "@cikbot bless @bob"), ("carl", "@cikbot bless @bob")], ["bless", "recipient_rate_limit"]),
+    ("enqueue also claims the sender", {"bound": {"bob": B}},
+     [("alice", "@cikbot bless @dave"), ("alice", "@cikbot bless @bob")], ["enqueue", "sender_rate_limit"]),
+    ("pending carried forward", {},
+     [("alice", "@cikbot bless @dave"), ("carl", "@cikbot bless @dave")], ["enqueue", "needs_bind_existing_pending"]),
+    ("bare address without a pending", {}, [("dave", A)], ["bind_instructions"]),
+    ("bare address with a stored pending", {"pending": {"dave"}}, [("dave", A)], ["bind_bare"]),
+    ("bare address after a pending in the same batch", {},
+     [("alice", "@cikbot bless @dave"), ("dave", A)], ["enqueue", "bind_bare"]),
+    ("bare address while bound", {"bound": {"dave": B}, "pending": {"dave"}}, [("dave", A)], ["already_bound_bare"]),
+    ("explicit bind", {}, [("dave", f"@cikbot bind me {A}")], ["bind"]),
+    ("already bound, same address", {"bound": {"dave": A.upper().replace("0X", "0x")}},
+     [("dave", f"@cikbot bind me {A}")], ["already_bound_same"]),
+    ("already bound, different address", {"bound": {"dave": B}},
+     [("dave", f"@cikbot bind me {A}")], ["already_bound_diff"]),
+    ("bind carried forward", {},
+     [("dave", f"bind me {A}"), ("dave", f"bind me {A}"), ("dave", f"bind me {B}")],
+     ["bind", "already_bound_same", "already_bound_diff"]),
+    ("a bind claims the recv slot", {},
+     [("dave", f"bind me {A}"), ("alice", "@cikbot bless @dave")], ["bind", "recipient_rate_limit"]),
+    ("claimed holds from workers", {"bound": {"bob": B}, "claimed": {("bob", "recv")}},
+     [("alice", "@cikbot bless @bob")], ["recipient_rate_limit"]),
+    ("processed tweets are skipped", {"processed": {1}}, [("alice", "@cikbot bless @alice")], [None]),
+    ("no command", {}, [("alice", "gm @cikbot")], [None]),
+]
+
+@pytest.fixture
+def world(monkeypatch):
+    w = {"bound": {}, "pending": set(), "limited": set(), "processed": set(), "claimed": set()}
+    monkeypatch.setattr(bot, "was_processed", lambda tid: tid in w["processed"])
+    monkeypatch.setattr(bot, "get_binding", lambda hn: w["bound"].get(hn))
+    monkeypatch.setattr(bot, "has_unconsumed_pending", lambda hn: hn in w["pending"])
+    monkeypatch.setattr(bot, "can_do", lambda hn, kind: (hn, kind) not in w["limited"])
+    return w
+
+@pytest.mark.parametrize("case, state, mentions, expected", CASES, ids=[c[0] for c in CASES])
+def test_classify(world, case, state, mentions, expected):
+    world.update(state)
+    planner = bot.Planner(world["claimed"])
+    got = [outcome(planner.classify({"id": i, "handle": h, "text": t})) for i, (h, t) in enumerate(mentions, 1)]
+    assert got == expected
+
+def test_bless_carries_the_target_binding(world):
+    planner = bot.Planner()
+    planner.bound["bob"] = B
+    a = planner.classify({"id": 1, "handle": "Alice", "text": "@cikbot bless @Bob"})
+    assert a == bot.Bless(1, "Alice", "alice", "bob", "bob", B)
+    assert planner.claimed == {("alice", "sent"), ("bob", "recv")}
@@ -0,0 +1,116 @@
+# tests/test_rpc.py
+# BatchingHTTPProvider against a stand-in JSON-RPC server (aiohttp) that
+# answers batches in reverse order and fails chosen methods per item.
+import asyncio
+
+from aiohttp import web
+from web3 import AsyncWeb3
+
+from rpc import BatchingHTTPProvider
+
+BAD = "0x" + "ee" * 20
+
+class StubNode:
+    def __init__(self, drop: set[str] = frozenset()):
+        self.posts: list = []
+        self.drop = drop   # methods left out of the batch reply
+
+    def answer(self, req: dict) -> dict | None:
+        method, params = req["method"], req["params"]
+        if method in self.drop:
+            return None
+        if method == "eth_getBalance" and params[0].lower() == BAD:
+            return {"jsonrpc": "2.0", "id": req["id"], "error": {"code": -32000, "message": "no balance for you"}}
+        result = {"eth_chainId": "0x2105", "eth_blockNumber": "0x10", "eth_getBalance": "0x64",
+                  "eth_sendRawTransaction": "0x" + "ab" * 32}[method]
+        return {"jsonrpc": "2.0", "id": req["id"], "result": result}
+
+    async def handle(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.posts.append(body)
+        if isinstance(body, dict):
+            return web.json_response(self.answer(body))
+        out = [r for r in map(self.answer, body) if r is not None]
+        return web.json_response(out[::-1])
+
+async def _with_node(node: StubNode, fn):
+    app = web.Application()
+    app.router.add_post("/", node.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    provider = BatchingHTTPProvider(f"http://{host}:{port}/", linger=0.01)
+    try:
+        return await fn(AsyncWeb3(provider))
+    finally:
+        await provider.close()
+        await runner.cleanup()
+
+def run(node: StubNode, fn):
+    return asyncio.run(_with_node(node, fn))
+
+def test_gathered_requests_share_one_batch():
+    node = StubNode()
+
+    async def go(w3):
+        return await asyncio.gather(w3.eth.chain_id, w3.eth.block_number,
+                                    w3.eth.get_balance("0x" + "11" * 20))
+
+    assert run(node, go) == [0x2105, 0x10, 100]
+    assert len(node.posts) == 1
+    assert sorted(r["method"] for r in node.posts[0]) == ["eth_blockNumber", "eth_chainId", "eth_getBalance"]
+    assert len({r["id"] for r in node.posts[0]}) == 3
+
+def test_out_of_order_replies_go_to_their_callers():
+    node = StubNode()
+
+    async def go(w3):
+        return await asyncio.gather(*(w3.eth.get_balance("0x%040x" % i) for i in range(1, 6)), w3.eth.chain_id)
+
+    assert run(node, go) == [100] * 5 + [0x2105]
+    assert len(node.posts) == 1
+
+def test_errors_are_per_item():
+    node = StubNode()
+
+    async def go(w3):
+        return await asyncio.gather(w3.eth.chain_id, w3.eth.get_balance(AsyncWeb3.to_checksum_address(BAD)),
+                                    w3.eth.block_number, return_exceptions=True)
+
+    chain_id, bad, block = run(node, go)
+    assert (chain_id, block) == (0x2105, 0x10)
+    assert isinstance(bad, ValueError) and "no balance for you" in str(bad)
+
+def test_missing_reply_fails_only_that_request():
+    node = StubNode(drop={"eth_blockNumber"})
+
+    async def go(w3):
+        return await asyncio.gather(w3.eth.chain_id, w3.eth.block_number, return_exceptions=True)
+
+    chain_id, block = run(node, go)
+    assert chain_id == 0x2105
+    assert isinstance(block, RuntimeError)
+
+def test_single_request_and_bytes_params():
+    node = StubNode()
+
+    async def go(w3):
+        return await w3.eth.send_raw_transaction(b"\x01\x02\xff")
+
+    assert run(node, go).hex().endswith("ab" * 32)
+    assert isinstance(node.posts[0], dict)
+    assert node.posts[0]["params"] == ["0x0102ff"]
+
+def test_transport_error_fails_the_whole_batch():
+    async def go():
+        provider = BatchingHTTPProvider("http://127.0.0.1:9/", timeout=2)
+        w3 = AsyncWeb3(provider)
+        try:
+            return await asyncio.gather(w3.eth.chain_id, w3.eth.block_number, return_exceptions=True)
+        finally:
+            await provider.close()
+
+    res = asyncio.run(go())
+    assert all(isinstance(r, Exception) for r in res)
@@ -6,28 +6,47 @@ import { Search, ListFilter as Filter, ExternalLink } from 'lucide-react';
 import { Card } from '@/components/ui/card';
 import { Input } from '@/components/ui/input';
 import { Button } from '@/components/ui/button';
-import RecentTransfers from '@/components/recent-transfers';
-import { MOCK_TRANSACTIONS } from '@/lib/mock';
+import RecentTransfers, { TransferRow } from '@/components/recent-transfers';
+import { useActivity } from '@/hooks/useActivity';
 import { useAccount } from 'wagmi';
 
 export default function ActivityPage() {
-  const { isConnected } = useAccount();
+  const { address, isConnected } = useAccount();
   const [searchQuery, setSearchQuery] = useState('');
   const [filterType, setFilterType] = useState<'all' | 'sent' | 'received'>('all');
+  const activity = useActivity(isConnected ? address : undefined);
 
-  const filteredTransactions = MOCK_TRANSACTIONS.filter(tx => {
+  const transactions: TransferRow[] = activity.items.map(item => ({
+    id: item.hash,
+    hash: item.hash,
+    from: item.from,
+    to: item.to,
+    amount: item.amount,
+    symbol: item.token,
+    status: 'confirmed',
+    timestamp: item.ts * 1000,
+    memo: '',
+    incoming: item.to?.toLowerCase() === address?.toLowerCase(),
+  }));
+
+  const filteredTransactions = transactions.filter(tx => {
     const matchesSearch = 
       tx.hash.toLowerCase().includes(searchQuery.toLowerCase()) ||
       tx.to.toLowerCase().includes(searchQuery.toLowerCase()) ||
-      tx.memo.toLowerCase().includes(searchQuery.toLowerCase());
+      tx.from.toLowerCase().includes(searchQuery.toLowerCase());
 
     const matchesFilter = filterType === 'all' || 
-      (filterType === 'sent' && true) || // All mock transactions are sent
-      (filterType === 'received' && false);
+      (filterType === 'sent' && !tx.incoming) ||
+      (filterType === 'received' && !!tx.incoming);
 
     return matchesSearch && matchesFilter;
   });
 
+  const sent = transactions.filter(tx => !tx.incoming);
+  const cikSent = sent
+    .filter(tx => tx.symbol === 'CIK')
+    .reduce((sum, tx) => sum + (parseFloat(tx.amount) || 0), 0);
+
   if (!isConnected) {
     return (
       <div className="text-center py-16">
@@ -56,7 +75,7 @@ export default function ActivityPage() {
           <div className="relative flex-1">
             <Search className="absolute left-3 top-1/2 transform -translate-y-1/2 w-4 h-4 text-foreground/40" />
             <Input
-              placeholder="Search by hash, address, or memo..."
+              placeholder="Search by hash or address..."
               value={searchQuery}
               onChange={(e) => setSearchQuery(e.target.value)}
               className="pl-10 glass-card text-foreground placeholder:text-foreground/40 focus:border-primary focus:ring-primary"
@@ -91,7 +110,7 @@ export default function ActivityPage() {
           transition={{ delay: 0.1 }}
         >
           <Card className="glass-card p-6 text-center shadow-cik">
-            <p className="text-3xl font-bold tabular-nums gradient-text">2</p>
+            <p className="text-3xl font-bold tabular-nums gradient-text">{transactions.length}</p>
             <p className="text-foreground/50 text-sm mt-2">Total Transfers</p>
           </Card>
         </motion.div>
@@ -102,7 +121,9 @@ export default function ActivityPage() {
           transition={{ delay: 0.2 }}
         >
           <Card className="glass-card p-6 text-center shadow-cik">
-            <p className="text-3xl font-bold tabular-nums gradient-text">150.75</p>
+            <p className="text-3xl font-bold tabular-nums gradient-text">
+              {cikSent.toLocaleString(undefined, { maximumFractionDigits: 2 })}
+            </p>
             <p className="text-foreground/50 text-sm mt-2">$CIK Sent</p>
           </Card>
         </motion.div>
@@ -113,8 +134,8 @@ export default function ActivityPage() {
           transition={{ delay: 0.3 }}
         >
           <Card className="glass-card p-6 text-center shadow-cik">
-            <p className="text-3xl font-bold tabular-nums gradient-text">1</p>
-            <p className="text-foreground/50 text-sm mt-2">Pending</p>
+            <p className="text-3xl font-bold tabular-nums gradient-text">{transactions.length - sent.length}</p>
+            <p className="text-foreground/50 text-sm mt-2">Received</p>
           </Card>
         </motion.div>
       </div>
@@ -139,10 +160,27 @@ export default function ActivityPage() {
         </div>
         
         {filteredTransactions.length > 0 ? (
-          <RecentTransfers limit={filteredTransactions.length} />
+          <>
+            <RecentTransfers limit={filteredTransactions.length} transactions={filteredTransactions} />
+            {activity.hasMore && (
+              <div className="text-center mt-6">
+                <Button
+                  variant="outline"
+                  size="sm"
+                  disabled={activity.isLoading}
+                  onClick={activity.loadMore}
+                  className="border-primary/30 text-primary hover:bg-primary/5 rounded-cik-sm"
+                >
+                  {activity.isLoading ? 'Loading...' : 'Load more'}
+                </Button>
+              </div>
+            )}
+          </>
         ) : (
           <Card className="glass-card p-12 text-center shadow-cik">
-            <p className="text-foreground/50">No transactions found</p>
+            <p className="text-foreground/50">
+              {activity.isLoading ? 'Loading activity...' : 'No transactions found'}
+            </p>
             {searchQuery && (
               <Button
                 variant="ghost"
@@ -12,6 +12,7 @@ import { useAccount } from 'wagmi';
 import { Address } from 'viem';
 import { TOKENS } from '@/lib/contracts';
 import { validAmount, isAddress } from '@/lib/validators';
+import { resolveHandle } from '@/lib/api';
 
 interface CommandOutput {
   id: string;
@@ -91,9 +92,7 @@ export default function TerminalPage() {
     }
     
     if (addressOrHandle.startsWith('@')) {
-      // Simulate handle resolution
-      const { HANDLE_TO_ADDRESS } = await import('@/lib/mock');
-      return HANDLE_TO_ADDRESS[addressOrHandle] || null;
+      return resolveHandle(addressOrHandle).catch(() => null);
     }
     
     return null;
@@ -10,15 +10,29 @@ import { TxStatus } from '@/hooks/useTxStatus';
 import { useState } from 'react';
 import { cn } from '@/lib/utils';
 
+export interface TransferRow {
+  id: string;
+  hash: string;
+  from: string;
+  to: string;
+  amount: string;
+  symbol: string;
+  status: TxStatus;
+  timestamp: number;  // ms
+  memo: string;
+  incoming?: boolean;
+}
+
 interface RecentTransfersProps {
   limit?: number;
   className?: string;
+  transactions?: TransferRow[];  // defaults to the mock history
 }
 
-export default function RecentTransfers({ limit = 5, className }: RecentTransfersProps) {
+export default function RecentTransfers({ limit = 5, className, transactions: rows }: RecentTransfersProps) {
   const [copiedHash, setCopiedHash] = useState<string | null>(null);
 
-  const transactions = MOCK_TRANSACTIONS.slice(0, limit);
+  const transactions: TransferRow[] = (rows ?? MOCK_TRANSACTIONS).slice(0, limit);
 
   const handleCopyHash = async (hash: string) => {
     try {
@@ -62,7 +76,11 @@ export default function RecentTransfers({ limit = 5, className }: RecentTransfer
             <div className="flex items-center justify-between">
               <div className="flex items-center space-x-4">
                 <div className="w-10 h-10 rounded-full bg-primary/20 flex items-center justify-center">
-                  <ArrowUpRight className="w-5 h-5 text-primary" />
+                  {tx.incoming ? (
+                    <ArrowDownLeft className="w-5 h-5 text-primary" />
+                  ) : (
+                    <ArrowUpRight className="w-5 h-5 text-primary" />
+                  )}
                 </div>
                 
                 <div>
@@ -74,7 +92,7 @@ export default function RecentTransfers({ limit = 5, className }: RecentTransfer
                   </div>
                   
                   <p className="text-sm text-white/50">
-                    To {tx.to} • {formatTime(tx.timestamp)}
+                    {tx.incoming ? `From ${tx.from}` : `To ${tx.to}`} • {formatTime(tx.timestamp)}
                   </p>
                   
                   {tx.memo && (
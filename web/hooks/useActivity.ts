@@ -0,0 +1,64 @@
+'use client';
+
+import { useCallback, useEffect, useState } from 'react';
+import { ActivityItem, fetchActivityPage, subscribeActivity } from '@/lib/api';
+
+const PAGE_SIZE = 20;
+
+export interface Activity {
+  items: ActivityItem[];
+  isLoading: boolean;
+  hasMore: boolean;
+  loadMore: () => void;
+}
+
+// Newest-first transfers to or from `address`: the first page from /activity,
+// older ones on loadMore, and new ones pushed by the SSE feed (no polling).
+export function useActivity(address?: string): Activity {
+  const [items, setItems] = useState<ActivityItem[]>([]);
+  const [next, setNext] = useState<string | null>(null);
+  const [isLoading, setIsLoading] = useState(false);
+
+  useEffect(() => {
+    setItems([]);
+    setNext(null);
+    if (!address) return;
+
+    let cancelled = false;
+    setIsLoading(true);
+    fetchActivityPage(PAGE_SIZE, { address })
+      .then(({ items, next }) => {
+        if (cancelled) return;
+        // the feed may already have pushed some of these
+        setItems(prev => [...prev, ...items.filter(i => !prev.some(p => p.hash === i.hash))]);
+        setNext(next);
+      })
+      .catch(() => {})
+      .finally(() => !cancelled && setIsLoading(false));
+
+    const mine = address.toLowerCase();
+    const unsubscribe = subscribeActivity((item) => {
+      if (item.from?.toLowerCase() !== mine && item.to?.toLowerCase() !== mine) return;
+      setItems(prev => [item, ...prev.filter(p => p.hash !== item.hash)]);
+    });
+
+    return () => {
+      cancelled = true;
+      unsubscribe();
+    };
+  }, [address]);
+
+  const loadMore = useCallback(() => {
+    if (!address || !next || isLoading) return;
+    setIsLoading(true);
+    fetchActivityPage(PAGE_SIZE, { address, cursor: next })
+      .then(({ items, next }) => {
+        setItems(prev => [...prev, ...items.filter(i => !prev.some(p => p.hash === i.hash))]);
+        setNext(next);
+      })
+      .catch(() => {})
+      .finally(() => setIsLoading(false));
+  }, [address, next, isLoading]);
+
+  return { items, isLoading, hasMore: !!next, loadMore };
+}
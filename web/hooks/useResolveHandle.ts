@@ -2,7 +2,7 @@
 
 import { useState, useEffect } from 'react';
 import { Address } from 'viem';
-import { HANDLE_TO_ADDRESS } from '@/lib/mock';
+import { resolveHandle } from '@/lib/api';
 import { isAddress, isValidHandle } from '@/lib/validators';
 
 export interface ResolvedAddress {
@@ -48,9 +48,11 @@ export function useResolveHandle(input: string): ResolvedAddress {
     if (isValidHandle(cleanInput)) {
       setResult(prev => ({ ...prev, isLoading: true, isHandle: true }));
 
-      // Simulate async resolution
-      setTimeout(() => {
-        const resolvedAddress = HANDLE_TO_ADDRESS[cleanInput];
+      // Debounce so typing-ahead only resolves the handle the user settled on
+      let cancelled = false;
+      const timer = setTimeout(async () => {
+        const resolvedAddress = await resolveHandle(cleanInput).catch(() => null);
+        if (cancelled) return;
         if (resolvedAddress) {
           setResult({
             address: resolvedAddress,
@@ -66,9 +68,12 @@ export function useResolveHandle(input: string): ResolvedAddress {
             isHandle: true,
           });
         }
-      }, 500);
+      }, 150);
 
-      return;
+      return () => {
+        cancelled = true;
+        clearTimeout(timer);
+      };
     }
 
     // Invalid input
@@ -30,8 +30,34 @@ export async function logTransfer(payload: {
   return res.json();
 }
 
-export async function fetchActivity(limit: number = 20) {
-  const res = await fetch(`${process.env.NEXT_PUBLIC_API_BASE}/activity?limit=${limit}`);
-  if (!res.ok) return [];
-  return res.json();
+type ActivityFilter = { cursor?: string; address?: string; token?: string };
+
+export type ActivityItem = {
+  hash: string;
+  from: string;
+  to: string;
+  token: string;
+  amount: string;
+  ts: number;  // unix seconds
+};
+
+export async function fetchActivityPage(limit: number = 20, opts: ActivityFilter = {}) {
+  const q = new URLSearchParams({ limit: String(limit) });
+  if (opts.cursor) q.set("cursor", opts.cursor);
+  if (opts.address) q.set("address", opts.address);
+  if (opts.token) q.set("token", opts.token);
+  const res = await fetch(`${process.env.NEXT_PUBLIC_API_BASE}/activity?${q}`);
+  if (!res.ok) return { items: [] as ActivityItem[], next: null as string | null };
+  return { items: (await res.json()) as ActivityItem[], next: res.headers.get("X-Next-Cursor") };
+}
+
+export async function fetchActivity(limit: number = 20, opts: ActivityFilter = {}) {
+  return (await fetchActivityPage(limit, opts)).items;
+}
+
+export function subscribeActivity(onTransfer: (item: ActivityItem) => void, onPayout?: (item: any) => void) {
+  const es = new EventSource(`${process.env.NEXT_PUBLIC_API_BASE}/activity/stream`);
+  es.addEventListener('transfer', (e) => onTransfer(JSON.parse((e as MessageEvent).data)));
+  if (onPayout) es.addEventListener('payout', (e) => onPayout(JSON.parse((e as MessageEvent).data)));
+  return () => es.close();
 }
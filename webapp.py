@@ -1,14 +1,232 @@
 # webapp.py
-from fastapi import FastAPI, HTTPException, Header
+from fastapi import FastAPI, HTTPException, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Optional
-import os, sqlite3, time
+from decimal import Decimal
+from contextlib import asynccontextmanager
+import os, io, csv, json, base64, hashlib, sqlite3, time, asyncio, logging, contextlib
+
+from web3 import Web3
+
+import metrics
+import storage
+from storage import DB_PATH, Database
+from fee_oracle import FeeOracle, ETH_TRANSFER_GAS
 
 API_KEY = os.getenv("API_KEY", "devkey")  # set a real one in .env
-DB_PATH = os.getenv("DB_PATH", "users.db")
+DB_READERS = int(os.getenv("DB_READERS", "4"))
+RESOLVE_REFRESH_SECS = float(os.getenv("RESOLVE_REFRESH_SECS", "2"))
+RESOLVE_MISS_TTL = float(os.getenv("RESOLVE_MISS_TTL", "10"))
+RESOLVE_MISS_MAX = int(os.getenv("RESOLVE_MISS_MAX", "10000"))
+RESOLVE_BATCH_MAX = int(os.getenv("RESOLVE_BATCH_MAX", "1000"))
+BATCH_MAX  = int(os.getenv("TRANSFER_BATCH_MAX", "1000"))
+FEED_POLL_SECS  = float(os.getenv("FEED_POLL_SECS", "0.5"))
+FEED_HEARTBEAT  = float(os.getenv("FEED_HEARTBEAT_SECS", "15"))
+FEED_CLIENT_BUF = int(os.getenv("FEED_CLIENT_BUF", "256"))
+ETH_RPC_URL    = os.getenv("ETH_RPC_URL")
+TOKEN_ADDRESS  = os.getenv("TOKEN_ADDRESS")
+FUNDER_ADDRESS = os.getenv("FUNDER_ADDRESS")  # any holder of the token works as the estimate sender
+PRIORITY_FEE_GWEI = os.getenv("PRIORITY_FEE_GWEI")
+
+DB = Database(DB_PATH, DB_READERS)
+
+def norm_handle(h: str) -> str:
+    return h.strip().lstrip("@").lower()
+
+class HandleIndex:
+    """In-memory handle -> address map over the bot's `bindings` table.
+
+    Bindings are insert-only, so a refresh only pulls rows past the highest
+    rowid seen. Refreshes happen at most every `refresh` seconds; a handle
+    that misses forces one early refresh and is then remembered as a miss for
+    `miss_ttl` seconds so typing-ahead can't turn into a query per keystroke.
+    Misses are kept oldest first; expired ones are swept on every refresh and
+    at most `miss_max` are held.
+    """
+
+    def __init__(self, db: Database, refresh: float, miss_ttl: float, miss_max: int = 10_000):
+        self.db = db
+        self.refresh = refresh
+        self.miss_ttl = miss_ttl
+        self.miss_max = miss_max
+        self._addrs: dict[str, str] = {}
+        self._misses: dict[str, float] = {}   # handle -> when it missed, in insertion order
+        self._rowid = 0
+        self._at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _pull(self, con, since: int):
+        return con.execute("SELECT rowid, handle, eth_addr FROM bindings WHERE rowid > ? ORDER BY rowid",
+                           (since,)).fetchall()
+
+    async def sync(self, force: bool = False):
+        if not force and time.monotonic() - self._at < self.refresh:
+            return
+        async with self._lock:
+            if not force and time.monotonic() - self._at < self.refresh:
+                return
+            since = self._rowid
+            rows = await self.db.read(lambda con: self._pull(con, since))
+            for rowid, handle, addr in rows:
+                self._addrs[handle] = addr
+                self._misses.pop(handle, None)
+                self._rowid = max(self._rowid, rowid)
+            self._at = time.monotonic()
+            self._forget_misses(self._at - self.miss_ttl)
+            if rows:
+                logging.info("Handle index: +%d bindings (%d total)", len(rows), len(self._addrs))
+
+    async def resolve(self, handles: list[str]) -> dict[str, str | None]:
+        await self.sync()
+        keys = {h: norm_handle(h) for h in handles}
+        now = time.monotonic()
+        if any(k not in self._addrs and now - self._misses.get(k, -self.miss_ttl) >= self.miss_ttl
+               for k in keys.values()):
+            await self.sync(force=True)
+            for k in keys.values():
+                if k not in self._addrs:
+                    self._misses.pop(k, None)   # re-insert, so the order stays oldest first
+                    self._misses[k] = now
+            self._forget_misses(now - self.miss_ttl)
+        return {h: self._addrs.get(k) for h, k in keys.items()}
+
+    def _forget_misses(self, before: float):
+        """Drop misses older than `before`, then the oldest past `miss_max`."""
+        misses = self._misses
+        while misses and (len(misses) > self.miss_max or next(iter(misses.values())) < before):
+            del misses[next(iter(misses))]
+
+HANDLES = HandleIndex(DB, RESOLVE_REFRESH_SECS, RESOLVE_MISS_TTL, RESOLVE_MISS_MAX)
+
+def _transfer_item(r: sqlite3.Row) -> dict:
+    return {"hash": r["hash"], "from": r["from_addr"], "to": r["to_addr"],
+            "token": r["token"], "amount": r["amount"], "ts": r["ts"]}
+
+def _payout_item(r: sqlite3.Row) -> dict:
+    return {"hash": r["tx_hash"], "tweet_id": r["tid"], "kind": r["kind"], "to": r["to_addr"],
+            "amount": r["amount"], "ts": int(r["sent_at"])}
+
+# SSE event -> (rows keyed by a growing rowid, encoder): transfers logged through
+# this API, and payouts the bot records once their tx confirms
+FEED_TABLES = {
+    "transfer": ("SELECT rowid, hash, from_addr, to_addr, token, amount, ts FROM wallet_transfers", _transfer_item),
+    "payout":   ("SELECT id AS rowid, tx_hash, tid, kind, to_addr, amount, sent_at FROM payouts", _payout_item),
+}
+
+def _feed_id(pos: dict[str, int]) -> str:
+    return "-".join(str(pos[k]) for k in FEED_TABLES)
+
+def _parse_feed_id(s: str) -> dict[str, int] | None:
+    """Last-Event-ID back into per-table rowids; a bare number is a transfer rowid."""
+    parts = s.split("-")
+    if not all(p.isdigit() for p in parts) or len(parts) > len(FEED_TABLES):
+        return None
+    return dict(zip(FEED_TABLES, map(int, parts)))
+
+class ChangeFeed:
+    """One tailer for wallet_transfers and payouts, fanned out to every live client.
+
+    A dedicated connection watches PRAGMA data_version (bumped by any other
+    connection's commit, including the bot's), and only when it moves reads
+    rows past the last rowid seen in each table. Each new row is encoded once
+    and pushed to per-client queues, so N clients cost one query per table,
+    not N. Event ids carry the position in every table; a client whose queue
+    fills up is dropped and can reconnect with Last-Event-ID.
+    """
+
+    def __init__(self, path: str, poll: float, buf: int):
+        self.path = path
+        self.poll = poll
+        self.buf = buf
+        self.pos = dict.fromkeys(FEED_TABLES, 0)
+        self._clients: set[asyncio.Queue] = set()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._con: sqlite3.Connection | None = None
+
+    def _open(self):
+        con = storage.connect(self.path, readonly=True)
+        for event, (sql, _) in FEED_TABLES.items():
+            self.pos[event] = con.execute(f"SELECT coalesce(max(rowid), 0) FROM ({sql})").fetchone()[0]
+        return con
+
+    async def start(self):
+        self._con = await asyncio.to_thread(self._open)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        for q in list(self._clients):
+            q.put_nowait(None)
+        if self._con is not None:
+            self._con.close()
+
+    def nudge(self):
+        """Called after our own writes so they go out without waiting a poll."""
+        self._wake.set()
+
+    async def _run(self):
+        seen = None
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), self.poll)
+            self._wake.clear()
+            try:
+                ver = await asyncio.to_thread(lambda: self._con.execute("PRAGMA data_version").fetchone()[0])
+                if ver == seen:
+                    continue
+                seen = ver
+                for event in FEED_TABLES:
+                    while True:
+                        rows = await asyncio.to_thread(_feed_rows, self._con, event, self.pos[event])
+                        for rowid, item in rows:
+                            self.pos[event] = rowid
+                            self._publish(event, rowid, _feed_event(event, self.pos, item))
+                        if len(rows) < 1000:
+                            break
+            except Exception:
+                logging.exception("Change feed poll failed")
+
+    def _publish(self, event: str, rowid: int, msg: str):
+        for q in list(self._clients):
+            try:
+                q.put_nowait((event, rowid, msg))
+            except asyncio.QueueFull:
+                logging.warning("Dropping slow activity stream client")
+                self._clients.discard(q)
+                while not q.empty():
+                    q.get_nowait()
+                q.put_nowait(None)
+
+    def subscribe(self) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(self.buf)
+        self._clients.add(q)
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue):
+        self._clients.discard(q)
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+FEED = ChangeFeed(DB_PATH, FEED_POLL_SECS, FEED_CLIENT_BUF)
+
+@asynccontextmanager
+async def lifespan(_app):
+    DB.open()
+    await HANDLES.sync(force=True)
+    await FEED.start()
+    yield
+    await FEED.stop()
+    DB.close()
 
-app = FastAPI(title="CIK Backend API", version="1.0")
+app = FastAPI(title="CIK Backend API", version="1.0", lifespan=lifespan)
 
 # CORS: allow your Next.js dev + prod
 origins = ["http://localhost:3000", "http://127.0.0.1:3000", "https://christisking.io"]
@@ -16,10 +234,25 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=origins, allow_credentials=True,
     allow_methods=["*"], allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
-def db():
-    return sqlite3.connect(DB_PATH)
+_w3 = _oracle = _token = None
+
+def fee_oracle():
+    global _w3, _oracle, _token
+    if _oracle is None:
+        if not ETH_RPC_URL:
+            raise HTTPException(status_code=503, detail="fee estimates unavailable: ETH_RPC_URL not set")
+        _w3 = Web3(Web3.HTTPProvider(ETH_RPC_URL))
+        _oracle = FeeOracle(_w3, float(PRIORITY_FEE_GWEI) if PRIORITY_FEE_GWEI else None)
+        if TOKEN_ADDRESS:
+            _token = _w3.eth.contract(address=Web3.to_checksum_address(TOKEN_ADDRESS),
+                                      abi=[{"constant": False, "inputs": [{"name": "to", "type": "address"},
+                                                                         {"name": "amount", "type": "uint256"}],
+                                            "name": "transfer", "outputs": [{"name": "", "type": "bool"}],
+                                            "type": "function"}])
+    return _oracle
 
 class ResolveReq(BaseModel):
     handle: str = Field(..., examples=["@adi"])
@@ -27,6 +260,12 @@ class ResolveReq(BaseModel):
 class ResolveRes(BaseModel):
     address: Optional[str]  # 0x… or None
 
+class ResolveBatchReq(BaseModel):
+    handles: list[str] = Field(..., examples=[["@adi", "@umar"]])
+
+class ResolveBatchRes(BaseModel):
+    addresses: dict[str, Optional[str]]  # keyed by the handle as sent
+
 class FeeReq(BaseModel):
     to: str
     token: str  # "CIK" or "ETH"
@@ -48,55 +287,227 @@ class TransferLogReq(BaseModel):
 class TransferLogRes(BaseModel):
     ok: bool
 
+class TransferBatchReq(BaseModel):
+    items: list[TransferLogReq]
+
+class TransferBatchRes(BaseModel):
+    ok: bool
+    count: int
+
 def require_key(x_api_key: str = Header(None)):
     if x_api_key != API_KEY:
         raise HTTPException(status_code=401, detail="bad api key")
 
 @app.post("/resolve", response_model=ResolveRes)
-def resolve(req: ResolveReq):
-    # simple stub → replace with your real mapping / DB lookup
-    book = {"@adi": "0x0000000000000000000000000000000000000001",
-            "@umar": "0x0000000000000000000000000000000000000002",
-            "@shad": "0x0000000000000000000000000000000000000003"}
-    return {"address": book.get(req.handle.lower())}
+async def resolve(req: ResolveReq):
+    return {"address": (await HANDLES.resolve([req.handle]))[req.handle]}
+
+@app.post("/resolve/batch", response_model=ResolveBatchRes)
+async def resolve_batch(req: ResolveBatchReq):
+    if len(req.handles) > RESOLVE_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"at most {RESOLVE_BATCH_MAX} handles per batch")
+    return {"addresses": await HANDLES.resolve(req.handles)}
+
+@app.get("/state/{handle}")
+async def handle_state(handle: str, limit: int = Query(20, ge=1, le=200)):
+    """The bot's view of a handle: bound wallet, waiting blessing, recent payouts."""
+    hn = norm_handle(handle)
+    return await DB.read(lambda con: storage.handle_state(con, hn, limit))
+
+@app.get("/metrics")
+def prometheus_metrics():
+    body, ctype = metrics.render()
+    return Response(body, media_type=ctype)
 
 @app.post("/fee-estimate", response_model=FeeRes)
 def fee_estimate(req: FeeReq):
-    # stub now; later call web3.py for real estimate
-    return {"gas_estimate": "21000", "total_cost": "0.00042"}
+    oracle = fee_oracle()
+    if req.token.upper() == "ETH":
+        gas = ETH_TRANSFER_GAS
+    else:
+        if _token is None or not FUNDER_ADDRESS:
+            raise HTTPException(status_code=503, detail="token fee estimates need TOKEN_ADDRESS and FUNDER_ADDRESS")
+        if not Web3.is_address(req.to):
+            raise HTTPException(status_code=422, detail="bad recipient address")
+        # gas doesn't depend on the amount; quote the cold (first-receipt) worst case
+        gas = oracle.transfer_gas(_token, Web3.to_checksum_address(req.to), Web3.to_checksum_address(FUNDER_ADDRESS), 1)
+        if gas is None:
+            raise HTTPException(status_code=502, detail="gas estimate failed")
+    gas, cost_wei = oracle.quote(gas)
+    return {"gas_estimate": str(gas), "total_cost": str(Decimal(cost_wei) / Decimal(10**18))}
+
+def _transfer_row(req: TransferLogReq, ts: int) -> tuple:
+    return (req.hash, req.from_addr, req.to, req.token, req.amount, req.memo, req.chain_id, ts)
 
 @app.post("/transfers", response_model=TransferLogRes)
-def log_transfer(req: TransferLogReq, x_api_key: str = Header(None)):
+async def log_transfer(req: TransferLogReq, x_api_key: str = Header(None)):
     require_key(x_api_key)
-    con = db()
-    con.execute("""
-      CREATE TABLE IF NOT EXISTS transfers(
-        hash TEXT PRIMARY KEY,
-        from_addr TEXT, to_addr TEXT, token TEXT, amount TEXT,
-        memo TEXT, chain_id INTEGER, ts INTEGER
-      )
-    """)
-    con.execute(
-      "INSERT OR REPLACE INTO transfers VALUES(?,?,?,?,?,?,?,?)",
-      (req.hash, req.from_addr, req.to, req.token, req.amount, req.memo, req.chain_id, int(time.time()))
-    )
-    con.commit(); con.close()
+    row = _transfer_row(req, int(time.time()))
+    await DB.write(lambda con: con.execute("INSERT OR REPLACE INTO wallet_transfers VALUES(?,?,?,?,?,?,?,?)", row))
+    FEED.nudge()
     return {"ok": True}
 
+@app.post("/transfers/batch", response_model=TransferBatchRes)
+async def log_transfers(req: TransferBatchReq, x_api_key: str = Header(None)):
+    require_key(x_api_key)
+    if len(req.items) > BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"at most {BATCH_MAX} transfers per batch")
+    now = int(time.time())
+    rows = [_transfer_row(t, now) for t in req.items]
+    await DB.write(lambda con: con.executemany("INSERT OR REPLACE INTO wallet_transfers VALUES(?,?,?,?,?,?,?,?)", rows))
+    FEED.nudge()
+    return {"ok": True, "count": len(rows)}
+
 @app.get("/transfers/{hash}", response_model=TransferLogRes)
-def has_transfer(hash: str):
-    con = db()
-    cur = con.execute("SELECT 1 FROM transfers WHERE hash=?", (hash,))
-    ok = cur.fetchone() is not None
-    con.close()
-    return {"ok": ok}
+async def has_transfer(hash: str):
+    row = await DB.read(lambda con: con.execute("SELECT 1 FROM wallet_transfers WHERE hash=?", (hash,)).fetchone())
+    return {"ok": row is not None}
+
+ACTIVITY_COLS = "hash, from_addr, to_addr, token, amount, ts"
+EXPORT_PAGE = 1000
+
+def _encode_cursor(ts: int, h: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([ts, h]).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> tuple[int, str]:
+    try:
+        ts, h = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(ts), str(h)
+    except Exception:
+        raise HTTPException(status_code=400, detail="bad cursor")
+
+def _activity_query(con, where: list[str], args: list, after: tuple[int, str] | None, limit: int) -> list:
+    if after:
+        where = where + ["(ts, hash) < (?, ?)"]
+        args = args + list(after)
+    sql = (f"SELECT {ACTIVITY_COLS} FROM wallet_transfers"
+           + (" WHERE " + " AND ".join(where) if where else "")
+           + " ORDER BY ts DESC, hash DESC LIMIT ?")
+    return con.execute(sql, (*args, limit)).fetchall()
+
+def _activity_page(con, address: str | None, token: str | None, after: tuple[int, str] | None, limit: int):
+    """Newest-first page keyed on (ts, hash), so each page is an index range scan.
+    An address is looked up on each side separately (an OR would sort its
+    whole history) and the two pages are merged; a self-transfer shows once."""
+    where, args = (["token = ?"], [token]) if token else ([], [])
+    if not address:
+        return _activity_query(con, where, args, after, limit)
+    sent = _activity_query(con, ["from_addr = ? COLLATE NOCASE", *where], [address, *args], after, limit)
+    received = _activity_query(con, ["to_addr = ? COLLATE NOCASE", *where], [address, *args], after, limit)
+    rows = {r[0]: r for r in sent + received}
+    return sorted(rows.values(), key=lambda r: (r[5], r[0]), reverse=True)[:limit]
+
+def _activity_item(r) -> dict:
+    return {"hash": r[0], "from": r[1], "to": r[2], "token": r[3], "amount": r[4], "ts": r[5]}
 
 @app.get("/activity")
-def activity(limit: int = 20):
-    con = db()
-    rows = con.execute(
-      "SELECT hash, from_addr, to_addr, token, amount, ts FROM transfers ORDER BY ts DESC LIMIT ?",
-      (limit,)
-    ).fetchall()
-    con.close()
-    return [{"hash": r[0], "from": r[1], "to": r[2], "token": r[3], "amount": r[4], "ts": r[5]} for r in rows]
+async def activity(request: Request, response: Response,
+                   limit: int = Query(20, ge=1, le=200),
+                   cursor: Optional[str] = None,
+                   address: Optional[str] = None,
+                   token: Optional[str] = None):
+    """Newest-first transfers. Follow `X-Next-Cursor` for the next page; send
+    the last `ETag` back as If-None-Match to get a 304 while nothing changed."""
+    after = _decode_cursor(cursor) if cursor else None
+    seen = request.headers.get("if-none-match")
+
+    def read(con):
+        # rows are never deleted and INSERT OR REPLACE gives a replaced row a
+        # new rowid, so max(rowid) moves on every write; it is one index probe
+        top = con.execute("SELECT max(rowid) FROM wallet_transfers").fetchone()[0]
+        tag = '"%s"' % hashlib.sha1(f"{top}|{limit}|{cursor}|{address}|{token}".encode()).hexdigest()[:16]
+        return tag, None if seen == tag else _activity_page(con, address, token, after, limit)
+
+    tag, rows = await DB.read(read)
+    if rows is None:
+        return Response(status_code=304, headers={"ETag": tag})
+    response.headers["ETag"] = tag
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1][5], rows[-1][0])
+    return [_activity_item(r) for r in rows]
+
+@app.get("/activity/export")
+async def activity_export(format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+                          address: Optional[str] = None,
+                          token: Optional[str] = None):
+    """Full history, streamed page by page so it never sits in memory."""
+    async def rows():
+        after = None
+        while True:
+            page = await DB.read(lambda con: _activity_page(con, address, token, after, EXPORT_PAGE))
+            for r in page:
+                yield r
+            if len(page) < EXPORT_PAGE:
+                return
+            after = (page[-1][5], page[-1][0])
+
+    async def ndjson():
+        async for r in rows():
+            yield json.dumps(_activity_item(r)) + "\n"
+
+    async def as_csv():
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        w.writerow(["hash", "from", "to", "token", "amount", "ts"])
+        async for r in rows():
+            w.writerow(r)
+            if buf.tell() > 64 * 1024:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
+
+    if format == "csv":
+        return StreamingResponse(as_csv(), media_type="text/csv",
+                                 headers={"Content-Disposition": "attachment; filename=activity.csv"})
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@app.get("/activity/stream")
+async def activity_stream(request: Request, last_event_id: Optional[str] = Header(None)):
+    """Server-Sent Events: a `transfer` event per new wallet_transfers row and
+    a `payout` event per payout the bot records. Reconnecting clients send
+    Last-Event-ID and get whatever they missed replayed first."""
+    q = FEED.subscribe()
+    since = _parse_feed_id(last_event_id) if last_event_id else None
+    upto = dict(FEED.pos)
+    backlog = await DB.read(lambda con: _feed_backlog(con, since, upto)) if since else []
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            pos = {**upto, **(since or {})}
+            for event, rowid, item in backlog:
+                pos[event] = rowid
+                yield _feed_event(event, pos, item)
+            while True:
+                try:
+                    msg = await asyncio.wait_for(q.get(), FEED_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                if msg is None:
+                    return
+                event, rowid, msg = msg
+                if since and rowid <= upto[event]:
+                    continue   # already replayed from the backlog
+                yield msg
+        finally:
+            FEED.unsubscribe(q)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def _feed_rows(con, event: str, since: int, upto: int | None = None, limit: int = 1000) -> list[tuple[int, dict]]:
+    sql, item = FEED_TABLES[event]
+    rows = con.execute(f"SELECT * FROM ({sql}) WHERE rowid > ? AND rowid <= coalesce(?, rowid) ORDER BY rowid LIMIT ?",
+                       (since, upto, limit)).fetchall()
+    return [(r["rowid"], item(r)) for r in rows]
+
+def _feed_event(event: str, pos: dict[str, int], item: dict) -> str:
+    return f"id: {_feed_id(pos)}\nevent: {event}\ndata: {json.dumps(item)}\n\n"
+
+def _feed_backlog(con, since: dict[str, int], upto: dict[str, int]) -> list[tuple[str, int, dict]]:
+    return [(event, rowid, item) for event in FEED_TABLES
+            for rowid, item in _feed_rows(con, event, since.get(event, upto[event]), upto[event])]